@@ -1,3 +1,3 @@
-from .client import GeminiClient
+from .client import AIClient
 
-__all__ = ["GeminiClient"]
+__all__ = ["AIClient"]
@@ -1,101 +1,147 @@
-import google.generativeai as genai
 from typing import List, Dict, Optional
-from config import settings
-from .prompts import SYSTEM_PROMPT
+from .context_cache import CompanyContext, build_system_instruction, context_cache
+from .gateway import CircuitOpenError, LLMGateway, llm_gateway
+from .providers import LLMProvider, LLMProviderError
+from .router import estimate_cost, model_router
+from utils.metrics import LLM_COST, LLM_ERRORS, LLM_IN_FLIGHT, LLM_REQUEST_SECONDS, LLM_ROUTE_DECISIONS, LLM_TOKENS
+from utils.tracing import tracer
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+FALLBACK_RESPONSE = "I apologize, but I'm having trouble processing your request right now. Would you like to speak with a human agent?"
 
-class GeminiClient:
-    """Client for interacting with Google Gemini API."""
+
+class AIClient:
+    """Generates assistant replies through the LLM gateway."""
     
-    def __init__(self):
-        """Initialize the Gemini client."""
-        genai.configure(api_key=settings.gemini_api_key)
-        self.model = genai.GenerativeModel(
-            model_name=settings.gemini_model,
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "top_k": 40,
-                "max_output_tokens": 1024,
-            }
-        )
+    def __init__(self, gateway: Optional[LLMGateway] = None):
+        """
+        Initialize the client.
+        
+        Args:
+            gateway: Gateway to call the LLM through; defaults to the shared llm_gateway
+        """
+        self.gateway = gateway or llm_gateway
+    
+    @property
+    def provider(self) -> LLMProvider:
+        return self.gateway.provider
     
     async def generate_response(
         self,
         message: str,
         conversation_history: Optional[List[Dict[str, str]]] = None,
-        company_knowledge_base: Optional[str] = None
+        company_knowledge_base: Optional[str] = None,
+        intent_scores: Optional[Dict[str, float]] = None,
+        company_routing: Optional[dict] = None,
+        company_context: Optional[CompanyContext] = None
     ) -> str:
         """
-        Generate a response using Gemini AI.
+        Generate a response to a client message.
         
         Args:
             message: The user's message
-            conversation_history: List of previous messages in format [{"role": "user"/"model", "content": "..."}]
+            conversation_history: Previous messages, as stored ({"sender_type", "content"}) or
+                as turns ({"role": "user"/"model", "content"}); may end with the message itself
             company_knowledge_base: Company-specific knowledge base content to inject into context
+            intent_scores: Intent classifier scores of the message, reused for model routing
+            company_routing: The company's model routing overrides
+            company_context: The company's cached prompt prefix; takes the place of
+                company_knowledge_base and lets the provider reuse its cached copy
         
         Returns:
             AI-generated response string
         """
-        try:
-            # Build conversation context
-            chat_history = []
-            if conversation_history:
-                for msg in conversation_history:
-                    role = "user" if msg["role"] in ["user", "CLIENT"] else "model"
-                    chat_history.append({
-                        "role": role,
-                        "parts": [msg["content"]]
-                    })
-            
-            # Start chat with history
-            chat = self.model.start_chat(history=chat_history)
-            
-            # Build enhanced prompt with knowledge base
-            if not conversation_history:
-                prompt = SYSTEM_PROMPT
-                
-                # Add company knowledge base if provided
-                if company_knowledge_base:
-                    prompt += f"\n\n## Company Knowledge Base\n\nYou have access to the following company-specific information. Use this information to provide accurate, relevant answers about the company's products, services, and policies:\n\n{company_knowledge_base}\n\n---\n\nIMPORTANT: When answering questions, prioritize information from the knowledge base above. If the answer is in the knowledge base, use it. If not, provide general assistance and offer to connect with a human agent.\n"
-                
-                prompt += f"\n\nUser: {message}"
-            else:
-                # For subsequent messages, just send the message
-                # The knowledge base context is already in the first message
-                prompt = message
-            
-            # Generate response
-            response = chat.send_message(prompt)
-            
-            return response.text.strip()
+        history = self.build_conversation_context(conversation_history or [])
         
+        # The newest client message is usually saved before the history is read;
+        # fold trailing user turns into the message so roles keep alternating
+        if history and history[-1]["role"] == "user":
+            pending = history.pop()["content"]
+            if pending != message:
+                message = f"{pending}\n\n{message}"
+        
+        if company_context is not None:
+            company_knowledge_base = company_context.knowledge_base
+            system_instruction = company_context.system_instruction
+        else:
+            system_instruction = build_system_instruction(company_knowledge_base)
+        
+        provider = self.provider
+        route = model_router.route(message, company_knowledge_base, intent_scores, company_routing)
+        model = route.model
+        LLM_ROUTE_DECISIONS.labels(route.route, route.reason).inc()
+        LLM_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            with tracer.span("llm.generate", provider=provider.name, model=model, route=route.route,
+                             reason=route.reason, history=len(history)):
+                async with context_cache.use_handle(company_context, model, provider) as cached_context:
+                    result = await self.gateway.generate(
+                        message,
+                        history=history,
+                        system_instruction=system_instruction,
+                        model=model,
+                        generation_config=route.generation_config,
+                        cached_context=cached_context,
+                    )
+            outcome = "ok"
+        except asyncio.CancelledError:
+            # Superseded by a newer client message
+            outcome = "cancelled"
+            raise
+        except CircuitOpenError as e:
+            LLM_ERRORS.labels(provider.name, "circuit_open").inc()
+            logger.warning(f"Skipping AI response: {e}")
+            return FALLBACK_RESPONSE
+        except LLMProviderError as e:
+            LLM_ERRORS.labels(provider.name, "retryable" if e.retryable else "fatal").inc()
+            logger.error(f"Error generating AI response: {e}")
+            return FALLBACK_RESPONSE
         except Exception as e:
+            LLM_ERRORS.labels(provider.name, type(e).__name__).inc()
             logger.error(f"Error generating AI response: {e}")
-            return "I apologize, but I'm having trouble processing your request right now. Would you like to speak with a human agent?"
+            return FALLBACK_RESPONSE
+        finally:
+            LLM_IN_FLIGHT.dec()
+            LLM_REQUEST_SECONDS.labels(provider.name, route.route, model, outcome).observe(time.perf_counter() - start)
+        
+        LLM_TOKENS.labels(provider.name, result.model, "input").inc(result.input_tokens)
+        LLM_TOKENS.labels(provider.name, result.model, "output").inc(result.output_tokens)
+        LLM_TOKENS.labels(provider.name, result.model, "cached").inc(result.cached_tokens)
+        LLM_COST.labels(provider.name, route.route, result.model).inc(
+            estimate_cost(result.model, result.input_tokens, result.output_tokens, result.cached_tokens)
+        )
+        return result.text
     
     def build_conversation_context(self, messages: List[Dict]) -> List[Dict[str, str]]:
         """
         Build conversation context from message history.
         
+        Client messages become "user" turns and AI or agent messages "model"
+        turns; consecutive messages from the same side are merged.
+        
         Args:
-            messages: List of message objects from database
+            messages: Messages as {"sender_type", "content"} or {"role", "content"} dicts
         
         Returns:
-            Formatted conversation history for Gemini
+            Alternating [{"role": "user"/"model", "content": "..."}] turns
         """
         context = []
         for msg in messages:
-            role = "user" if msg.get("sender_type") == "CLIENT" else "model"
-            context.append({
-                "role": role,
-                "content": msg.get("content", "")
-            })
+            role = msg.get("role") or ("user" if msg.get("sender_type") == "CLIENT" else "model")
+            role = "user" if role in ("user", "CLIENT") else "model"
+            content = msg.get("content", "")
+            if context and context[-1]["role"] == role:
+                context[-1]["content"] += f"\n\n{content}"
+            else:
+                context.append({"role": role, "content": content})
         return context
 
 
-# Global instance
-gemini_client = GeminiClient()
+# Global instance (the provider is created on first use, not at import)
+ai_client = AIClient()
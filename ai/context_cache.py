@@ -0,0 +1,241 @@
+"""
+Context Cache
+Keeps each company's static prompt prefix (system prompt plus knowledge
+base) built once and, where the LLM provider supports it, registered in the
+provider's context cache so requests reference it instead of resending it.
+
+Entries are keyed by company and rebuilt when the knowledge base version
+(the set of active resources and their content) changes or the TTL runs
+out. Provider handles are created per model on first use and counted while
+requests use them; a replaced handle is deleted in the background once its
+last request is done.
+
+Providers only cache prefixes above a minimum size: Gemini context caching
+applies once a company's prefix reaches MIN_CACHED_TOKENS (32k tokens, about
+128k characters), which the default knowledge_base_max_chars of 15000 does
+not. Below it the prefix is sent inline and the entry only saves rebuilding
+the knowledge base every turn.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.resource import Resource, ResourceStatus
+from services.resource_service import ResourceService
+from utils.metrics import CONTEXT_CACHE_REQUESTS
+from .prompts import SYSTEM_PROMPT, KNOWLEDGE_BASE_PROMPT
+from .providers import LLMProvider
+
+logger = logging.getLogger(__name__)
+
+# Provider copies outlive local entries, so a handle never expires while in use
+PROVIDER_TTL_GRACE_SECONDS = 300
+
+def build_system_instruction(knowledge_base: Optional[str] = None) -> str:
+    """Build the system instruction, with the company knowledge base if there is one."""
+    if not knowledge_base:
+        return SYSTEM_PROMPT
+    return SYSTEM_PROMPT + KNOWLEDGE_BASE_PROMPT.format(knowledge_base=knowledge_base)
+
+
+def knowledge_base_version(company_id: int, db: Session) -> str:
+    """
+    Fingerprint a company's knowledge base without loading any content.
+
+    Blob keys are content hashes, so any edit, re-crawl, activation or
+    deletion changes the version.
+    """
+    rows = db.query(Resource.id, Resource.content_blob_key).filter(
+        Resource.company_id == company_id,
+        Resource.status == ResourceStatus.COMPLETED,
+        Resource.is_active == 1
+    ).order_by(Resource.id).all()
+    digest = hashlib.sha256()
+    for resource_id, blob_key in rows:
+        digest.update(f"{resource_id}:{blob_key};".encode())
+    return digest.hexdigest()[:16]
+
+
+class CompanyContext:
+    """A company's prompt prefix at one knowledge base version."""
+
+    def __init__(self, company_id: int, version: str, knowledge_base: str, max_chars: int):
+        self.company_id = company_id
+        self.version = version
+        self.knowledge_base = knowledge_base
+        self.max_chars = max_chars
+        self.system_instruction = build_system_instruction(knowledge_base)
+        self.expires_at = time.monotonic() + settings.llm_context_cache_ttl_seconds
+        # model -> provider handle (None when the provider can't cache this prefix)
+        self.handles: Dict[str, Optional[str]] = {}
+        self.provider: Optional[LLMProvider] = None  # Provider that holds the handles
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+class ContextCache:
+    """Company prompt prefixes, built once per knowledge base version."""
+
+    def __init__(self):
+        self._entries: Dict[int, CompanyContext] = {}
+        self._locks: Dict[Tuple[int, str], asyncio.Lock] = {}
+        self._in_use: Counter = Counter()  # handle -> requests using it
+        self._retired: Dict[str, Tuple[CompanyContext, str]] = {}  # handle -> (context, model), deleted when unused
+        self._deletions: Set[asyncio.Task] = set()
+
+    def load(self, company_id: int, db: Session) -> CompanyContext:
+        """
+        Get a company's prefix, rebuilding it if the knowledge base changed or the TTL expired.
+
+        Args:
+            company_id: Company ID
+            db: Database session
+
+        Returns:
+            CompanyContext
+        """
+        version = knowledge_base_version(company_id, db)
+        max_chars = settings.knowledge_base_max_chars
+        entry = self._entries.get(company_id)
+        if entry is not None and entry.version == version and entry.max_chars == max_chars and not entry.expired:
+            CONTEXT_CACHE_REQUESTS.labels("hit").inc()
+            return entry
+
+        if entry is None:
+            result = "miss"
+        else:
+            result = "expired" if entry.version == version and entry.max_chars == max_chars else "refresh"
+        CONTEXT_CACHE_REQUESTS.labels(result).inc()
+
+        knowledge_base = ResourceService.get_company_knowledge_base(company_id, db, max_length=max_chars)
+        fresh = CompanyContext(company_id, version, knowledge_base, max_chars)
+        if not settings.llm_context_cache_enabled:
+            return fresh
+
+        self._evict(company_id)
+        for stale in [cid for cid, cached in self._entries.items() if cached.expired]:
+            self._evict(stale)
+        self._entries[company_id] = fresh
+        return fresh
+
+    def _evict(self, company_id: int):
+        entry = self._entries.pop(company_id, None)
+        if entry is not None:
+            for model in list(entry.handles):
+                self._retire(entry, model)
+
+    def _retire(self, context: CompanyContext, model: str):
+        """Delete a replaced handle now if no request uses it, else when the last one is done."""
+        handle = context.handles.get(model)
+        if not handle:
+            return
+        if self._in_use[handle]:
+            self._retired[handle] = (context, model)
+            return
+        self._retired.pop(handle, None)
+        context.handles[model] = None  # Later requests on this context send the prefix inline
+        self._schedule_delete(context.provider, handle)
+
+    def _schedule_delete(self, provider: Optional[LLMProvider], handle: str):
+        """Delete a provider copy in the background, off the request path."""
+        if provider is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop to run on; the provider TTL removes it
+        task = loop.create_task(self._delete(provider, handle))
+        self._deletions.add(task)
+        task.add_done_callback(self._deletions.discard)
+
+    @staticmethod
+    async def _delete(provider: LLMProvider, handle: str):
+        try:
+            await provider.delete_cached_context(handle)
+        except Exception as e:
+            logger.warning(f"Could not delete cached prompt prefix {handle}: {e}")
+
+    @asynccontextmanager
+    async def use_handle(
+        self,
+        context: Optional[CompanyContext],
+        model: str,
+        provider: LLMProvider
+    ) -> AsyncIterator[Optional[str]]:
+        """
+        Use the provider handle of a company's prefix for a model, creating it once.
+
+        The handle is not deleted before the block exits, even if the
+        prefix is replaced meanwhile.
+
+        Args:
+            context: Prefix from load(), or None for a request without one
+            model: Model the request will use
+            provider: LLM provider
+
+        Yields:
+            Handle to pass as cached_context, or None to send the prefix inline
+        """
+        handle = await self._acquire(context, model, provider)
+        try:
+            yield handle
+        finally:
+            if handle:
+                self._release(handle)
+
+    async def _acquire(self, context: Optional[CompanyContext], model: str, provider: LLMProvider) -> Optional[str]:
+        if context is None or not settings.llm_context_cache_enabled:
+            return None
+        if model not in context.handles:
+            lock = self._locks.setdefault((context.company_id, model), asyncio.Lock())
+            async with lock:
+                if model not in context.handles:
+                    ttl = settings.llm_context_cache_ttl_seconds + PROVIDER_TTL_GRACE_SECONDS
+                    handle = await provider.create_cached_context(context.system_instruction, model, ttl)
+                    context.handles[model] = handle
+                    if handle:
+                        context.provider = provider
+                        logger.info(
+                            f"Cached prompt prefix for company {context.company_id} "
+                            f"(KB version {context.version}, model {model}) as {handle}"
+                        )
+
+        handle = context.handles[model]
+        if handle:
+            self._in_use[handle] += 1
+            if context is not self._entries.get(context.company_id):
+                # Replaced or evicted since load(); delete once this request is done
+                self._retire(context, model)
+        return handle
+
+    def _release(self, handle: str):
+        self._in_use[handle] -= 1
+        if self._in_use[handle] > 0:
+            return
+        del self._in_use[handle]
+        retired = self._retired.pop(handle, None)
+        if retired is not None:
+            self._retire(*retired)
+
+    def stats(self) -> dict:
+        """Get the cached companies and their prefix sizes."""
+        return {
+            "companies": len(self._entries),
+            "prefix_chars": sum(len(entry.system_instruction) for entry in self._entries.values()),
+            "provider_handles": sum(1 for entry in self._entries.values() for handle in entry.handles.values() if handle),
+            "retired_handles": len(self._retired),
+        }
+
+
+# Global context cache instance
+context_cache = ContextCache()
@@ -0,0 +1,288 @@
+"""
+LLM Gateway
+Per-attempt deadlines, jittered retries, circuit breaking and hedged
+requests around LLM provider calls.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from config import settings
+from .providers import GenerationResult, LLMProvider, LLMProviderError, get_provider
+from utils.metrics import LLM_HEDGES, LLM_RETRIES
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Successful attempts kept for the rolling p95 that triggers hedging
+LATENCY_WINDOW_SIZE = 200
+
+
+class CircuitOpenError(LLMProviderError):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+    def __init__(self, message: str):
+        super().__init__(message, retryable=False)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed, calls go through. After failure_threshold retryable failures in a
+    row (outages, throttling, timeouts) it opens and rejects calls for
+    reset_seconds. It then turns half-open and lets a single probe through:
+    success closes it again, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+    # Gauge values for metrics
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.opened_total = 0
+        self.rejected_total = 0
+        self._probe_in_flight = False
+
+    def _transition(self, state: str):
+        logger.warning(f"LLM circuit breaker {self.state} -> {state}")
+        self.state = state
+        if state == self.OPEN:
+            self.opened_at = time.monotonic()
+            self.opened_total += 1
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; claims the probe when half-open."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                self.rejected_total += 1
+                return False
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected_total += 1
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or (
+            self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._transition(self.OPEN)
+
+    def release(self):
+        """Forget a call that ended without telling us anything about the provider."""
+        self._probe_in_flight = False
+
+
+class LatencyWindow:
+    """Rolling window of recent attempt latencies."""
+
+    def __init__(self, size: int):
+        self._samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def quantile(self, fraction: float, min_samples: int = 1) -> Optional[float]:
+        """The latency at a quantile, or None until min_samples have been seen."""
+        if len(self._samples) < max(1, min_samples):
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LLMGateway:
+    """
+    Makes LLM calls survive a misbehaving provider.
+
+    Every attempt gets llm_timeout_seconds. Retryable errors are retried up
+    to llm_max_attempts with full-jitter exponential backoff; other errors
+    are raised at once. A circuit breaker fails calls fast while the
+    provider keeps failing. With llm_hedge_enabled, an attempt still running
+    after the rolling p95 latency gets a second identical request, and the
+    first reply wins.
+    """
+
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        self._provider = provider
+        self.breaker = CircuitBreaker(settings.llm_breaker_failure_threshold, settings.llm_breaker_reset_seconds)
+        self.latencies = LatencyWindow(LATENCY_WINDOW_SIZE)
+        self._hedges_in_flight = 0
+
+    @property
+    def provider(self) -> LLMProvider:
+        if self._provider is None:
+            self._provider = get_provider()
+        return self._provider
+
+    @property
+    def provider_name(self) -> str:
+        """Provider name, without creating the provider."""
+        return self._provider.name if self._provider is not None else settings.llm_provider
+
+    async def generate(
+        self,
+        message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        system_instruction: Optional[str] = None,
+        model: Optional[str] = None,
+        generation_config: Optional[dict] = None,
+        cached_context: Optional[str] = None
+    ) -> GenerationResult:
+        """
+        Generate a reply, retrying and hedging as configured.
+
+        Takes the same arguments as LLMProvider.generate.
+
+        Raises:
+            CircuitOpenError: The provider is failing and was not called
+            LLMProviderError: The last attempt failed, or the error was not retryable
+        """
+        request = {
+            "message": message,
+            "history": history,
+            "system_instruction": system_instruction,
+            "model": model,
+            "generation_config": generation_config,
+            "cached_context": cached_context,
+        }
+        attempts = max(1, settings.llm_max_attempts)
+        for attempt in range(1, attempts + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"LLM provider {self.provider_name} is failing, circuit open")
+            try:
+                with tracer.span("llm.attempt", attempt=attempt):
+                    return await self._attempt(request)
+            except LLMProviderError as e:
+                if not e.retryable or attempt == attempts:
+                    raise
+                delay = self._backoff(attempt)
+                LLM_RETRIES.labels(self.provider_name).inc()
+                logger.warning(f"LLM attempt {attempt} failed ({e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Full-jitter exponential backoff before the next attempt."""
+        ceiling = min(settings.llm_retry_max_seconds, settings.llm_retry_base_seconds * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds after which to hedge the current attempt, or None to not hedge."""
+        if not settings.llm_hedge_enabled or self.breaker.state != CircuitBreaker.CLOSED:
+            return None
+        if self._hedges_in_flight >= settings.llm_hedge_max_in_flight:
+            return None
+        return self.latencies.quantile(0.95, settings.llm_hedge_min_samples)
+
+    async def _call(self, request: dict) -> GenerationResult:
+        """One provider call under the per-attempt deadline."""
+        timeout = settings.llm_timeout_seconds
+        try:
+            return await asyncio.wait_for(self.provider.generate(**request, timeout=timeout), timeout)
+        except asyncio.TimeoutError:
+            raise LLMProviderError(f"LLM call timed out after {timeout}s", retryable=True) from None
+        except (LLMProviderError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            raise LLMProviderError(f"LLM provider error: {e}") from e
+
+    async def _attempt(self, request: dict) -> GenerationResult:
+        """
+        Run one attempt and report its outcome to the breaker once.
+
+        A hedged attempt makes two provider calls but counts as a single
+        success or failure, so one slow call can't trip the breaker twice.
+        """
+        try:
+            result = await self._hedged_call(request)
+        except LLMProviderError as e:
+            # Outages, throttling and timeouts count; other errors say nothing about provider health
+            if e.retryable:
+                self.breaker.record_failure()
+            else:
+                self.breaker.release()
+            raise
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def _hedged_call(self, request: dict) -> GenerationResult:
+        """Make the attempt's call, adding a hedged request if it outlives the p95."""
+        start = time.perf_counter()
+        hedge_after = self._hedge_delay()
+        if hedge_after is None:
+            result = await self._call(request)
+            self.latencies.add(time.perf_counter() - start)
+            return result
+
+        primary = asyncio.ensure_future(self._call(request))
+        tasks = [primary]
+        hedged = False
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                hedged = True
+                self._hedges_in_flight += 1
+                LLM_HEDGES.labels(self.provider_name, "fired").inc()
+                tasks.append(asyncio.ensure_future(self._call(request)))
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            LLM_HEDGES.labels(self.provider_name, "won").inc()
+                        # Whole-attempt latency, so slow primaries cut short by a hedge still count
+                        self.latencies.add(time.perf_counter() - start)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            if hedged:
+                self._hedges_in_flight -= 1
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        """Get breaker state and latency figures."""
+        return {
+            "provider": self.provider_name,
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "circuit_opened_total": self.breaker.opened_total,
+            "circuit_rejected_total": self.breaker.rejected_total,
+            "p95_seconds": self.latencies.quantile(0.95),
+            "hedges_in_flight": self._hedges_in_flight,
+        }
+
+
+# Global gateway instance (the provider is created on first use)
+llm_gateway = LLMGateway()
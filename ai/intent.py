@@ -0,0 +1,355 @@
+"""
+Local handoff-intent detection.
+
+Two cheap stages decide whether a client message should be escalated to a
+human agent before any LLM call is made:
+
+1. A compiled Aho-Corasick matcher over explicit handoff phrases (the
+   global HANDOFF_KEYWORDS plus each company's own phrases). Matching is
+   on whole words, so "agent" does not fire inside "management".
+2. A multinomial naive Bayes classifier over word unigrams and bigrams,
+   trained at import time on the small corpus below, that scores
+   paraphrased handoff requests and customer frustration.
+"""
+
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import math
+import re
+
+from config import settings
+from .prompts import HANDOFF_KEYWORDS
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+HANDOFF = "handoff"
+FRUSTRATION = "frustration"
+OTHER = "other"
+
+# Labelled examples for the intent classifier. "other" deliberately contains
+# sentences that mention agents or representatives without asking for one,
+# and questions about who is answering, requests to cancel or return, and
+# plain corrections, none of which ask for a human.
+TRAINING_DATA: Dict[str, List[str]] = {
+    HANDOFF: [
+        "can i talk to a real human please",
+        "i want to speak with an actual person",
+        "please connect me to an agent",
+        "is there a person i can chat with",
+        "let me talk to somebody from your team",
+        "get me a human",
+        "i need a live person not a bot",
+        "transfer me to customer support staff",
+        "can someone from support call me",
+        "i would like to speak to a representative",
+        "put me through to an operator",
+        "i'd rather talk to a person",
+        "are you a bot i want a human",
+        "can a member of staff help me instead",
+        "connect me with support team please",
+        "i want to chat with a support agent",
+        "escalate this to a human",
+        "i need to speak to your manager",
+        "let me speak to a supervisor",
+        "hand me over to a real agent",
+        "can i get someone on the phone",
+        "is anyone real there",
+        "i prefer talking to a human being",
+        "please pass me to a colleague who can help",
+        "stop the bot and get me a person",
+        "i want human support",
+        "need an agent now",
+        "talk to someone in billing please",
+        "i need a human",
+        "is there a manager i can talk to",
+    ],
+    FRUSTRATION: [
+        "this is useless",
+        "you are not helping at all",
+        "this is ridiculous i have asked three times",
+        "i am so frustrated with this service",
+        "that doesn't answer my question",
+        "you keep saying the same thing",
+        "this is the worst support ever",
+        "i'm getting really annoyed",
+        "why is this so hard",
+        "nothing you said works",
+        "i have been waiting for hours and nobody fixed it",
+        "this is unacceptable",
+        "you don't understand what i'm asking",
+        "stop repeating yourself",
+        "i am fed up with this",
+        "this is a waste of my time",
+        "terrible answer",
+        "that is completely wrong again",
+        "you are useless bot",
+        "i'm angry my order still hasn't arrived after weeks",
+        "are you even listening",
+        "what a joke",
+        "this makes no sense",
+        "i've explained this already",
+    ],
+    OTHER: [
+        "what are your opening hours",
+        "how much does the premium plan cost",
+        "do you ship to canada",
+        "our sales representative told me about a discount",
+        "is there a representative office in berlin",
+        "my agent license number is on the form",
+        "i work as a real estate agent",
+        "thanks that was helpful",
+        "how do i reset my password",
+        "can you tell me about the return policy",
+        "where is my order",
+        "what payment methods do you accept",
+        "hello",
+        "hi there",
+        "i want to upgrade my subscription",
+        "does the product come with a warranty",
+        "the human resources team asked for an invoice",
+        "the person who ordered it is my wife",
+        "can i change my delivery address",
+        "do you have a store near me",
+        "great thank you so much",
+        "how long does shipping take",
+        "i need an invoice for my purchase",
+        "what is included in the basic plan",
+        "can i talk about my order number 1234",
+        "the travel agent booked the wrong date",
+        "is the manager dashboard included in the plan",
+        "how do i add a team member to my account",
+        "i need help with my billing",
+        "i need a new password",
+        "please help me find my order",
+        "can you help me choose a plan",
+        "i need to update my credit card",
+        "i need to cancel my order",
+        "please help me understand the pricing",
+        "help me set up the integration",
+        "i need a copy of my receipt",
+        "can you help me with my account settings",
+        "i want to cancel",
+        "i want to cancel my account",
+        "i want to return my order",
+        "i want to know the price",
+        "who am i talking to",
+        "who is this",
+        "am i talking to a bot",
+        "are you a human or a bot",
+        "are you a real person",
+        "is this an automated chat",
+        "can i speak to sales",
+        "i'd like to speak to sales about pricing",
+        "can i talk to you about my order",
+        "can i ask you something",
+        "do you speak spanish",
+        "this is wrong",
+        "the date on my invoice is wrong",
+        "that price looks wrong to me",
+        "something is wrong with my login",
+        "i think i typed the wrong email",
+    ],
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase a message and split it into word tokens."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def _features(tokens: List[str]) -> List[str]:
+    """Unigram and bigram features of a token list."""
+    return tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over whole-word phrases.
+
+    Phrases and text are normalized to space-separated tokens with a space
+    on each side, so every match starts and ends at a word boundary and one
+    pass over the message finds any of the phrases.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[str]] = [None]
+
+        for phrase in phrases:
+            tokens = tokenize(phrase)
+            if tokens:
+                self._add(f" {' '.join(tokens)} ", phrase)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, phrase: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+            state = next_state
+        self._output[state] = phrase
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[self._fail[next_state]]
+
+    def search(self, tokens: List[str]) -> Optional[str]:
+        """
+        Find the first phrase that occurs in a tokenized message.
+
+        Returns:
+            The matched phrase as configured, or None
+        """
+        state = 0
+        for char in f" {' '.join(tokens)} ":
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state] is not None:
+                return self._output[state]
+        return None
+
+
+class NaiveBayesIntentClassifier:
+    """Multinomial naive Bayes over unigrams and bigrams with Laplace smoothing."""
+
+    def __init__(self, training_data: Dict[str, List[str]], alpha: float = 1.0):
+        self.labels = list(training_data)
+        counts = {label: Counter() for label in self.labels}
+        for label, examples in training_data.items():
+            for example in examples:
+                counts[label].update(_features(tokenize(example)))
+
+        vocabulary = set()
+        for counter in counts.values():
+            vocabulary.update(counter)
+
+        # Precompute log P(feature | label); uniform priors since the corpus is hand-balanced
+        self._log_likelihood: Dict[str, Dict[str, float]] = {}
+        for label, counter in counts.items():
+            denominator = sum(counter.values()) + alpha * len(vocabulary)
+            self._log_likelihood[label] = {
+                feature: math.log((counter[feature] + alpha) / denominator) for feature in vocabulary
+            }
+        self._vocabulary = vocabulary
+
+    def predict_proba(self, tokens: List[str]) -> Dict[str, float]:
+        """
+        Score a tokenized message.
+
+        Returns:
+            Probability per label (uniform when no feature is known)
+        """
+        features = [feature for feature in _features(tokens) if feature in self._vocabulary]
+        scores = {
+            label: sum(self._log_likelihood[label][feature] for feature in features)
+            for label in self.labels
+        }
+        top = max(scores.values())
+        exp_scores = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exp_scores.values())
+        return {label: value / total for label, value in exp_scores.items()}
+
+
+class HandoffIntent:
+    """Result of handoff detection for one message."""
+
+    def __init__(self, handoff: bool, reason: Optional[str], matched_keyword: Optional[str], scores: Dict[str, float]):
+        self.handoff = handoff
+        self.reason = reason  # "keyword", "intent", "frustration" or None
+        self.matched_keyword = matched_keyword
+        self.scores = scores
+
+    def __bool__(self) -> bool:
+        return self.handoff
+
+
+class HandoffDetector:
+    """
+    Decides whether a message should be escalated to a human agent.
+
+    Explicit phrases (global or per company) always escalate. Otherwise the
+    classifier escalates when the handoff or frustration probability reaches
+    its configured threshold.
+    """
+
+    def __init__(self):
+        self.classifier = NaiveBayesIntentClassifier(TRAINING_DATA)
+        self._default_matcher = KeywordMatcher(HANDOFF_KEYWORDS)
+        # company_id -> (raw keyword setting, matcher); rebuilt when the setting changes
+        self._company_matchers: Dict[int, Tuple[str, KeywordMatcher]] = {}
+
+    def _matcher_for(self, company_id: Optional[int], company_keywords) -> KeywordMatcher:
+        """Get the matcher for the global phrases plus a company's own phrases."""
+        if company_id is None or not company_keywords:
+            return self._default_matcher
+
+        key = json.dumps(company_keywords, sort_keys=True)
+        cached = self._company_matchers.get(company_id)
+        if cached is None or cached[0] != key:
+            cached = (key, KeywordMatcher(list(HANDOFF_KEYWORDS) + list(company_keywords)))
+            self._company_matchers[company_id] = cached
+        return cached[1]
+
+    def detect(
+        self,
+        message: str,
+        company_id: Optional[int] = None,
+        company_keywords: Optional[List[str]] = None
+    ) -> HandoffIntent:
+        """
+        Detect a request for a human agent.
+
+        Args:
+            message: The client's message
+            company_id: Company the conversation belongs to
+            company_keywords: The company's extra handoff phrases
+
+        Returns:
+            HandoffIntent (truthy when the message should be escalated)
+        """
+        tokens = tokenize(message)
+        matched = self._matcher_for(company_id, company_keywords).search(tokens)
+        scores = self.classifier.predict_proba(tokens)
+
+        if matched:
+            return HandoffIntent(True, "keyword", matched, scores)
+        if scores[HANDOFF] >= settings.handoff_intent_threshold:
+            return HandoffIntent(True, "intent", None, scores)
+        if scores[FRUSTRATION] >= settings.frustration_threshold:
+            return HandoffIntent(True, "frustration", None, scores)
+        return HandoffIntent(False, None, None, scores)
+
+
+# Global detector instance (trained once at import)
+handoff_detector = HandoffDetector()
+
+
+def detect_handoff_request(message: str) -> bool:
+    """
+    Detect if a message contains a request for human assistance.
+
+    Args:
+        message: The user's message
+
+    Returns:
+        True if handoff is requested, False otherwise
+    """
+    return handoff_detector.detect(message).handoff
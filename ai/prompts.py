@@ -17,29 +17,33 @@ Important guidelines:
 Remember: You are the first point of contact. Your goal is to help efficiently and escalate to human agents when needed.
 """
 
+KNOWLEDGE_BASE_PROMPT = """
+
+## Company Knowledge Base
+
+You have access to the following company-specific information. Use this information to provide accurate, relevant answers about the company's products, services, and policies:
+
+{knowledge_base}
+
+---
+
+IMPORTANT: When answering questions, prioritize information from the knowledge base above. If the answer is in the knowledge base, use it. If not, provide general assistance and offer to connect with a human agent.
+"""
+
+# Explicit phrases that always escalate (matched on whole words by ai.intent).
+# Paraphrases and frustration are left to the intent classifier.
 HANDOFF_KEYWORDS = [
     "speak to a human",
+    "talk to a human",
     "talk to a person",
+    "speak to a person",
     "human agent",
     "real person",
     "customer service representative",
+    "speak to a representative",
+    "talk to a representative",
     "live agent",
     "human help",
     "speak with someone",
     "talk to someone",
-    "representative",
 ]
-
-
-def detect_handoff_request(message: str) -> bool:
-    """
-    Detect if a message contains a request for human assistance.
-    
-    Args:
-        message: The user's message
-    
-    Returns:
-        True if handoff is requested, False otherwise
-    """
-    message_lower = message.lower()
-    return any(keyword in message_lower for keyword in HANDOFF_KEYWORDS)
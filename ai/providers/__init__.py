@@ -0,0 +1,52 @@
+from functools import lru_cache
+
+from config import settings
+from .base import LLMProvider, LLMProviderError, GenerationResult, estimate_tokens
+
+PROVIDER_NAMES = ("gemini", "stub")
+
+
+def create_provider(name: str) -> LLMProvider:
+    """
+    Build an LLM provider from settings.
+
+    Backends are imported on demand, so the stub never loads the Gemini SDK.
+
+    Args:
+        name: "gemini" or "stub"
+
+    Returns:
+        Configured provider
+    """
+    if name == "gemini":
+        from .gemini import GeminiProvider
+        return GeminiProvider(settings.gemini_api_key, settings.gemini_model)
+    if name == "stub":
+        from .stub import StubProvider
+        return StubProvider(
+            settings.gemini_model,
+            distribution=settings.llm_stub_latency_distribution,
+            latency_ms=settings.llm_stub_latency_ms,
+            spread=settings.llm_stub_latency_spread,
+            tokens_per_second=settings.llm_stub_tokens_per_second,
+            prefill_tokens_per_second=settings.llm_stub_prefill_tokens_per_second,
+            error_rate=settings.llm_stub_error_rate,
+            seed=settings.llm_stub_seed,
+        )
+    raise ValueError(f"Unknown LLM provider {name!r}, expected one of {PROVIDER_NAMES}")
+
+
+@lru_cache(maxsize=None)
+def get_provider(name: str = None) -> LLMProvider:
+    """Get the shared provider instance (settings.llm_provider by default)."""
+    return create_provider(name or settings.llm_provider)
+
+
+__all__ = [
+    "LLMProvider",
+    "LLMProviderError",
+    "GenerationResult",
+    "estimate_tokens",
+    "create_provider",
+    "get_provider",
+]
@@ -0,0 +1,131 @@
+"""Common interface for LLM backends."""
+
+from typing import AsyncIterator, Dict, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for backends without a tokenizer."""
+    return max(1, round(len(text) / 4)) if text else 0
+
+
+class LLMProviderError(Exception):
+    """A failed LLM call, marked retryable when trying again may succeed (rate limits, outages)."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class GenerationResult:
+    """Text and token usage of one completed generation."""
+
+    def __init__(self, text: str, model: str, input_tokens: int = 0, output_tokens: int = 0, cached_tokens: int = 0):
+        self.text = text
+        self.model = model
+        self.input_tokens = input_tokens  # Including cached_tokens
+        self.output_tokens = output_tokens
+        self.cached_tokens = cached_tokens  # Input tokens served from a cached context
+
+
+class LLMProvider:
+    """
+    Base class for LLM backends.
+
+    A request is a system instruction, the prior turns as
+    [{"role": "user" | "model", "content": "..."}] and the new user message.
+    Turns must alternate roles and end with a model turn.
+
+    Backends with a context cache can register a system instruction once
+    (create_cached_context) and have later requests reference it by handle.
+    """
+
+    name = "base"
+
+    def __init__(self, default_model: str):
+        self.default_model = default_model
+
+    async def generate(
+        self,
+        message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        system_instruction: Optional[str] = None,
+        model: Optional[str] = None,
+        generation_config: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        cached_context: Optional[str] = None
+    ) -> GenerationResult:
+        """
+        Generate a complete reply.
+
+        Args:
+            message: The new user message
+            history: Prior turns
+            system_instruction: Instructions and context for the whole conversation
+            model: Model name (defaults to the provider's default model)
+            generation_config: Sampling options (temperature, top_p, top_k, max_output_tokens)
+            timeout: Seconds the backend may spend on the request
+            cached_context: Handle from create_cached_context holding the system
+                instruction; system_instruction is sent inline if the backend no longer has it
+
+        Returns:
+            GenerationResult
+
+        Raises:
+            LLMProviderError: If the backend call failed
+        """
+        raise NotImplementedError
+
+    def stream(
+        self,
+        message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        system_instruction: Optional[str] = None,
+        model: Optional[str] = None,
+        generation_config: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        cached_context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate a reply as it is produced.
+
+        Takes the same arguments as generate and yields text chunks.
+
+        Raises:
+            LLMProviderError: If the backend call failed
+        """
+        raise NotImplementedError
+
+    async def count_tokens(self, text: str, model: Optional[str] = None) -> int:
+        """
+        Count the tokens a text uses as model input.
+
+        Args:
+            text: Text to count
+            model: Model name (defaults to the provider's default model)
+
+        Returns:
+            Number of tokens
+        """
+        raise NotImplementedError
+
+    async def create_cached_context(
+        self,
+        system_instruction: str,
+        model: Optional[str] = None,
+        ttl_seconds: int = 3600
+    ) -> Optional[str]:
+        """
+        Register a system instruction for reuse across requests.
+
+        Args:
+            system_instruction: The static prompt prefix
+            model: Model the requests will use (caches are per model)
+            ttl_seconds: How long the backend should keep it
+
+        Returns:
+            Handle to pass as cached_context, or None when the backend cannot cache it
+        """
+        return None
+
+    async def delete_cached_context(self, handle: str):
+        """Drop a cached context before its TTL (best effort)."""
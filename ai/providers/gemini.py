@@ -0,0 +1,157 @@
+"""Google Gemini backend (google-generativeai)."""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from google.generativeai import caching
+
+from .base import GenerationResult, LLMProvider, LLMProviderError, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# The API refuses to cache smaller contexts
+MIN_CACHED_TOKENS = 32768
+
+# Errors worth retrying: throttling, overload and transient server faults
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+)
+
+
+def _to_contents(history: Optional[List[Dict[str, str]]]) -> List[dict]:
+    return [{"role": turn["role"], "parts": [turn["content"]]} for turn in history or []]
+
+
+def _request_options(timeout: Optional[float]) -> Optional[dict]:
+    return {"timeout": timeout} if timeout else None
+
+
+def _provider_error(error: Exception) -> LLMProviderError:
+    if isinstance(error, LLMProviderError):
+        return error
+    return LLMProviderError(f"Gemini request failed: {error}", retryable=isinstance(error, RETRYABLE_ERRORS))
+
+
+class GeminiProvider(LLMProvider):
+    """Generates replies with the Gemini API."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str], default_model: str):
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY must be set to use the gemini LLM provider")
+        super().__init__(default_model)
+        genai.configure(api_key=api_key)
+        self._cached_contents: Dict[str, caching.CachedContent] = {}
+
+    def _chat(self, history, system_instruction, model, generation_config, cached_context) -> genai.ChatSession:
+        cached = self._cached_contents.get(cached_context) if cached_context else None
+        if cached is not None and cached.expire_time > datetime.now(timezone.utc):
+            generative_model = genai.GenerativeModel.from_cached_content(cached, generation_config=generation_config)
+        else:
+            generative_model = genai.GenerativeModel(
+                model_name=model or self.default_model,
+                generation_config=generation_config,
+                system_instruction=system_instruction,
+            )
+        return generative_model.start_chat(history=_to_contents(history))
+
+    async def generate(
+        self,
+        message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        system_instruction: Optional[str] = None,
+        model: Optional[str] = None,
+        generation_config: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        cached_context: Optional[str] = None
+    ) -> GenerationResult:
+        chat = self._chat(history, system_instruction, model, generation_config, cached_context)
+        try:
+            response = await chat.send_message_async(message, request_options=_request_options(timeout))
+            text = response.text
+        except ValueError as e:
+            # Raised by response.text when the candidate was blocked or empty
+            raise LLMProviderError(f"Gemini returned no text: {e}")
+        except Exception as e:
+            raise _provider_error(e) from e
+
+        usage = response.usage_metadata
+        return GenerationResult(
+            text=text.strip(),
+            model=model or self.default_model,
+            input_tokens=usage.prompt_token_count if usage else 0,
+            output_tokens=usage.candidates_token_count if usage else 0,
+            cached_tokens=usage.cached_content_token_count if usage else 0,
+        )
+
+    async def stream(
+        self,
+        message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        system_instruction: Optional[str] = None,
+        model: Optional[str] = None,
+        generation_config: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        cached_context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        chat = self._chat(history, system_instruction, model, generation_config, cached_context)
+        try:
+            response = await chat.send_message_async(
+                message, stream=True, request_options=_request_options(timeout)
+            )
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+        except ValueError as e:
+            raise LLMProviderError(f"Gemini returned no text: {e}")
+        except Exception as e:
+            raise _provider_error(e) from e
+
+    async def count_tokens(self, text: str, model: Optional[str] = None) -> int:
+        try:
+            response = await genai.GenerativeModel(model or self.default_model).count_tokens_async(text)
+        except Exception as e:
+            raise _provider_error(e) from e
+        return response.total_tokens
+
+    async def create_cached_context(
+        self,
+        system_instruction: str,
+        model: Optional[str] = None,
+        ttl_seconds: int = 3600
+    ) -> Optional[str]:
+        if estimate_tokens(system_instruction) < MIN_CACHED_TOKENS:
+            return None
+        try:
+            # The SDK's caching calls are synchronous
+            cached = await asyncio.to_thread(
+                caching.CachedContent.create,
+                model=model or self.default_model,
+                system_instruction=system_instruction,
+                ttl=timedelta(seconds=ttl_seconds),
+            )
+        except Exception as e:
+            logger.warning(f"Could not create Gemini cached content for {model or self.default_model}: {e}")
+            return None
+        self._cached_contents[cached.name] = cached
+        return cached.name
+
+    async def delete_cached_context(self, handle: str):
+        cached = self._cached_contents.pop(handle, None)
+        if cached is None:
+            return
+        try:
+            await asyncio.to_thread(cached.delete)
+        except Exception as e:
+            logger.warning(f"Could not delete Gemini cached content {handle}: {e}")
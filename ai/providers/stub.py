@@ -0,0 +1,170 @@
+"""
+Deterministic local LLM stand-in.
+
+Replies are derived from the message text alone, so the same conversation
+always gets the same answers. Latency and failures are simulated so the
+chat pipeline can be load-tested and exercised in CI without network
+access or an API key:
+
+- time to first token is drawn from a fixed, uniform, normal or lognormal
+  distribution around llm_stub_latency_ms, plus prefill of the uncached
+  input at llm_stub_prefill_tokens_per_second
+- cached contexts are kept in memory, so cached prefixes skip prefill
+- the reply then "decodes" at llm_stub_tokens_per_second
+- llm_stub_error_rate of calls fail with a retryable LLMProviderError
+"""
+
+import asyncio
+import hashlib
+import itertools
+import math
+import random
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .base import GenerationResult, LLMProvider, LLMProviderError, estimate_tokens
+
+DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+REPLY_TEMPLATES = [
+    "Thanks for your question about \"{topic}\". Here is what I can tell you: our team handles this every day, "
+    "and most requests like yours are resolved quickly. Is there anything specific you would like to know?",
+    "Good question! Regarding \"{topic}\", the short answer is yes. Let me know if you need more details.",
+    "I can help with \"{topic}\". Please share your order number or account email so I can look into it.",
+    "Here is some information about \"{topic}\": you can find the full details in your account settings, "
+    "and I am happy to walk you through the steps one by one if that helps.",
+]
+
+
+class StubProvider(LLMProvider):
+    """Simulated LLM with configurable latency, decode speed and error injection."""
+
+    name = "stub"
+
+    def __init__(
+        self,
+        default_model: str,
+        distribution: str = "lognormal",
+        latency_ms: float = 400.0,
+        spread: float = 0.5,
+        tokens_per_second: float = 80.0,
+        prefill_tokens_per_second: float = 4000.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown stub latency distribution {distribution!r}, expected one of {DISTRIBUTIONS}")
+        super().__init__(default_model)
+        self.distribution = distribution
+        self.latency_ms = latency_ms
+        self.spread = spread
+        self.tokens_per_second = tokens_per_second
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._cached_contexts: Dict[str, Tuple[int, float]] = {}  # handle -> (prefix tokens, expires at)
+        self._handles = itertools.count(1)
+
+    def first_token_seconds(self) -> float:
+        """Draw a time to first token from the configured distribution."""
+        if self.distribution == "fixed":
+            ms = self.latency_ms
+        elif self.distribution == "uniform":
+            ms = self._random.uniform(self.latency_ms * (1 - self.spread), self.latency_ms * (1 + self.spread))
+        elif self.distribution == "normal":
+            ms = self._random.gauss(self.latency_ms, self.latency_ms * self.spread)
+        else:
+            # latency_ms is the median; spread is sigma of the underlying normal
+            ms = self.latency_ms * math.exp(self._random.gauss(0.0, self.spread))
+        return max(0.0, ms) / 1000
+
+    @staticmethod
+    def reply_for(message: str) -> str:
+        """The deterministic reply to a message."""
+        digest = hashlib.sha256(message.encode("utf-8")).digest()
+        topic = " ".join(message.split()[:8]) or "your message"
+        return REPLY_TEMPLATES[digest[0] % len(REPLY_TEMPLATES)].format(topic=topic)
+
+    def _maybe_fail(self):
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise LLMProviderError("Injected stub provider error", retryable=True)
+
+    def _decode_seconds(self, tokens: int) -> float:
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _prefill_seconds(self, tokens: int) -> float:
+        return tokens / self.prefill_tokens_per_second if self.prefill_tokens_per_second > 0 else 0.0
+
+    def _cached_tokens(self, cached_context: Optional[str]) -> int:
+        """Prefix tokens held by a live cached context (0 if missing or expired)."""
+        entry = self._cached_contexts.get(cached_context) if cached_context else None
+        if entry is None or entry[1] < time.monotonic():
+            return 0
+        return entry[0]
+
+    def _input_tokens(self, message, history, system_instruction, cached_context) -> Tuple[int, int]:
+        """(total input tokens, of which cached)."""
+        cached = self._cached_tokens(cached_context)
+        turns = [turn["content"] for turn in history or []] + [message]
+        total = estimate_tokens("\n".join(turns)) + (cached or estimate_tokens(system_instruction or ""))
+        return total, cached
+
+    async def generate(
+        self,
+        message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        system_instruction: Optional[str] = None,
+        model: Optional[str] = None,
+        generation_config: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        cached_context: Optional[str] = None
+    ) -> GenerationResult:
+        text = self.reply_for(message)
+        output_tokens = estimate_tokens(text)
+        input_tokens, cached_tokens = self._input_tokens(message, history, system_instruction, cached_context)
+        await asyncio.sleep(self.first_token_seconds() + self._prefill_seconds(input_tokens - cached_tokens))
+        self._maybe_fail()
+        await asyncio.sleep(self._decode_seconds(output_tokens))
+
+        return GenerationResult(
+            text=text,
+            model=model or self.default_model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cached_tokens=cached_tokens,
+        )
+
+    async def stream(
+        self,
+        message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        system_instruction: Optional[str] = None,
+        model: Optional[str] = None,
+        generation_config: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        cached_context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        input_tokens, cached_tokens = self._input_tokens(message, history, system_instruction, cached_context)
+        await asyncio.sleep(self.first_token_seconds() + self._prefill_seconds(input_tokens - cached_tokens))
+        self._maybe_fail()
+        words = self.reply_for(message).split(" ")
+        for index, word in enumerate(words):
+            chunk = word if index == 0 else f" {word}"
+            await asyncio.sleep(self._decode_seconds(estimate_tokens(chunk)))
+            yield chunk
+
+    async def count_tokens(self, text: str, model: Optional[str] = None) -> int:
+        return estimate_tokens(text)
+
+    async def create_cached_context(
+        self,
+        system_instruction: str,
+        model: Optional[str] = None,
+        ttl_seconds: int = 3600
+    ) -> Optional[str]:
+        handle = f"stub-context-{next(self._handles)}"
+        self._cached_contexts[handle] = (estimate_tokens(system_instruction), time.monotonic() + ttl_seconds)
+        return handle
+
+    async def delete_cached_context(self, handle: str):
+        self._cached_contexts.pop(handle, None)
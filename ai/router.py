@@ -0,0 +1,179 @@
+"""
+Model Routing
+Classifies each client turn locally and sends simple ones to a fast, cheap
+model configuration and hard ones to the stronger model.
+
+A turn goes to the strong route when any of these holds:
+- it is long, or asks several questions at once
+- it touches a topic that needs care (billing, refunds, accounts, errors)
+- the intent classifier sees rising frustration
+- a knowledge base is present but covers little of what the client asked
+  (low retrieval confidence), so the model has to reason beyond it
+Everything else (greetings, thanks, short questions the knowledge base
+answers) takes the fast route.
+"""
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from config import settings
+from .intent import FRUSTRATION, handoff_detector, tokenize
+
+FAST = "fast"
+STRONG = "strong"
+AUTO = "auto"
+
+# Generation settings per route; the fast route also caps the reply length
+ROUTE_GENERATION_CONFIG = {
+    FAST: {"temperature": 0.5, "top_p": 0.9, "top_k": 40, "max_output_tokens": 512},
+    STRONG: {"temperature": 0.7, "top_p": 0.9, "top_k": 40, "max_output_tokens": 1024},
+}
+
+# Cached input tokens are billed at this fraction of the input price
+CACHED_INPUT_PRICE_RATIO = 0.25
+
+# USD per million (input, output) tokens, for cost metrics
+MODEL_PRICES = {
+    "gemini-1.5-flash-8b": (0.0375, 0.15),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+}
+
+# Topics where a wrong answer costs more than a slower one
+HARD_TOPIC_TERMS = frozenset({
+    "account", "billing", "bill", "broken", "bug", "cancel", "cancellation", "charge", "charged",
+    "compare", "comparison", "contract", "crash", "dispute", "error", "integration", "invoice",
+    "legal", "migrate", "migration", "policy", "privacy", "refund", "security", "subscription",
+    "troubleshoot", "upgrade", "warranty",
+})
+
+STOPWORDS = frozenset({
+    "a", "about", "all", "am", "an", "and", "any", "are", "as", "at", "be", "but", "by", "can",
+    "could", "do", "does", "for", "from", "get", "have", "hello", "hey", "hi", "how", "i", "i'm",
+    "if", "in", "is", "it", "it's", "me", "my", "no", "not", "of", "on", "or", "please", "so",
+    "that", "the", "there", "this", "to", "want", "was", "we", "what", "when", "where", "which",
+    "who", "why", "will", "with", "would", "yes", "you", "your",
+})
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimated USD cost of a call (0 for models without a known price)."""
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    billed_input = input_tokens - cached_tokens + cached_tokens * CACHED_INPUT_PRICE_RATIO
+    return (billed_input * input_price + output_tokens * output_price) / 1_000_000
+
+
+@lru_cache(maxsize=64)
+def _vocabulary(knowledge_base: str) -> FrozenSet[str]:
+    """Word set of a knowledge base (cached; the same KB text comes back every turn)."""
+    return frozenset(tokenize(knowledge_base))
+
+
+def retrieval_confidence(message: str, knowledge_base: Optional[str]) -> Optional[float]:
+    """
+    Share of the message's content words found in the knowledge base.
+
+    Returns:
+        0.0-1.0, or None without a knowledge base or content words to look up
+    """
+    if not knowledge_base:
+        return None
+    terms = {token for token in tokenize(message) if token not in STOPWORDS}
+    if not terms:
+        return None
+    return len(terms & _vocabulary(knowledge_base)) / len(terms)
+
+
+class ModelRoute:
+    """The model configuration chosen for one turn."""
+
+    def __init__(self, route: str, model: str, generation_config: dict, reason: str):
+        self.route = route  # "fast" or "strong"
+        self.model = model
+        self.generation_config = generation_config
+        self.reason = reason  # Why the route was chosen, for metrics and logs
+
+
+class ModelRouter:
+    """Picks the fast or strong model configuration for each turn."""
+
+    def models(self, overrides: Optional[dict] = None) -> Dict[str, str]:
+        """Model per route, with a company's overrides applied where the model is allowed."""
+        overrides = overrides or {}
+
+        def allowed(model: Optional[str]) -> Optional[str]:
+            return model if model in settings.llm_company_models else None
+
+        return {
+            FAST: allowed(overrides.get("fast_model")) or settings.llm_fast_model,
+            STRONG: allowed(overrides.get("strong_model")) or settings.llm_strong_model or settings.gemini_model,
+        }
+
+    def classify(
+        self,
+        message: str,
+        knowledge_base: Optional[str] = None,
+        intent_scores: Optional[Dict[str, float]] = None
+    ) -> Tuple[str, str]:
+        """
+        Decide the route of a message from local signals only.
+
+        Args:
+            message: The client's message
+            knowledge_base: Company knowledge base sent with the request
+            intent_scores: Intent classifier output, if already computed
+
+        Returns:
+            (route, reason)
+        """
+        tokens = tokenize(message)
+        if len(tokens) >= settings.llm_router_long_message_words:
+            return STRONG, "length"
+        if message.count("?") >= 2:
+            return STRONG, "multi_part"
+        if HARD_TOPIC_TERMS.intersection(tokens):
+            return STRONG, "topic"
+
+        if intent_scores is None:
+            intent_scores = handoff_detector.classifier.predict_proba(tokens)
+        if intent_scores.get(FRUSTRATION, 0.0) >= settings.llm_router_frustration_threshold:
+            return STRONG, "frustration"
+
+        confidence = retrieval_confidence(message, knowledge_base)
+        if confidence is not None and len(tokens) >= 4 and confidence < settings.llm_router_min_retrieval_confidence:
+            return STRONG, "low_retrieval_confidence"
+        return FAST, "simple"
+
+    def route(
+        self,
+        message: str,
+        knowledge_base: Optional[str] = None,
+        intent_scores: Optional[Dict[str, float]] = None,
+        overrides: Optional[dict] = None
+    ) -> ModelRoute:
+        """
+        Choose the model configuration for a turn.
+
+        Args:
+            message: The client's message
+            knowledge_base: Company knowledge base sent with the request
+            intent_scores: Intent classifier output, if already computed
+            overrides: The company's routing settings ({"route", "fast_model", "strong_model"})
+
+        Returns:
+            ModelRoute
+        """
+        models = self.models(overrides)
+        forced = (overrides or {}).get("route") or AUTO
+        if forced in (FAST, STRONG):
+            route, reason = forced, "company_override"
+        elif not settings.llm_routing_enabled:
+            route, reason = STRONG, "routing_disabled"
+        else:
+            route, reason = self.classify(message, knowledge_base, intent_scores)
+        return ModelRoute(route, models[route], ROUTE_GENERATION_CONFIG[route], reason)
+
+
+# Global router instance
+model_router = ModelRouter()
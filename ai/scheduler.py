@@ -0,0 +1,260 @@
+"""
+LLM Request Scheduler
+Plan-aware admission control and weighted fair queuing of Gemini calls
+across companies.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from config import settings
+from models.company import SubscriptionPlan
+from utils.metrics import LLM_QUEUE_WAIT_SECONDS
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Per-plan token bucket (sustained requests per minute, burst size) and fair-share weight
+PLAN_LIMITS = {
+    SubscriptionPlan.FREE: {"per_minute": 10, "burst": 5, "weight": 1},
+    SubscriptionPlan.BASIC: {"per_minute": 30, "burst": 10, "weight": 2},
+    SubscriptionPlan.PREMIUM: {"per_minute": 120, "burst": 30, "weight": 4},
+    SubscriptionPlan.ENTERPRISE: {"per_minute": 600, "burst": 100, "weight": 8},
+}
+
+
+class LLMRequestRejected(Exception):
+    """Raised when a request is refused or shed instead of reaching the LLM."""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason  # "rate_limited", "queue_full" or "queue_timeout"
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at a fixed rate."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, amount: float = 1.0) -> bool:
+        """Take tokens if available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+
+class TenantStats:
+    """Per-company scheduling counters."""
+
+    def __init__(self):
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {}
+        self.queued_total = 0  # Admissions that had to wait in the fair queue
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        self.wait_count += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "queued_total": self.queued_total,
+            "avg_wait_seconds": round(self.wait_total / self.wait_count, 4) if self.wait_count else 0.0,
+            "max_wait_seconds": round(self.wait_max, 4),
+        }
+
+
+class _Waiter:
+    __slots__ = ("finish_tag", "cost", "sequence", "company_id", "future", "enqueued_at")
+
+    def __init__(self, finish_tag: float, cost: float, sequence: int, company_id: int, future: asyncio.Future):
+        self.finish_tag = finish_tag
+        self.cost = cost  # Virtual service time (1 / plan weight)
+        self.sequence = sequence
+        self.company_id = company_id
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.finish_tag, self.sequence) < (other.finish_tag, other.sequence)
+
+
+class LLMScheduler:
+    """
+    Shares the LLM concurrency budget fairly between companies.
+
+    Each company has a token bucket sized by its subscription plan; requests
+    beyond it are rejected at once. Admitted requests run immediately while
+    fewer than llm_max_concurrency calls are in flight, otherwise they wait
+    in a weighted fair queue (virtual finish time = start + 1 / plan weight),
+    so a burst from one tenant cannot starve the others and higher plans get
+    proportionally more of the capacity. Requests that wait longer than
+    llm_max_queue_wait_seconds are shed.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._bucket_plans: Dict[int, SubscriptionPlan] = {}
+        self._queue: List[_Waiter] = []
+        self._queued_per_company: Dict[int, int] = {}
+        self._last_finish: Dict[int, float] = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._stats: Dict[int, TenantStats] = {}
+
+    def _bucket_for(self, company_id: int, plan: SubscriptionPlan) -> TokenBucket:
+        """Get a company's bucket, resizing it when its plan changed."""
+        bucket = self._buckets.get(company_id)
+        if bucket is None or self._bucket_plans.get(company_id) != plan:
+            limits = PLAN_LIMITS.get(plan, PLAN_LIMITS[SubscriptionPlan.FREE])
+            bucket = TokenBucket(limits["per_minute"] / 60.0, limits["burst"])
+            self._buckets[company_id] = bucket
+            self._bucket_plans[company_id] = plan
+        return bucket
+
+    def _reject(self, company_id: int, reason: str, message: str):
+        stats = self._stats.setdefault(company_id, TenantStats())
+        stats.rejected[reason] = stats.rejected.get(reason, 0) + 1
+        logger.warning(f"LLM request for company {company_id} rejected: {message}")
+        raise LLMRequestRejected(message, reason)
+
+    async def acquire(self, company_id: int, plan: Optional[SubscriptionPlan]):
+        """
+        Wait for an LLM slot on behalf of a company.
+
+        Args:
+            company_id: Company the request is made for
+            plan: The company's subscription plan
+
+        Raises:
+            LLMRequestRejected: Over the plan's rate, too many queued requests,
+                or the queue wait timed out
+        """
+        plan = plan or SubscriptionPlan.FREE
+        stats = self._stats.setdefault(company_id, TenantStats())
+
+        if self._queued_per_company.get(company_id, 0) >= settings.llm_max_queued_per_company:
+            self._reject(company_id, "queue_full", "Too many requests waiting for the assistant")
+        if not self._bucket_for(company_id, plan).take():
+            self._reject(company_id, "rate_limited", f"{plan.value} plan request rate exceeded")
+
+        if self._in_flight < settings.llm_max_concurrency and not self._queue:
+            self._in_flight += 1
+            stats.admitted += 1
+            stats.record_wait(0.0)
+            LLM_QUEUE_WAIT_SECONDS.labels(company_id).observe(0.0)
+            return
+
+        cost = 1.0 / PLAN_LIMITS.get(plan, PLAN_LIMITS[SubscriptionPlan.FREE])["weight"]
+        start_tag = max(self._virtual_time, self._last_finish.get(company_id, 0.0))
+        finish_tag = start_tag + cost
+        self._last_finish[company_id] = finish_tag
+
+        waiter = _Waiter(finish_tag, cost, next(self._sequence), company_id, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, waiter)
+        self._queued_per_company[company_id] = self._queued_per_company.get(company_id, 0) + 1
+        stats.queued_total += 1
+
+        # asyncio.wait rather than wait_for: wait_for swallows a cancellation
+        # that races with the slot being granted, and the caller must see it
+        try:
+            await asyncio.wait((waiter.future,), timeout=settings.llm_max_queue_wait_seconds)
+        except asyncio.CancelledError:
+            # The caller went away; give back a slot that was granted meanwhile
+            if waiter.future.done():
+                self.release()
+            else:
+                self._abandon(waiter)
+            raise
+        if not waiter.future.done():
+            self._abandon(waiter)
+            self._reject(company_id, "queue_timeout", "Timed out waiting for the assistant")
+        waited = time.monotonic() - waiter.enqueued_at
+        stats.admitted += 1
+        stats.record_wait(waited)
+        LLM_QUEUE_WAIT_SECONDS.labels(company_id).observe(waited)
+
+    def _abandon(self, waiter: _Waiter):
+        """
+        Remove a waiter that gave up before being granted a slot.
+
+        The company's later waiters move up by the abandoned request's
+        virtual service time and its last finish tag is recomputed from what
+        is still queued, so shed requests don't push the tenant back.
+        """
+        waiter.future.cancel()
+        self._queue.remove(waiter)
+        self._queued_per_company[waiter.company_id] -= 1
+
+        remaining = []
+        for other in self._queue:
+            if other.company_id == waiter.company_id:
+                if other.finish_tag > waiter.finish_tag:
+                    other.finish_tag -= waiter.cost
+                remaining.append(other.finish_tag)
+        heapq.heapify(self._queue)
+        if remaining:
+            self._last_finish[waiter.company_id] = max(remaining)
+        else:
+            # Nothing queued: the next request starts at the current virtual time
+            self._last_finish.pop(waiter.company_id, None)
+
+    def release(self):
+        """Return a slot and hand it to the next waiter in fair-queue order."""
+        self._in_flight -= 1
+        while self._queue and self._in_flight < settings.llm_max_concurrency:
+            waiter = heapq.heappop(self._queue)
+            self._queued_per_company[waiter.company_id] -= 1
+            self._virtual_time = max(self._virtual_time, waiter.finish_tag)
+            self._in_flight += 1
+            waiter.future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, company_id: int, plan: Optional[SubscriptionPlan]):
+        """Hold an LLM slot for the duration of a call."""
+        with tracer.span("llm.acquire_slot", company_id=company_id):
+            await self.acquire(company_id, plan)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self, company_id: Optional[int] = None) -> dict:
+        """
+        Get scheduling counters.
+
+        Args:
+            company_id: Limit to one company
+
+        Returns:
+            Global in-flight/queued counts and per-company counters
+        """
+        companies = self._stats if company_id is None else {company_id: self._stats.get(company_id, TenantStats())}
+        return {
+            "in_flight": self._in_flight,
+            "queued": len(self._queue),
+            "companies": {cid: stats.as_dict() for cid, stats in companies.items()},
+        }
+
+
+# Global scheduler instance
+llm_scheduler = LLMScheduler()
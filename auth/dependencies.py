@@ -1,10 +1,11 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 from models.database import get_db
 from models.chat import AdminUser
 from .jwt import verify_token
+from .principal_cache import principal_cache
 
 security = HTTPBearer()
 
@@ -16,6 +17,10 @@ async def get_current_admin(
     """
     Dependency to get the current authenticated admin user.
     
+    Tokens seen before are answered from the principal cache without
+    decoding the JWT or querying admin_users; the cached admin is attached
+    to the request session so relationships still lazy-load.
+    
     Raises:
         HTTPException: If token is invalid or admin not found
     """
@@ -25,8 +30,15 @@ async def get_current_admin(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    token = credentials.credentials
+    cached = principal_cache.get(token)
+    if cached is not None:
+        admin = AdminUser(**cached)
+        make_transient_to_detached(admin)
+        return db.merge(admin, load=False)
+    
     # Verify token
-    payload = verify_token(credentials.credentials, token_type="access")
+    payload = verify_token(token, token_type="access")
     if payload is None:
         raise credentials_exception
     
@@ -45,6 +57,7 @@ async def get_current_admin(
             detail="Admin account is inactive"
         )
     
+    principal_cache.put(token, admin, payload["exp"])
     return admin
 
 
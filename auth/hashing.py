@@ -0,0 +1,108 @@
+"""
+Password Hashing Executor
+Runs bcrypt off the event loop in a small, bounded thread pool.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from config import settings
+from .jwt import pwd_context
+
+logger = logging.getLogger(__name__)
+
+
+class HashingBusyError(Exception):
+    """Raised when the hashing queue is full and the call is rejected."""
+
+
+class PasswordHasher:
+    """
+    Bounded executor for password hashing and verification.
+
+    bcrypt releases the GIL, so a few threads hash in parallel while the
+    event loop keeps serving WebSockets. At most password_hash_workers calls
+    run and password_hash_queue_limit wait; beyond that calls fail fast with
+    HashingBusyError instead of queueing unbounded CPU work behind a storm.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(settings.password_hash_workers, 1),
+                thread_name_prefix="password-hash",
+            )
+        return self._executor
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    async def _run(self, func, *args):
+        """Submit a hashing call, rejecting it if the pool and its queue are full."""
+        capacity = max(settings.password_hash_workers, 1) + settings.password_hash_queue_limit
+        with self._lock:
+            if self._pending >= capacity:
+                self.rejected += 1
+                raise HashingBusyError("Password hashing queue is full")
+            self._pending += 1
+
+        # Count the slot until the thread finishes, even if the request is cancelled meanwhile
+        future = self._get_executor().submit(func, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password with the current scheme and parameters.
+
+        Raises:
+            HashingBusyError: If the hashing queue is full
+        """
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and rehash it if its hash is outdated.
+
+        Args:
+            password: Plain password
+            hashed_password: Stored hash
+
+        Returns:
+            Tuple of (valid, new_hash). new_hash is set when the password is
+            valid but was hashed with a deprecated scheme or fewer rounds.
+
+        Raises:
+            HashingBusyError: If the hashing queue is full
+        """
+        try:
+            return await self._run(pwd_context.verify_and_update, password, hashed_password)
+        except ValueError as e:
+            # Unrecognized or malformed stored hash
+            logger.error(f"Failed to verify password hash: {str(e)}")
+            return False, None
+
+    def stats(self) -> dict:
+        """Get the number of queued or running calls and of rejected calls."""
+        with self._lock:
+            return {"pending": self._pending, "rejected": self.rejected}
+
+    def shutdown(self):
+        """Shut down the hashing threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher()
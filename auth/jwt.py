@@ -4,8 +4,13 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from config import settings
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
+# Password hashing. Hashes with fewer rounds than configured are upgraded on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256"],
+    deprecated="auto",
+    bcrypt_sha256__default_rounds=settings.password_hash_rounds,
+    bcrypt_sha256__min_rounds=settings.password_hash_rounds,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -17,8 +22,6 @@ def get_password_hash(password: str) -> str:
     """
     Hash a password using bcrypt.
     """
-    print(pwd_context.schemes())
-
     return pwd_context.hash(password)
 
 
@@ -0,0 +1,174 @@
+"""
+Principal Cache
+Caches the admin behind a verified access token so authenticated REST
+calls skip JWT decoding and the admin_users lookup on repeat requests.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.chat import AdminUser
+
+PRINCIPAL_COLUMNS = ("id", "company_id", "username", "email", "hashed_password", "full_name", "role", "is_active", "created_at")
+CHANGED_ADMINS = "changed_admin_ids"  # Session.info key for admins to evict again after commit
+
+
+class _Entry:
+    """A cached principal: the signed token part it belongs to, its column values and its expiry."""
+
+    __slots__ = ("signing_input", "admin_id", "values", "expires_at")
+
+    def __init__(self, signing_input: str, values: dict, expires_at: float):
+        self.signing_input = signing_input
+        self.admin_id = values["id"]
+        self.values = values
+        self.expires_at = expires_at
+
+
+class PrincipalCache:
+    """
+    In-process LRU cache of authenticated admins, keyed by token signature.
+
+    An entry lives for settings.principal_cache_ttl_seconds, never past the
+    token's own exp claim, and is evicted as soon as its admin is updated or
+    deleted through the ORM. Other processes only see such changes once
+    their entries expire, so the TTL bounds how stale a principal can be.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_admin: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _split(token: str) -> tuple[str, str]:
+        """Split a JWT into its signed part (header.payload) and its signature."""
+        signing_input, _, signature = token.rpartition(".")
+        return signing_input, signature
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        Look up the principal cached for a token.
+
+        Args:
+            token: Raw bearer token
+
+        Returns:
+            Admin column values, or None on a miss
+        """
+        signing_input, signature = self._split(token)
+        with self._lock:
+            entry = self._entries.get(signature)
+            # The signature only vouches for the exact header and payload it was issued with
+            if entry is None or entry.signing_input != signing_input:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.time():
+                self._remove(signature)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(signature)
+            self.hits += 1
+            return entry.values
+
+    def put(self, token: str, admin: AdminUser, token_exp: float):
+        """
+        Cache the admin resolved for a verified token.
+
+        Args:
+            token: Raw bearer token that was verified
+            admin: Active admin the token belongs to
+            token_exp: The token's exp claim (Unix timestamp)
+        """
+        expires_at = min(time.time() + self.ttl_seconds, token_exp)
+        if self.max_entries <= 0 or expires_at <= time.time():
+            return
+
+        signing_input, signature = self._split(token)
+        values = {column: getattr(admin, column) for column in PRINCIPAL_COLUMNS}
+        with self._lock:
+            self._remove(signature)
+            self._entries[signature] = _Entry(signing_input, values, expires_at)
+            self._by_admin.setdefault(values["id"], set()).add(signature)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_admin(self, admin_id: int):
+        """Drop every cached token of an admin."""
+        with self._lock:
+            for signature in list(self._by_admin.get(admin_id, ())):
+                self._remove(signature)
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._by_admin.clear()
+
+    def stats(self) -> dict:
+        """Get hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, signature: str):
+        """Remove one entry and its admin index reference (caller holds the lock)."""
+        entry = self._entries.pop(signature, None)
+        if entry is None:
+            return
+        signatures = self._by_admin.get(entry.admin_id)
+        if signatures is not None:
+            signatures.discard(signature)
+            if not signatures:
+                del self._by_admin[entry.admin_id]
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache(
+    max_entries=settings.principal_cache_max_entries,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _evict_changed_admins(session, flush_context):
+    """Evict admins whose row was updated or deleted (role, activation, username...)."""
+    for instance in list(session.dirty) + list(session.deleted):
+        if isinstance(instance, AdminUser) and instance.id is not None:
+            principal_cache.invalidate_admin(instance.id)
+            session.info.setdefault(CHANGED_ADMINS, set()).add(instance.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_admins(session):
+    """Evict again after commit in case a concurrent request re-cached the old row meanwhile."""
+    for admin_id in session.info.pop(CHANGED_ADMINS, ()):
+        principal_cache.invalidate_admin(admin_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_changed_admins(session, previous_transaction):
+    """Rolled-back changes left the cached rows valid."""
+    session.info.pop(CHANGED_ADMINS, None)
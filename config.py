@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -15,10 +15,56 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
+    principal_cache_ttl_seconds: int = 60  # Capped at each token's own expiry
+    principal_cache_max_entries: int = 10000
+    password_hash_rounds: int = 12  # bcrypt cost; older hashes are rehashed on login
+    password_hash_workers: int = 2
+    password_hash_queue_limit: int = 16  # Waiting hash calls before logins get 503
+    
+    # LLM provider ("gemini", or "stub" for offline development and load tests)
+    llm_provider: str = "gemini"
+    llm_stub_latency_distribution: str = "lognormal"  # fixed, uniform, normal or lognormal
+    llm_stub_latency_ms: float = 400.0  # Median time to first token
+    llm_stub_latency_spread: float = 0.5
+    llm_stub_tokens_per_second: float = 80.0
+    llm_stub_prefill_tokens_per_second: float = 4000.0  # Input processing speed for uncached tokens
+    llm_stub_error_rate: float = 0.0
+    llm_stub_seed: Optional[int] = None
     
     # Google Gemini AI
-    gemini_api_key: str
+    gemini_api_key: Optional[str] = None  # Required when llm_provider is "gemini"
     gemini_model: str = "gemini-1.5-flash"
+    handoff_intent_threshold: float = 0.95  # Classifier probability that escalates to a human
+    frustration_threshold: float = 0.95
+    llm_max_concurrency: int = 8  # Gemini calls in flight across all companies
+    llm_max_queue_wait_seconds: float = 10.0  # Queued requests are shed after this
+    llm_max_queued_per_company: int = 20
+    chat_debounce_ms: int = 600  # Quiet time after a client message before the AI answers
+    chat_debounce_max_ms: int = 3000  # Longest a burst of messages is held before answering
+    llm_routing_enabled: bool = True  # Off: every turn uses the strong model
+    llm_fast_model: str = "gemini-1.5-flash-8b"
+    llm_strong_model: Optional[str] = None  # Defaults to gemini_model
+    llm_company_models: List[str] = [  # Models a company may pick in its routing overrides
+        "gemini-1.5-flash-8b",
+        "gemini-1.5-flash",
+        "gemini-1.5-pro",
+        "gemini-2.0-flash"
+    ]
+    llm_router_long_message_words: int = 40
+    llm_router_frustration_threshold: float = 0.5
+    llm_router_min_retrieval_confidence: float = 0.5  # Share of message words found in the KB
+    llm_context_cache_enabled: bool = True
+    llm_context_cache_ttl_seconds: int = 3600  # Company prompt prefixes are rebuilt after this
+    knowledge_base_max_chars: int = 15000  # Knowledge base text sent to the model per company
+    llm_timeout_seconds: float = 20.0  # Deadline for each attempt
+    llm_max_attempts: int = 3
+    llm_retry_base_seconds: float = 0.5  # Backoff ceiling doubles per retry, full jitter
+    llm_retry_max_seconds: float = 4.0
+    llm_breaker_failure_threshold: int = 5  # Consecutive failures that open the circuit
+    llm_breaker_reset_seconds: float = 30.0  # Fail fast this long before probing again
+    llm_hedge_enabled: bool = False  # Send a second request when one outlives the p95
+    llm_hedge_min_samples: int = 50
+    llm_hedge_max_in_flight: int = 4
     
     # CORS
     cors_origins: List[str] = [
@@ -28,6 +74,60 @@ class Settings(BaseSettings):
         "http://localhost:8080"
     ]
     
+    # Background jobs (resource ingestion)
+    job_workers: int = 2
+    job_poll_interval_seconds: float = 2.0
+    job_lease_seconds: int = 60
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: int = 30
+    job_per_company_concurrency: int = 1
+    
+    # Uploads
+    max_upload_size_mb: int = 50
+    blob_compression_level: int = 6  # zlib level for stored extracted content
+    blob_delete_grace_seconds: int = 3600  # Unreferenced blobs written more recently are kept (uncommitted writers)
+    
+    # Static Assets
+    static_max_age_seconds: int = 300  # Cache lifetime of unversioned script/stylesheet URLs
+    gzip_min_bytes: int = 1024  # Smaller responses are sent uncompressed
+    gzip_level: int = 5
+    
+    # Outbound HTTP (website and Facebook ingestion)
+    http_pool_size: int = 100
+    http_per_host_limit: int = 4
+    http_dns_cache_seconds: int = 300
+    http_timeout_seconds: int = 30
+    http_connect_timeout_seconds: int = 10
+    http_max_response_mb: int = 10
+    
+    # Website crawling
+    crawl_max_pages: int = 50  # Default page limit per crawl
+    crawl_max_pages_limit: int = 500  # Highest page limit a resource may request
+    crawl_max_depth: int = 3
+    crawl_concurrency: int = 4
+    crawl_delay_seconds: float = 0.5  # Minimum gap between requests to one host
+    crawl_chunk_chars: int = 2000
+    refresh_check_interval_seconds: int = 60
+    refresh_jitter_fraction: float = 0.1  # Spread refreshes by +/- this fraction of the interval
+    
+    # Extraction process pool
+    extraction_pool_workers: int = 0  # 0 = one per CPU core
+    extraction_worker_memory_mb: int = 1024  # Address-space cap per worker, 0 = unlimited
+    extraction_worker_max_tasks: int = 50  # Recycle workers to release fragmented memory
+    pdf_pages_per_chunk: int = 16
+    pdf_max_workers_per_job: int = 4
+    html_offload_min_kb: int = 512  # Larger pages are parsed in the process pool
+    
+    # Monitoring
+    metrics_token: str = ""  # Bearer token required to scrape /metrics; empty = open
+    query_profiler_enabled: bool = False  # Time every SQL statement per request/WebSocket message
+    query_slow_ms: float = 100.0  # Statements slower than this are logged
+    query_n_plus_one_threshold: int = 5  # Identical SELECTs per unit of work that count as N+1
+    tracing_enabled: bool = False  # Span traces of REST requests and WebSocket messages
+    tracing_file: str = "traces.jsonl"
+    tracing_sample_rate: float = 1.0  # Fraction of traces recorded when the caller sent no trace id
+    tracing_flush_batch: int = 100  # Spans buffered before they are appended to the file
+    
     # Application
     app_name: str = "Chatbot Assistant API"
     app_version: str = "1.0.0"
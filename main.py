@@ -1,11 +1,25 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from contextlib import asynccontextmanager
 from config import settings
 from models.database import init_db
-from routes import auth_router, chat_router, admin_router, company_router, resource_router
+from models.job import JobType
+from services.job_queue import job_worker_pool
+from services.resource_service import ResourceService
+from services.http_fetcher import http_fetcher
+from services.refresh_scheduler import refresh_scheduler
+from utils.process_pool import shutdown_process_pool
+from auth.hashing import password_hasher
+from ai.gateway import llm_gateway
+from routes import auth_router, chat_router, admin_router, company_router, resource_router, assets_router, metrics_router
+from routes.assets import serve_asset
+from utils.static_assets import static_assets
+from utils.metrics import MetricsMiddleware
+from utils.query_profiler import QueryProfilerMiddleware
+from utils.tracing import TracingMiddleware, tracer
 from websocket import client_router, admin_router as ws_admin_router
 import logging
 import os
@@ -25,9 +39,21 @@ async def lifespan(app: FastAPI):
     logger.info("Initializing database...")
     init_db()
     logger.info("Database initialized successfully")
+    # Create the LLM provider now so a bad configuration fails startup, not the first chat
+    logger.info(f"LLM provider: {llm_gateway.provider.name}")
+    static_assets.build()
+    job_worker_pool.register(JobType.PROCESS_RESOURCE, ResourceService.process_resource_job)
+    await job_worker_pool.start()
+    await refresh_scheduler.start()
     yield
     # Shutdown
     logger.info("Application shutting down")
+    await refresh_scheduler.stop()
+    await job_worker_pool.stop()
+    await http_fetcher.close()
+    shutdown_process_pool()
+    password_hasher.shutdown()
+    tracer.flush()
 
 
 # Create FastAPI app
@@ -35,6 +61,7 @@ app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -47,12 +74,28 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Compress large responses for clients that accept gzip (precompressed assets pass through)
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_min_bytes, compresslevel=settings.gzip_level)
+
+# Per-request SQL profiling (opt-in)
+if settings.query_profiler_enabled:
+    app.add_middleware(QueryProfilerMiddleware)
+
+# Request tracing (opt-in)
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
+
+# Per-route latency histogram (outermost, so it includes compression)
+app.add_middleware(MetricsMiddleware)
+
 # Include REST API routers
 app.include_router(auth_router)
 app.include_router(chat_router)
 app.include_router(admin_router)
 app.include_router(company_router)
 app.include_router(resource_router)
+app.include_router(assets_router)
+app.include_router(metrics_router)
 
 # Include WebSocket routers
 app.include_router(client_router)
@@ -65,11 +108,11 @@ if os.path.exists(frontend_dir):
 
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Root endpoint - serve demo page."""
-    frontend_path = os.path.join(os.path.dirname(__file__), "frontend", "index.html")
-    if os.path.exists(frontend_path):
-        return FileResponse(frontend_path)
+    page = serve_asset(request, "index.html")
+    if page is not None:
+        return page
     return {
         "name": settings.app_name,
         "version": settings.app_version,
@@ -78,48 +121,33 @@ async def root():
 
 
 @app.get("/admin")
-async def admin_page():
+async def admin_page(request: Request):
     """Serve admin dashboard."""
-    admin_path = os.path.join(os.path.dirname(__file__), "frontend", "admin.html")
-    if os.path.exists(admin_path):
-        return FileResponse(admin_path)
-    return {"error": "Admin page not found"}
+    return serve_asset(request, "admin.html") or {"error": "Admin page not found"}
 
 
 @app.get("/chatbot-widget.js")
-async def widget_script():
-    """Serve chatbot widget script."""
-    widget_path = os.path.join(os.path.dirname(__file__), "frontend", "chatbot-widget.js")
-    if os.path.exists(widget_path):
-        return FileResponse(widget_path, media_type="application/javascript")
-    return {"error": "Widget not found"}
+async def widget_script(request: Request):
+    """Serve chatbot widget script (unversioned URL used by existing embeds)."""
+    return serve_asset(request, "chatbot-widget.js") or {"error": "Widget not found"}
 
 
 @app.get("/styles.css")
-async def styles():
+async def styles(request: Request):
     """Serve styles."""
-    styles_path = os.path.join(os.path.dirname(__file__), "frontend", "styles.css")
-    if os.path.exists(styles_path):
-        return FileResponse(styles_path, media_type="text/css")
-    return {"error": "Styles not found"}
+    return serve_asset(request, "styles.css") or {"error": "Styles not found"}
 
 
 @app.get("/admin-styles.css")
-async def admin_styles():
+async def admin_styles(request: Request):
     """Serve admin styles."""
-    styles_path = os.path.join(os.path.dirname(__file__), "frontend", "admin-styles.css")
-    if os.path.exists(styles_path):
-        return FileResponse(styles_path, media_type="text/css")
-    return {"error": "Admin styles not found"}
+    return serve_asset(request, "admin-styles.css") or {"error": "Admin styles not found"}
 
 
 @app.get("/admin.js")
-async def admin_js():
+async def admin_js(request: Request):
     """Serve admin JavaScript."""
-    js_path = os.path.join(os.path.dirname(__file__), "frontend", "admin.js")
-    if os.path.exists(js_path):
-        return FileResponse(js_path, media_type="application/javascript")
-    return {"error": "Admin JS not found"}
+    return serve_asset(request, "admin.js") or {"error": "Admin JS not found"}
 
 
 @app.get("/health")
@@ -129,30 +157,21 @@ async def health_check():
 
 
 @app.get("/register")
-async def company_register_page():
+async def company_register_page(request: Request):
     """Serve company registration page."""
-    register_path = os.path.join(os.path.dirname(__file__), "frontend", "company-register.html")
-    if os.path.exists(register_path):
-        return FileResponse(register_path)
-    return {"error": "Registration page not found"}
+    return serve_asset(request, "company-register.html") or {"error": "Registration page not found"}
 
 
 @app.get("/company-register.css")
-async def company_register_css():
+async def company_register_css(request: Request):
     """Serve company registration styles."""
-    css_path = os.path.join(os.path.dirname(__file__), "frontend", "company-register.css")
-    if os.path.exists(css_path):
-        return FileResponse(css_path, media_type="text/css")
-    return {"error": "CSS not found"}
+    return serve_asset(request, "company-register.css") or {"error": "CSS not found"}
 
 
 @app.get("/company-register.js")
-async def company_register_js():
+async def company_register_js(request: Request):
     """Serve company registration JavaScript."""
-    js_path = os.path.join(os.path.dirname(__file__), "frontend", "company-register.js")
-    if os.path.exists(js_path):
-        return FileResponse(js_path, media_type="application/javascript")
-    return {"error": "JS not found"}
+    return serve_asset(request, "company-register.js") or {"error": "JS not found"}
 
 
 if __name__ == "__main__":
@@ -2,7 +2,10 @@ from .database import Base, engine, SessionLocal, get_db
 from .chat import ChatSession, Message, AdminUser, ClientInfo, AdminRole, SessionState, SenderType
 from .company import Company, SubscriptionPlan
 from .resource import Resource, ResourceType, ResourceStatus
+from .document import Document, DocumentPage
+from .crawl import CrawledPage, ResourceChunk
 from .super_admin import SuperAdmin, SuperAdminRole
+from .job import Job, JobType, JobStatus
 
 __all__ = [
     "Base",
@@ -21,7 +24,14 @@ __all__ = [
     "Resource",
     "ResourceType",
     "ResourceStatus",
+    "Document",
+    "DocumentPage",
+    "CrawledPage",
+    "ResourceChunk",
     "SuperAdmin",
     "SuperAdminRole",
+    "Job",
+    "JobType",
+    "JobStatus",
 ]
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -27,6 +27,8 @@ class Company(Base):
     description = Column(Text, nullable=True)
     subscription_plan = Column(Enum(SubscriptionPlan), default=SubscriptionPlan.FREE, nullable=False)
     is_active = Column(Integer, default=1)  # Using Integer for SQLite compatibility
+    handoff_keywords = Column(JSON, nullable=True)  # Extra phrases that escalate chats to a human
+    llm_routing = Column(JSON, nullable=True)  # Model routing overrides: {"route", "fast_model", "strong_model"}
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
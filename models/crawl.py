@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from .database import Base
+
+
+class CrawledPage(Base):
+    """Single page fetched while crawling a WEBSITE resource."""
+    __tablename__ = "crawled_pages"
+    __table_args__ = (UniqueConstraint("resource_id", "url", name="uq_crawled_page_url"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    resource_id = Column(Integer, ForeignKey("resources.id"), nullable=False, index=True)
+    url = Column(String(1000), nullable=False)  # Canonical URL
+    depth = Column(Integer, default=0)  # Link hops from the seed URL (sitemap URLs are depth 0)
+    status_code = Column(Integer, nullable=True)
+    title = Column(String(500), nullable=True)
+    content_length = Column(Integer, default=0)
+    error_message = Column(Text, nullable=True)
+
+    # Change detection for incremental re-crawls
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)  # Last-Modified header, sent back as If-Modified-Since
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the decoded body
+    links = Column(Text, nullable=True)  # JSON list of in-site links, followed when the page is unchanged
+
+    fetched_at = Column(DateTime, nullable=True)
+    changed_at = Column(DateTime, nullable=True)  # Last fetch whose content differed
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    resource = relationship("Resource", back_populates="crawled_pages")
+    chunks = relationship("ResourceChunk", back_populates="page", cascade="all, delete-orphan")
+
+
+class ResourceChunk(Base):
+    """Chunk of extracted text belonging to a resource, in reading order."""
+    __tablename__ = "resource_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    resource_id = Column(Integer, ForeignKey("resources.id"), nullable=False, index=True)
+    page_id = Column(Integer, ForeignKey("crawled_pages.id"), nullable=True, index=True)
+    position = Column(Integer, nullable=False)  # Order within the page
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    resource = relationship("Resource", back_populates="chunks")
+    page = relationship("CrawledPage", back_populates="chunks")
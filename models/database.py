@@ -2,6 +2,9 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
+from utils.metrics import DB_POOL_CHECKOUT_SECONDS
+from utils.query_profiler import query_profiler
+import time
 
 # SQLite Configuration (Default)
 engine = create_engine(
@@ -21,6 +24,31 @@ engine = create_engine(
 #     echo=settings.debug,
 # )
 
+
+def track_checkout_wait(pool):
+    """
+    Record how long each connection checkout waits on a pool.
+    
+    Wraps the pool's checkout so the wait for a free connection (including
+    opening a new one) lands in the db_pool_checkout_wait_seconds histogram.
+    """
+    do_get = pool._do_get
+    
+    def timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start)
+    
+    pool._do_get = timed_do_get
+
+
+track_checkout_wait(engine.pool)
+
+if settings.query_profiler_enabled:
+    query_profiler.install(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -36,5 +64,8 @@ def get_db():
 
 
 def init_db():
-    """Initialize database tables."""
+    """Initialize database tables and upgrade existing ones."""
+    from .migrations import upgrade_schema
+    
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
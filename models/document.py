@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from .database import Base
+from .resource import ResourceStatus, CONTENT_PREVIEW_CHARS
+
+
+class Document(Base):
+    """Uploaded file stored once by content hash and shared by every resource that uses it."""
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    storage_path = Column(String(500), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+
+    # Extraction results, shared across resources and companies
+    status = Column(Enum(ResourceStatus), default=ResourceStatus.PENDING, nullable=False)
+    content_blob_key = Column(String(64), nullable=True, index=True)  # Combined page text in the blob store
+    content_length = Column(Integer, default=0, nullable=False)
+    content_preview = Column(String(CONTENT_PREVIEW_CHARS), nullable=True)
+    document_metadata = Column(Text, nullable=True)  # JSON string
+    error_message = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    resources = relationship("Resource", back_populates="document")
+    pages = relationship("DocumentPage", back_populates="document", cascade="all, delete-orphan")
+
+
+class DocumentPage(Base):
+    """Extracted text of a single page of a document."""
+    __tablename__ = "document_pages"
+    __table_args__ = (UniqueConstraint("document_id", "page_number", name="uq_document_page"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    page_number = Column(Integer, nullable=False)  # 1-based
+    content = Column(Text, nullable=True)
+    table_count = Column(Integer, default=0)
+    source_hash = Column(String(64), nullable=True)  # SHA-256 of the page's raw content streams
+    extractor = Column(String(20), nullable=True)  # pdfplumber or pypdf2
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    document = relationship("Document", back_populates="pages")
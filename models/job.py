@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy.orm import relationship
+from datetime import datetime
+import enum
+from .database import Base
+
+
+class JobType(str, enum.Enum):
+    """Background job types."""
+    PROCESS_RESOURCE = "PROCESS_RESOURCE"
+
+
+class JobStatus(str, enum.Enum):
+    """Background job status."""
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+
+class Job(Base):
+    """Persistent background job claimed by workers through leases."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(Enum(JobType), nullable=False)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False, index=True)
+    resource_id = Column(Integer, ForeignKey("resources.id"), nullable=True, index=True)
+    payload = Column(Text, nullable=True)  # JSON string for handler arguments
+
+    # Scheduling
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False, index=True)
+    priority = Column(Integer, default=0, nullable=False)  # Higher runs first
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # Earliest start (retry backoff)
+
+    # Lease held by the worker currently running the job
+    lease_owner = Column(String(255), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    # Progress reported by the handler (e.g. pages extracted)
+    progress_current = Column(Integer, default=0, nullable=False)
+    progress_total = Column(Integer, nullable=True)
+
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    resource = relationship("Resource", back_populates="jobs")
@@ -0,0 +1,149 @@
+"""
+Schema upgrades for existing databases.
+
+Base.metadata.create_all() creates missing tables but never changes a table
+that already exists, so columns added to a model after its table was created
+are added here with ALTER TABLE ... ADD COLUMN, followed by their indexes.
+Data that moved out of a dropped column is carried over as well. The steps
+are idempotent and run on every startup from init_db().
+"""
+
+import enum
+import logging
+from typing import Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import Column
+
+from utils.blob_store import blob_store
+from .database import Base
+
+logger = logging.getLogger(__name__)
+
+# Rows moved per batch when copying legacy content into the blob store
+CONTENT_MIGRATION_BATCH_SIZE = 100
+
+
+def _default_literal(column: Column) -> Optional[str]:
+    """SQL literal of a column's scalar Python-side default, if it has one."""
+    if column.default is None or not column.default.is_scalar:
+        return None
+    value = column.default.arg
+    if isinstance(value, enum.Enum):
+        value = value.value
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _column_ddl(column: Column, connection: Connection) -> str:
+    """Column definition for ALTER TABLE ... ADD COLUMN."""
+    dialect = connection.dialect
+    ddl = f"{dialect.identifier_preparer.quote(column.name)} {column.type.compile(dialect=dialect)}"
+
+    default = _default_literal(column)
+    if default is not None:
+        ddl += f" DEFAULT {default}"
+    if not column.nullable:
+        if default is None:
+            # Existing rows have no value to satisfy NOT NULL; the model enforces it for new rows
+            logger.warning(f"Adding {column.table.name}.{column.name} as nullable: it has no default")
+        else:
+            ddl += " NOT NULL"
+
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        ddl += f" REFERENCES {target.table.name} ({target.name})"
+    return ddl
+
+
+def add_missing_columns(connection: Connection) -> int:
+    """
+    Add model columns (and their indexes) that existing tables lack.
+
+    Args:
+        connection: Connection inside a transaction
+
+    Returns:
+        Number of columns added
+    """
+    inspector = inspect(connection)
+    added = 0
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(column, connection)}"))
+            logger.info(f"Added column {table.name}.{column.name}")
+            added += 1
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(connection)
+                logger.info(f"Created index {index.name}")
+    return added
+
+
+def migrate_legacy_content(connection: Connection, table: str) -> int:
+    """
+    Move text from a table's legacy extracted_content column into the blob store.
+    
+    Applies to resources and documents, which both keep content_blob_key,
+    content_length and content_preview instead. The column is cleared once
+    its text has a blob, so a row is only moved once.
+    
+    Args:
+        connection: Connection inside a transaction
+        table: Table name
+        
+    Returns:
+        Number of rows moved
+    """
+    from .resource import CONTENT_PREVIEW_CHARS
+    
+    inspector = inspect(connection)
+    if not inspector.has_table(table):
+        return 0
+    if "extracted_content" not in {column["name"] for column in inspector.get_columns(table)}:
+        return 0
+    
+    moved = 0
+    while True:
+        rows = connection.execute(text(
+            f"SELECT id, extracted_content FROM {table} "
+            "WHERE extracted_content IS NOT NULL LIMIT :limit"
+        ), {"limit": CONTENT_MIGRATION_BATCH_SIZE}).all()
+        if not rows:
+            break
+        for row_id, content in rows:
+            values = {"id": row_id, "key": None, "length": 0, "preview": None}
+            if content:
+                values.update(
+                    key=blob_store.put(content),
+                    length=len(content),
+                    preview=content[:CONTENT_PREVIEW_CHARS]
+                )
+            connection.execute(text(
+                f"UPDATE {table} SET content_blob_key = :key, content_length = :length, "
+                "content_preview = :preview, extracted_content = NULL WHERE id = :id"
+            ), values)
+        moved += len(rows)
+    if moved:
+        logger.info(f"Moved extracted content of {moved} {table} rows into the blob store")
+    return moved
+
+
+def upgrade_schema(engine: Engine):
+    """Bring the tables of an existing database up to date with the models."""
+    with engine.begin() as connection:
+        add_missing_columns(connection)
+        for table in ("resources", "documents"):
+            migrate_legacy_content(connection, table)
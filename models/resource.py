@@ -1,8 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON, event, select
+from sqlalchemy.orm import relationship, object_session, Session
 from datetime import datetime
+from typing import Optional
 import enum
 from .database import Base
+from config import settings
+from utils.blob_store import blob_store
+
+CONTENT_PREVIEW_CHARS = 500
+STALE_BLOBS = "stale_content_blobs"  # Session.info key for blobs that may have lost their last reference
 
 
 class ResourceType(str, enum.Enum):
@@ -33,9 +39,13 @@ class Resource(Base):
     source_url = Column(String(1000), nullable=True)  # For web/Facebook resources
     file_path = Column(String(500), nullable=True)  # For uploaded files
     file_name = Column(String(255), nullable=True)  # Original filename
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=True, index=True)  # Shared uploaded file
+    crawl_config = Column(Text, nullable=True)  # JSON string; set when a website is crawled beyond its URL
     
-    # Extracted content
-    extracted_content = Column(Text, nullable=True)  # Text content extracted
+    # Extracted content (text lives compressed in the blob store; see extracted_content)
+    content_blob_key = Column(String(64), nullable=True, index=True)
+    content_length = Column(Integer, default=0, nullable=False)
+    content_preview = Column(String(CONTENT_PREVIEW_CHARS), nullable=True)
     resource_metadata = Column(Text, nullable=True)  # JSON string for additional info
     
     # Processing status
@@ -44,9 +54,87 @@ class Resource(Base):
     
     # Management
     is_active = Column(Integer, default=1)  # Using Integer for SQLite compatibility
+    refresh_interval_hours = Column(Integer, nullable=True)  # Scheduled re-crawl interval, None = manual only
+    next_refresh_at = Column(DateTime, nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     processed_at = Column(DateTime, nullable=True)  # When processing completed
     
     # Relationships
     company = relationship("Company", back_populates="resources")
+    document = relationship("Document", back_populates="resources")
+    jobs = relationship("Job", back_populates="resource", cascade="all, delete-orphan")
+    crawled_pages = relationship("CrawledPage", back_populates="resource", cascade="all, delete-orphan")
+    chunks = relationship("ResourceChunk", back_populates="resource", cascade="all, delete-orphan")
+    
+    @property
+    def extracted_content(self) -> Optional[str]:
+        """Extracted text, loaded from the blob store on first access."""
+        if self.content_blob_key is None:
+            return None
+        cached = getattr(self, "_content_cache", None)
+        if cached is not None and cached[0] == self.content_blob_key:
+            return cached[1]
+        text = blob_store.get(self.content_blob_key)
+        self._content_cache = (self.content_blob_key, text)
+        return text
+    
+    @extracted_content.setter
+    def extracted_content(self, text: Optional[str]):
+        """Store extracted text in the blob store and update the length and preview columns."""
+        if text:
+            self.set_content_blob(blob_store.put(text), len(text), text[:CONTENT_PREVIEW_CHARS])
+        else:
+            self.set_content_blob(None, 0, None)
+        self._content_cache = (self.content_blob_key, text or None)
+    
+    def set_content_blob(self, key: Optional[str], length: int, preview: Optional[str]):
+        """
+        Point the resource at text already in the blob store.
+        
+        Args:
+            key: Blob key, or None for no content
+            length: Character count of the text
+            preview: Its first CONTENT_PREVIEW_CHARS characters
+        """
+        previous_key = self.content_blob_key
+        self.content_blob_key = key
+        self.content_length = length if key else 0
+        self.content_preview = preview if key else None
+        
+        if previous_key and previous_key != key:
+            session = object_session(self)
+            if session is not None:
+                session.info.setdefault(STALE_BLOBS, set()).add(previous_key)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_deleted_content_blobs(session, flush_context):
+    """Remember the blobs of deleted resources so they can be released after commit."""
+    for instance in session.deleted:
+        if isinstance(instance, Resource) and instance.content_blob_key:
+            session.info.setdefault(STALE_BLOBS, set()).add(instance.content_blob_key)
+
+
+@event.listens_for(Session, "after_commit")
+def _release_content_blobs(session):
+    """Delete replaced or orphaned blobs that no resource or document references any more (and no writer just stored)."""
+    keys = session.info.pop(STALE_BLOBS, None)
+    if not keys:
+        return
+    documents = Base.metadata.tables["documents"]
+    with session.get_bind().connect() as connection:
+        referenced = set(connection.execute(
+            select(Resource.content_blob_key).where(Resource.content_blob_key.in_(keys))
+        ).scalars())
+        referenced.update(connection.execute(
+            select(documents.c.content_blob_key).where(documents.c.content_blob_key.in_(keys))
+        ).scalars())
+    for key in keys - referenced:
+        blob_store.delete_unused(key, settings.blob_delete_grace_seconds)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_content_blobs(session, previous_transaction):
+    """Rolled-back changes never released their blobs."""
+    session.info.pop(STALE_BLOBS, None)
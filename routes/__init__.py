@@ -3,6 +3,8 @@ from .chat import router as chat_router
 from .admin import router as admin_router
 from .company import router as company_router
 from .resource import router as resource_router
+from .assets import router as assets_router
+from .metrics import router as metrics_router
 
 __all__ = [
     "auth_router",
@@ -10,5 +12,7 @@ __all__ = [
     "admin_router",
     "company_router",
     "resource_router",
+    "assets_router",
+    "metrics_router",
 ]
 
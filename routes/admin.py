@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from config import settings
 from sqlalchemy.orm import Session
 from typing import List
 from models.database import get_db
 from models.chat import AdminUser, ChatSession
 from schemas.chat import SessionResponse, AdminResponse
 from auth.dependencies import get_current_admin
+from auth.principal_cache import principal_cache
+from ai.scheduler import llm_scheduler
 from services import (
     get_pending_sessions,
     get_active_admin_sessions,
@@ -14,6 +17,8 @@ from services import (
     get_session_by_id,
 )
 from utils.queue import session_queue
+from utils.serialization import list_response
+from utils.query_profiler import query_profiler
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
@@ -29,7 +34,7 @@ async def get_queue(
     Requires JWT authentication.
     """
     pending_sessions = get_pending_sessions(db)
-    return pending_sessions
+    return list_response(SessionResponse, pending_sessions)
 
 
 @router.get("/active", response_model=List[SessionResponse])
@@ -44,7 +49,7 @@ async def get_active_sessions(
     """
     # Get sessions assigned to this admin
     active_sessions = get_active_admin_sessions(db, current_admin.id)
-    return active_sessions
+    return list_response(SessionResponse, active_sessions)
 
 
 @router.get("/all-sessions", response_model=List[SessionResponse])
@@ -58,7 +63,7 @@ async def get_all_sessions(
     Requires JWT authentication.
     """
     all_sessions = get_all_active_sessions(db)
-    return all_sessions
+    return list_response(SessionResponse, all_sessions)
 
 
 @router.post("/sessions/{session_id}/claim", response_model=SessionResponse)
@@ -127,3 +132,65 @@ async def get_current_admin_info(
     Requires JWT authentication.
     """
     return current_admin
+
+
+@router.get("/auth-cache/stats")
+async def get_auth_cache_stats(
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Get principal cache hit/miss counters for this process.
+    
+    Requires JWT authentication.
+    """
+    return principal_cache.stats()
+
+
+@router.get("/llm-scheduler/stats")
+async def get_llm_scheduler_stats(
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Get AI request scheduling counters (admissions, rejections, queue wait)
+    for the current admin's company.
+    
+    Requires JWT authentication.
+    """
+    return llm_scheduler.stats(current_admin.company_id)
+
+
+def _require_query_profiler():
+    """Query profiles are only served in debug mode with the profiler enabled."""
+    if not settings.debug or not query_profiler.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Query profiler is not enabled"
+        )
+
+
+@router.get("/debug/queries")
+async def get_query_profile(
+    limit: int = 20,
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Get the most expensive SQL statements, recent slow queries and likely
+    N+1 patterns recorded by the query profiler.
+    
+    Requires JWT authentication, DEBUG and QUERY_PROFILER_ENABLED.
+    """
+    _require_query_profiler()
+    return query_profiler.report(limit)
+
+
+@router.delete("/debug/queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_query_profile(
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Clear the query profiler's accumulated statistics.
+    
+    Requires JWT authentication, DEBUG and QUERY_PROFILER_ENABLED.
+    """
+    _require_query_profiler()
+    query_profiler.reset()
@@ -0,0 +1,95 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from config import settings
+from utils.static_assets import static_assets, negotiate_encoding, StaticAsset
+
+router = APIRouter(tags=["Assets"])
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def asset_response(request: Request, asset: StaticAsset, cache_control: str) -> Response:
+    """
+    Build the response for a processed asset.
+
+    Picks the encoding from Accept-Encoding and answers 304 when the client
+    already holds the same representation.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), asset.bodies)
+    etag = asset.etag_for(encoding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+
+    if _not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=asset.bodies[encoding], media_type=asset.content_type, headers=headers)
+
+
+def serve_asset(request: Request, name: str) -> Optional[Response]:
+    """
+    Serve a frontend file by its plain name, or return None if it does not exist.
+
+    Plain URLs can change content on deploy, so pages must revalidate and
+    scripts/stylesheets are cached briefly; the hashed /assets URLs are the
+    long-lived ones.
+    """
+    asset = static_assets.get(name)
+    if asset is None:
+        return None
+    if name.endswith(".html"):
+        cache_control = "no-cache"
+    else:
+        cache_control = f"public, max-age={settings.static_max_age_seconds}"
+    return asset_response(request, asset, cache_control)
+
+
+@router.get("/assets/{hashed_name}")
+async def get_versioned_asset(hashed_name: str, request: Request):
+    """
+    Serve a content-hashed asset with immutable caching.
+    """
+    asset = static_assets.get_hashed(hashed_name)
+    if asset is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Asset not found"
+        )
+    return asset_response(request, asset, IMMUTABLE_CACHE_CONTROL)
+
+
+@router.get("/api/assets/widget")
+async def get_widget_asset(request: Request):
+    """
+    Get the versioned widget script URL for embed snippets.
+
+    The URL changes whenever the widget changes, so embeds using it can be
+    cached indefinitely by browsers and CDNs.
+    """
+    asset = static_assets.get("chatbot-widget.js")
+    if asset is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Widget not found"
+        )
+    url = str(request.base_url).rstrip("/") + asset.url
+    return {
+        "url": url,
+        "path": asset.url,
+        "version": asset.version,
+        "snippet": f'<script src="{url}"></script>',
+    }
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from models.database import get_db
 from models.chat import AdminUser
@@ -6,16 +7,40 @@ from schemas.chat import AdminLogin, AdminRegister, Token
 from auth.jwt import (
     create_access_token,
     create_refresh_token,
-    verify_password,
-    get_password_hash,
     verify_token,
 )
+from auth.hashing import password_hasher, HashingBusyError
 from datetime import timedelta
+from typing import Optional
 from config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
+def _hashing_busy_exception() -> HTTPException:
+    """503 returned when too many password hashes are already queued."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _already_registered_exception(db: Session, username: str, email: str) -> Optional[HTTPException]:
+    """400 returned when the username or email belongs to an existing admin."""
+    if db.query(AdminUser).filter(AdminUser.username == username).first():
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already registered"
+        )
+    if db.query(AdminUser).filter(AdminUser.email == email).first():
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    return None
+
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def register_admin(
     admin_data: AdminRegister,
@@ -35,25 +60,10 @@ async def register_admin(
             detail="Company not found"
         )
     
-    # Check if username already exists
-    existing_admin = db.query(AdminUser).filter(
-        AdminUser.username == admin_data.username
-    ).first()
-    if existing_admin:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    # Check if email already exists
-    existing_email = db.query(AdminUser).filter(
-        AdminUser.email == admin_data.email
-    ).first()
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
+    # Check if username or email already exists
+    duplicate = _already_registered_exception(db, admin_data.username, admin_data.email)
+    if duplicate:
+        raise duplicate
     
     # Validate role
     try:
@@ -61,8 +71,14 @@ async def register_admin(
     except (KeyError, AttributeError):
         role = AdminRole.AGENT
     
+    # End the read transaction so no pooled connection is held while bcrypt runs
+    db.rollback()
+    
     # Create new admin
-    hashed_password = get_password_hash(admin_data.password)
+    try:
+        hashed_password = await password_hasher.hash(admin_data.password)
+    except HashingBusyError:
+        raise _hashing_busy_exception()
     new_admin = AdminUser(
         company_id=admin_data.company_id,
         username=admin_data.username,
@@ -73,7 +89,15 @@ async def register_admin(
         is_active=1
     )
     db.add(new_admin)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Registered concurrently while the password was being hashed
+        db.rollback()
+        raise _already_registered_exception(db, admin_data.username, admin_data.email) or HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username or email already registered"
+        )
     db.refresh(new_admin)
     
     # Generate tokens
@@ -113,7 +137,19 @@ async def login_admin(
         AdminUser.username == credentials.username
     ).first()
     
-    if not admin or not verify_password(credentials.password, admin.hashed_password):
+    hashed_password = admin.hashed_password if admin else None
+    
+    # End the read transaction so no pooled connection is held while bcrypt runs
+    db.rollback()
+    
+    valid, new_hash = False, None
+    if hashed_password:
+        try:
+            valid, new_hash = await password_hasher.verify_and_update(credentials.password, hashed_password)
+        except HashingBusyError:
+            raise _hashing_busy_exception()
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -126,6 +162,11 @@ async def login_admin(
             detail="Admin account is inactive"
         )
     
+    # Upgrade a hash made with an outdated scheme or cost
+    if new_hash:
+        admin.hashed_password = new_hash
+        db.commit()
+    
     # Generate tokens
     access_token = create_access_token(
         data={
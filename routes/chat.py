@@ -14,6 +14,7 @@ from services import (
     get_session_by_id,
     get_messages_by_session,
 )
+from utils.serialization import list_response
 
 router = APIRouter(prefix="/api", tags=["Chat"])
 
@@ -70,4 +71,4 @@ async def get_session_messages(
         )
     
     messages = get_messages_by_session(db, session.id)
-    return messages
+    return list_response(MessageResponse, messages)
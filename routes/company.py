@@ -9,7 +9,7 @@ from datetime import datetime
 import re
 
 from models.database import get_db
-from models import Company, SubscriptionPlan, Resource, AdminUser, ChatSession, Message
+from models import Company, SubscriptionPlan, Resource, AdminUser, AdminRole, ChatSession, Message
 from schemas.company import (
     CompanyCreate,
     CompanyResponse,
@@ -17,6 +17,7 @@ from schemas.company import (
     CompanyStats
 )
 from auth.jwt import create_access_token, get_password_hash, verify_password
+from auth.dependencies import get_current_admin
 
 router = APIRouter(prefix="/api/companies", tags=["Companies"])
 
@@ -114,9 +115,20 @@ async def get_company(
 async def update_company(
     company_id: int,
     company_data: CompanyUpdate,
+    current_admin: AdminUser = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Update company information."""
+    """
+    Update company information.
+    
+    Requires JWT authentication as an administrator of the company.
+    """
+    if current_admin.company_id != company_id or current_admin.role != AdminRole.COMPANY_ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators of this company can update it"
+        )
+    
     company = db.query(Company).filter(Company.id == company_id).first()
     
     if not company:
@@ -0,0 +1,84 @@
+import hmac
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from config import settings
+from models.database import engine
+from utils.metrics import metrics, CONTENT_TYPE
+from utils.queue import session_queue
+from auth.principal_cache import principal_cache
+from auth.hashing import password_hasher
+from ai.scheduler import llm_scheduler
+from ai.gateway import CircuitBreaker, llm_gateway
+from ai.context_cache import context_cache
+
+router = APIRouter(tags=["Metrics"])
+
+
+def collect_component_stats():
+    """Report queue, pool, cache and scheduler state at scrape time."""
+    yield ("session_queue_depth", "gauge", "Sessions waiting for a human agent",
+           [({}, session_queue.get_queue_size())])
+
+    checkedout = getattr(engine.pool, "checkedout", None)
+    if checkedout is not None:
+        yield ("db_pool_connections_in_use", "gauge", "DB connections checked out of the pool",
+               [({}, checkedout())])
+
+    cache = principal_cache.stats()
+    yield ("principal_cache_entries", "gauge", "Cached authenticated admins", [({}, cache["size"])])
+    yield ("principal_cache_lookups_total", "counter", "Principal cache lookups by result",
+           [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])])
+    yield ("principal_cache_evictions_total", "counter", "Principal cache entries dropped by reason",
+           [({"reason": "capacity"}, cache["evictions"]), ({"reason": "invalidated"}, cache["invalidations"])])
+
+    hasher = password_hasher.stats()
+    yield ("password_hash_pending", "gauge", "Password hash calls queued or running", [({}, hasher["pending"])])
+    yield ("password_hash_rejected_total", "counter", "Password hash calls refused as busy",
+           [({}, hasher["rejected"])])
+
+    scheduler = llm_scheduler.stats()
+    yield ("llm_scheduler_in_flight", "gauge", "LLM calls holding a scheduler slot", [({}, scheduler["in_flight"])])
+    yield ("llm_scheduler_queued", "gauge", "LLM requests waiting for a slot", [({}, scheduler["queued"])])
+    yield ("llm_scheduler_admitted_total", "counter", "LLM requests admitted per company",
+           [({"company_id": company_id}, stats["admitted"]) for company_id, stats in scheduler["companies"].items()])
+    yield ("llm_scheduler_rejected_total", "counter", "LLM requests rejected per company and reason",
+           [({"company_id": company_id, "reason": reason}, count)
+            for company_id, stats in scheduler["companies"].items()
+            for reason, count in stats["rejected"].items()])
+
+    cache = context_cache.stats()
+    yield ("llm_context_cache_companies", "gauge", "Companies with a cached prompt prefix", [({}, cache["companies"])])
+    yield ("llm_context_cache_prefix_chars", "gauge", "Characters held in cached prompt prefixes",
+           [({}, cache["prefix_chars"])])
+    yield ("llm_context_cache_provider_handles", "gauge", "Prompt prefixes registered with the provider",
+           [({}, cache["provider_handles"])])
+    yield ("llm_context_cache_retired_handles", "gauge", "Replaced prompt prefixes awaiting deletion after in-flight requests",
+           [({}, cache["retired_handles"])])
+
+    gateway = llm_gateway.stats()
+    provider = {"provider": gateway["provider"]}
+    yield ("llm_circuit_state", "gauge", "LLM circuit breaker state (0 closed, 1 half-open, 2 open)",
+           [(provider, CircuitBreaker.STATE_VALUES[gateway["circuit_state"]])])
+    yield ("llm_circuit_opened_total", "counter", "Times the LLM circuit breaker opened",
+           [(provider, gateway["circuit_opened_total"])])
+    yield ("llm_circuit_rejected_total", "counter", "LLM calls failed fast by the open circuit breaker",
+           [(provider, gateway["circuit_rejected_total"])])
+
+
+metrics.register_collector(collect_component_stats)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """
+    Expose metrics in the Prometheus text format.
+
+    When METRICS_TOKEN is set, scrapers must send it as a bearer token.
+    """
+    if settings.metrics_token:
+        expected = f"Bearer {settings.metrics_token}"
+        if not hmac.compare_digest(request.headers.get("authorization", ""), expected):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token"
+            )
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
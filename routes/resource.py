@@ -3,62 +3,70 @@ Resource Management Routes
 Handles resource uploads, processing, and management.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from starlette.requests import ClientDisconnect
 from sqlalchemy.orm import Session
 from datetime import datetime
+import json
 import os
-import aiofiles
-import uuid
 
 from models.database import get_db
-from models import Resource, ResourceType, ResourceStatus, Company
+from config import settings
+from models import Resource, ResourceType, ResourceStatus, Company, Job, JobType, CrawledPage
 from schemas.resource import (
     ResourceCreate,
     ResourceResponse,
     ResourceUpdate,
     ResourceListResponse,
-    ResourceContentResponse
+    ResourceContentResponse,
+    ResourceJobResponse,
+    CrawledPageResponse
 )
+from services.document_store import DocumentStore, UploadRejected
+from services.job_queue import JobQueue, PRIORITY_HIGH, PRIORITY_NORMAL
 from services.resource_service import ResourceService
 
 router = APIRouter(prefix="/api/resources", tags=["Resources"])
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-
-async def process_resource_task(resource_id: int, resource_type: str, file_path: str = None):
-    """Background task to process resources."""
-    from models.database import SessionLocal
-    db = SessionLocal()
-    
-    try:
-        resource = db.query(Resource).filter(Resource.id == resource_id).first()
-        if not resource:
-            return
-        
-        if resource_type == "PDF":
-            await ResourceService.process_pdf_resource(resource, file_path, db)
-        elif resource_type == "WEBSITE":
-            await ResourceService.process_website_resource(resource, db)
-        elif resource_type == "FACEBOOK":
-            await ResourceService.process_facebook_resource(resource, db)
-            
-    finally:
-        db.close()
+def enqueue_resource_processing(db: Session, resource: Resource, priority: int = PRIORITY_HIGH):
+    """Queue a durable background job to process a resource."""
+    JobQueue.enqueue(
+        db,
+        JobType.PROCESS_RESOURCE,
+        company_id=resource.company_id,
+        resource_id=resource.id,
+        priority=priority
+    )
 
 
-@router.post("/upload-pdf", response_model=ResourceResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/upload-pdf",
+    response_model=ResourceResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {"file": {"type": "string", "format": "binary"}}
+                    }
+                }
+            }
+        }
+    }
+)
 async def upload_pdf(
     company_id: int,
-    file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Upload a PDF file for knowledge base.
-    The file will be processed in the background.
+    The file is streamed to disk (size-capped) and processed in the background.
     """
     # Verify company exists
     company = db.query(Company).filter(Company.id == company_id).first()
@@ -68,25 +76,16 @@ async def upload_pdf(
             detail="Company not found"
         )
     
-    # Validate file type
-    if not file.filename.lower().endswith('.pdf'):
+    # Stream the file to disk, stored once per content hash
+    try:
+        document, file_name = await DocumentStore.save_stream(request.headers, request.stream(), db)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ClientDisconnect:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only PDF files are allowed"
+            detail="Upload interrupted"
         )
-    
-    # Generate unique filename
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    company_dir = os.path.join(UPLOAD_DIR, str(company_id))
-    os.makedirs(company_dir, exist_ok=True)
-    file_path = os.path.join(company_dir, unique_filename)
-    
-    # Save file
-    try:
-        async with aiofiles.open(file_path, 'wb') as out_file:
-            content = await file.read()
-            await out_file.write(content)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -97,17 +96,23 @@ async def upload_pdf(
     resource = Resource(
         company_id=company_id,
         resource_type=ResourceType.PDF,
-        file_path=file_path,
-        file_name=file.filename,
+        file_path=document.storage_path,
+        file_name=file_name,
+        document_id=document.id,
         status=ResourceStatus.PENDING
     )
     
+    # Same file was already extracted (by any company): link without re-parsing
+    if document.status == ResourceStatus.COMPLETED:
+        ResourceService.link_document(resource, document)
+    
     db.add(resource)
     db.commit()
     db.refresh(resource)
     
     # Process in background
-    background_tasks.add_task(process_resource_task, resource.id, "PDF", file_path)
+    if resource.status != ResourceStatus.COMPLETED:
+        enqueue_resource_processing(db, resource)
     
     return resource
 
@@ -116,12 +121,12 @@ async def upload_pdf(
 async def add_website(
     company_id: int,
     resource_data: ResourceCreate,
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     db: Session = Depends(get_db)
 ):
     """
     Add a website URL for knowledge base.
-    The website will be scrapped in the background.
+    The website will be scrapped in the background; with crawl enabled,
+    same-site links and the sitemap are followed up to the page and depth limits.
     """
     # Verify company exists
     company = db.query(Company).filter(Company.id == company_id).first()
@@ -143,20 +148,37 @@ async def add_website(
             detail="source_url is required for website resources"
         )
     
+    crawl_config = None
+    if resource_data.crawl:
+        max_pages = resource_data.max_pages or settings.crawl_max_pages
+        if max_pages > settings.crawl_max_pages_limit:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"max_pages cannot exceed {settings.crawl_max_pages_limit}"
+            )
+        crawl_config = json.dumps({
+            "max_pages": max_pages,
+            "max_depth": resource_data.max_depth if resource_data.max_depth is not None else settings.crawl_max_depth,
+            "use_sitemap": resource_data.use_sitemap,
+        })
+    
     # Create resource entry
     resource = Resource(
         company_id=company_id,
         resource_type=ResourceType.WEBSITE,
         source_url=resource_data.source_url,
+        crawl_config=crawl_config,
+        refresh_interval_hours=resource_data.refresh_interval_hours,
         status=ResourceStatus.PENDING
     )
+    ResourceService.schedule_refresh(resource)
     
     db.add(resource)
     db.commit()
     db.refresh(resource)
     
     # Process in background
-    background_tasks.add_task(process_resource_task, resource.id, "WEBSITE")
+    enqueue_resource_processing(db, resource)
     
     return resource
 
@@ -165,7 +187,6 @@ async def add_website(
 async def add_facebook_page(
     company_id: int,
     resource_data: ResourceCreate,
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     db: Session = Depends(get_db)
 ):
     """
@@ -205,7 +226,7 @@ async def add_facebook_page(
     db.refresh(resource)
     
     # Process in background
-    background_tasks.add_task(process_resource_task, resource.id, "FACEBOOK")
+    enqueue_resource_processing(db, resource)
     
     return resource
 
@@ -326,27 +347,63 @@ async def get_resource_content(
             detail="Resource not found"
         )
     
-    content = resource.extracted_content or ""
-    preview = content[:500] if len(content) > 500 else content
-    
+    # Preview and length are stored on the row; the full text stays in the blob store
     return ResourceContentResponse(
         id=resource.id,
         resource_type=resource.resource_type.value,
         file_name=resource.file_name,
         source_url=resource.source_url,
-        content_preview=preview,
-        total_length=len(content),
+        content_preview=resource.content_preview or "",
+        total_length=resource.content_length or 0,
         status=resource.status.value
     )
 
 
+@router.get("/{resource_id}/job", response_model=ResourceJobResponse)
+async def get_resource_job(
+    resource_id: int,
+    db: Session = Depends(get_db)
+):
+    """Get the latest processing job for a resource, including page progress."""
+    job = db.query(Job).filter(
+        Job.resource_id == resource_id
+    ).order_by(Job.id.desc()).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No processing job found for this resource"
+        )
+    
+    return job
+
+
+@router.get("/{resource_id}/pages", response_model=list[CrawledPageResponse])
+async def list_crawled_pages(
+    resource_id: int,
+    db: Session = Depends(get_db)
+):
+    """List the pages fetched by the latest crawl of a website resource."""
+    resource = db.query(Resource).filter(Resource.id == resource_id).first()
+    
+    if not resource:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resource not found"
+        )
+    
+    return db.query(CrawledPage).filter(
+        CrawledPage.resource_id == resource_id
+    ).order_by(CrawledPage.depth, CrawledPage.id).all()
+
+
 @router.put("/{resource_id}", response_model=ResourceResponse)
 async def update_resource(
     resource_id: int,
     resource_data: ResourceUpdate,
     db: Session = Depends(get_db)
 ):
-    """Update resource (e.g., activate/deactivate)."""
+    """Update resource (e.g., activate/deactivate, change the refresh interval)."""
     resource = db.query(Resource).filter(Resource.id == resource_id).first()
     
     if not resource:
@@ -359,6 +416,15 @@ async def update_resource(
         resource.is_active = 1 if resource_data.is_active else 0
         resource.updated_at = datetime.utcnow()
     
+    if resource_data.refresh_interval_hours is not None:
+        if resource.resource_type != ResourceType.WEBSITE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Scheduled refresh is only supported for website resources"
+            )
+        resource.refresh_interval_hours = resource_data.refresh_interval_hours or None
+        ResourceService.schedule_refresh(resource)
+    
     db.commit()
     db.refresh(resource)
     
@@ -368,7 +434,6 @@ async def update_resource(
 @router.post("/{resource_id}/reprocess", response_model=ResourceResponse)
 async def reprocess_resource(
     resource_id: int,
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     db: Session = Depends(get_db)
 ):
     """Reprocess a failed or completed resource."""
@@ -383,16 +448,16 @@ async def reprocess_resource(
     # Reset to pending
     resource.status = ResourceStatus.PENDING
     resource.error_message = None
+    
+    # Re-extract the shared document too (unchanged pages are skipped)
+    if resource.document and resource.document.status != ResourceStatus.PROCESSING:
+        resource.document.status = ResourceStatus.PENDING
     db.commit()
     db.refresh(resource)
     
     # Process based on type
-    if resource.resource_type == ResourceType.PDF:
-        background_tasks.add_task(process_resource_task, resource.id, "PDF", resource.file_path)
-    elif resource.resource_type == ResourceType.WEBSITE:
-        background_tasks.add_task(process_resource_task, resource.id, "WEBSITE")
-    elif resource.resource_type == ResourceType.FACEBOOK:
-        background_tasks.add_task(process_resource_task, resource.id, "FACEBOOK")
+    if resource.resource_type in (ResourceType.PDF, ResourceType.WEBSITE, ResourceType.FACEBOOK):
+        enqueue_resource_processing(db, resource, priority=PRIORITY_NORMAL)
     
     return resource
 
@@ -411,8 +476,10 @@ async def delete_resource(
             detail="Resource not found"
         )
     
-    # Delete file if it exists
-    if resource.file_path and os.path.exists(resource.file_path):
+    # Delete the shared document once no other resource uses it
+    if resource.document:
+        DocumentStore.release(resource.document, db, exclude_resource_id=resource.id)
+    elif resource.file_path and os.path.exists(resource.file_path):
         try:
             os.remove(resource.file_path)
         except Exception as e:
@@ -1,7 +1,9 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
+from config import settings
+
 
 class CompanyBase(BaseModel):
     """Base company schema."""
@@ -22,6 +24,19 @@ class CompanyCreate(CompanyBase):
         return v.lower()
 
 
+class LLMRoutingSettings(BaseModel):
+    """Per-company model routing overrides."""
+    route: Literal["auto", "fast", "strong"] = "auto"
+    fast_model: Optional[str] = Field(None, max_length=100)
+    strong_model: Optional[str] = Field(None, max_length=100)
+    
+    @validator('fast_model', 'strong_model')
+    def model_must_be_allowed(cls, v):
+        if v and v not in settings.llm_company_models:
+            raise ValueError(f"Model must be one of: {', '.join(settings.llm_company_models)}")
+        return v
+
+
 class CompanyUpdate(BaseModel):
     """Schema for updating company information."""
     name: Optional[str] = Field(None, min_length=2, max_length=255)
@@ -30,6 +45,17 @@ class CompanyUpdate(BaseModel):
     website: Optional[str] = Field(None, max_length=500)
     description: Optional[str] = None
     logo_url: Optional[str] = Field(None, max_length=500)
+    handoff_keywords: Optional[List[str]] = Field(None, max_length=100)
+    llm_routing: Optional[LLMRoutingSettings] = None
+    
+    @validator('handoff_keywords')
+    def clean_handoff_keywords(cls, v):
+        if v is None:
+            return v
+        keywords = [keyword.strip() for keyword in v if keyword and keyword.strip()]
+        if any(len(keyword) > 100 for keyword in keywords):
+            raise ValueError("Handoff keywords must be at most 100 characters")
+        return keywords
 
 
 class CompanyResponse(CompanyBase):
@@ -39,6 +65,8 @@ class CompanyResponse(CompanyBase):
     logo_url: Optional[str] = None
     subscription_plan: str
     is_active: bool
+    handoff_keywords: Optional[List[str]] = None
+    llm_routing: Optional[LLMRoutingSettings] = None
     created_at: datetime
     updated_at: datetime
     
@@ -14,6 +14,13 @@ class ResourceCreate(BaseModel):
     source_url: Optional[str] = Field(None, max_length=1000)
     text_content: Optional[str] = None  # For TEXT type
     
+    # Site crawling (WEBSITE type)
+    crawl: bool = False  # Follow same-site links and the sitemap instead of scraping one page
+    max_pages: Optional[int] = Field(None, ge=1)
+    max_depth: Optional[int] = Field(None, ge=0, le=10)
+    use_sitemap: bool = True
+    refresh_interval_hours: Optional[int] = Field(None, ge=1, le=720)  # Scheduled incremental refresh
+    
     class Config:
         json_schema_extra = {
             "examples": [
@@ -21,6 +28,14 @@ class ResourceCreate(BaseModel):
                     "resource_type": "WEBSITE",
                     "source_url": "https://example.com"
                 },
+                {
+                    "resource_type": "WEBSITE",
+                    "source_url": "https://help.example.com",
+                    "crawl": True,
+                    "max_pages": 100,
+                    "max_depth": 3,
+                    "refresh_interval_hours": 24
+                },
                 {
                     "resource_type": "FACEBOOK",
                     "source_url": "https://facebook.com/yourpage"
@@ -36,6 +51,7 @@ class ResourceCreate(BaseModel):
 class ResourceUpdate(BaseModel):
     """Schema for updating resource information."""
     is_active: Optional[bool] = None
+    refresh_interval_hours: Optional[int] = Field(None, ge=0, le=720)  # 0 disables scheduled refresh
 
 
 class ResourceResponse(BaseModel):
@@ -48,6 +64,8 @@ class ResourceResponse(BaseModel):
     status: str
     error_message: Optional[str] = None
     is_active: bool
+    refresh_interval_hours: Optional[int] = None
+    next_refresh_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
     processed_at: Optional[datetime] = None
@@ -76,3 +94,39 @@ class ResourceContentResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class CrawledPageResponse(BaseModel):
+    """Schema for a page fetched while crawling a website resource."""
+    id: int
+    url: str
+    depth: int
+    status_code: Optional[int] = None
+    title: Optional[str] = None
+    content_length: int
+    error_message: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: Optional[datetime] = None
+    changed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ResourceJobResponse(BaseModel):
+    """Schema for the latest processing job of a resource."""
+    id: int
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    progress_current: int
+    progress_total: Optional[int] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,118 @@
+"""
+Benchmark HTML content extraction: the previous BeautifulSoup path
+(full soup tree, decompose, regex class search, get_text and line
+clean-up) vs. the lxml extractor used by HTMLExtractor.
+
+Generates marketing-style fixture pages (large navigation, hero, many
+sections, sidebar, footer, inline scripts) of increasing size, or uses
+the .html files in --dir, and reports the mean time per page and the
+amount of text each path kept.
+
+Usage:
+    python scripts/bench_html_extraction.py --sections 20 200 1000 --repeat 5
+    python scripts/bench_html_extraction.py --dir ./saved_pages
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.html_extractor import _extract_html  # noqa: E402
+
+
+def bs4_extract(html: str) -> str:
+    """The BeautifulSoup extraction used before the lxml extractor, for comparison."""
+    soup = BeautifulSoup(html, 'lxml')
+
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+
+    main_content = (
+        soup.find('main') or
+        soup.find('article') or
+        soup.find('div', class_=re.compile(r'content|main|article', re.I)) or
+        soup.find('body')
+    )
+
+    if main_content:
+        text = main_content.get_text(separator='\n', strip=True)
+    else:
+        text = soup.get_text(separator='\n', strip=True)
+
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+
+def fixture_page(sections: int) -> str:
+    """Build a marketing-style page with the given number of content sections."""
+    nav = "".join(f'<li class="menu-item"><a href="/products/{i}">Product {i}</a></li>' for i in range(150))
+    sidebar = "".join(f'<li><a href="/blog/post-{i}">Related post number {i}</a></li>' for i in range(40))
+    body = []
+    for i in range(sections):
+        body.append(
+            f'<section class="feature"><h2>Feature {i}: faster onboarding</h2>'
+            f'<div class="feature-body"><p>Teams using feature {i} cut their setup time in half. '
+            f'Import contacts, connect your calendar and invite colleagues in a few clicks. '
+            f'<a href="/docs/feature-{i}">Read the guide</a>.</p>'
+            f'<ul><li>Works with every plan</li><li>Available in 12 languages</li></ul>'
+            f'<div class="share-buttons"><a href="#">Tweet</a><a href="#">Share</a><a href="#">Email</a></div>'
+            f'</div><script>trackImpression({i});</script></section>'
+        )
+    return (
+        "<!DOCTYPE html><html><head><title>Acme - Product Tour</title>"
+        '<meta name="description" content="Everything Acme can do for your team">'
+        "<style>.feature{margin:0 auto}</style><script>window.dataLayer=[];</script></head><body>"
+        f'<header class="site-header"><nav><ul>{nav}</ul></nav></header>'
+        '<div class="cookie-consent">We use cookies. <a href="/privacy">Learn more</a></div>'
+        '<div class="page"><aside class="sidebar"><ul>' + sidebar + '</ul></aside>'
+        '<div class="main-content"><h1>Product tour</h1>' + "".join(body) + "</div></div>"
+        f'<footer><ul>{nav}</ul><p>&copy; Acme Inc.</p></footer></body></html>'
+    )
+
+
+def time_per_page(func, pages, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            func(html)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, nargs="+", default=[20, 200, 1000])
+    parser.add_argument("--dir", help="Directory of .html files to use as the corpus instead of fixtures")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.dir:
+        corpus = []
+        for name in sorted(os.listdir(args.dir)):
+            if name.endswith((".html", ".htm")):
+                with open(os.path.join(args.dir, name), encoding="utf-8", errors="replace") as file:
+                    corpus.append((name, [file.read()]))
+    else:
+        corpus = [(f"{count} sections", [fixture_page(count)]) for count in args.sections]
+
+    print(f"{'corpus':>20} {'size (KB)':>10} {'bs4 (ms)':>9} {'lxml (ms)':>10} {'speedup':>8} {'bs4 chars':>10} {'lxml chars':>11}")
+    for label, pages in corpus:
+        size_kb = sum(len(html) for html in pages) / 1024 / len(pages)
+        bs4_time = time_per_page(bs4_extract, pages, args.repeat)
+        lxml_time = time_per_page(lambda html: _extract_html(html, "https://example.com/"), pages, args.repeat)
+        bs4_chars = len(bs4_extract(pages[0]))
+        lxml_chars = len(_extract_html(pages[0], "https://example.com/")["text"])
+        print(
+            f"{label[:20]:>20} {size_kb:>10.0f} {bs4_time * 1000:>9.1f} {lxml_time * 1000:>10.1f} "
+            f"{bs4_time / lxml_time:>7.1f}x {bs4_chars:>10} {lxml_chars:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark JSON serialization of REST list responses and WebSocket frames.
+
+REST: compares FastAPI's response_model path (serialize_response: validate,
+serialize to Python objects, then json.dumps in JSONResponse) against
+utils.serialization.list_response (compiled TypeAdapter straight to bytes)
+for lists of MessageResponse and SessionResponse built from unsaved ORM
+objects. Also reports the gzip size GZipMiddleware would send.
+
+WebSocket: compares encoding one broadcast frame per admin socket with
+json.dumps (what send_json did) against encoding it once with orjson.
+
+Usage:
+    python scripts/bench_json_serialization.py --sizes 10 100 1000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from models.chat import ChatSession, ClientInfo, Message, SenderType, SessionState  # noqa: E402
+from schemas.chat import MessageResponse, SessionResponse  # noqa: E402
+from utils.serialization import dumps, list_response  # noqa: E402
+
+
+def make_messages(count: int) -> list:
+    start = datetime(2024, 1, 1)
+    return [
+        Message(
+            id=i,
+            session_id=1,
+            sender_type=SenderType.AI if i % 2 else SenderType.CLIENT,
+            content=f"Message number {i}: thanks for reaching out, here is what I found about your order and shipping options.",
+            created_at=start + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def make_sessions(count: int) -> list:
+    start = datetime(2024, 1, 1)
+    sessions = []
+    for i in range(count):
+        client = ClientInfo(id=i, company_id=1, name=f"Client {i}", email=f"client{i}@example.com",
+                            phone="+1 555 0100", created_at=start)
+        sessions.append(ChatSession(
+            id=i, session_id=f"session-{i:08d}", company_id=1, state=SessionState.HUMAN,
+            client_info=client, assigned_admin_id=None, created_at=start, updated_at=start,
+        ))
+    return sessions
+
+
+def time_call(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_rest(label: str, model, items: list, repeat: int):
+    field = create_model_field(name="Response", type_=List[model], mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def fastapi_path():
+        content = loop.run_until_complete(serialize_response(field=field, response_content=items, is_coroutine=True))
+        return JSONResponse(content).body
+
+    def fast_path():
+        return list_response(model, items).body
+
+    assert json.loads(fastapi_path()) == json.loads(fast_path())
+    baseline = time_call(fastapi_path, repeat)
+    fast = time_call(fast_path, repeat)
+    body = fast_path()
+    loop.close()
+    print(
+        f"{label:>22} {len(items):>6} {baseline * 1000:>12.2f} {fast * 1000:>10.2f} {baseline / fast:>7.1f}x "
+        f"{len(body) / 1024:>9.1f} {len(gzip.compress(body, 5)) / 1024:>9.1f}"
+    )
+
+
+def bench_broadcast(admins: int, repeat: int):
+    frame = {
+        "type": "new_session",
+        "session_id": "session-00000001",
+        "client_info": {"name": "Client", "email": "client@example.com", "phone": "+1 555 0100"},
+        "queue_size": 12,
+    }
+
+    def per_socket():
+        for _ in range(admins):
+            json.dumps(frame, separators=(",", ":"), ensure_ascii=False)
+
+    def once():
+        return dumps(frame)
+
+    baseline = time_call(per_socket, repeat * 100)
+    fast = time_call(once, repeat * 100)
+    print(f"broadcast to {admins:>4} admins: json per socket {baseline * 1e6:8.1f} us, orjson once {fast * 1e6:6.1f} us "
+          f"({baseline / fast:.0f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--admins", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'response':>22} {'items':>6} {'fastapi (ms)':>12} {'fast (ms)':>10} {'speedup':>8} {'JSON (KB)':>9} {'gzip (KB)':>9}")
+    for size in args.sizes:
+        bench_rest("List[MessageResponse]", MessageResponse, make_messages(size), args.repeat)
+        bench_rest("List[SessionResponse]", SessionResponse, make_sessions(size), args.repeat)
+    print()
+    for admins in args.admins:
+        bench_broadcast(admins, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark admin WebSocket latency during a login storm.
+
+Starts the API with uvicorn on a scratch SQLite database, seeds an admin,
+connects one admin WebSocket and measures get_queue round trips while
+idle and while --logins concurrent POST /api/auth/login requests (bcrypt
+verification) are in flight. When password hashing blocks the event loop
+the round trips stall for the length of the storm; when it runs off-loop
+they stay close to the idle figures. The storm also reports how many
+logins were rejected with 503 once the hashing queue was full.
+
+Usage:
+    python scripts/bench_login_storm.py --logins 50 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+USERNAME = "bench-admin"
+PASSWORD = "bench-password"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(env: dict):
+    """Create the schema, a company and an admin in a child interpreter using env's DATABASE_URL."""
+    code = (
+        "from models.database import init_db, SessionLocal\n"
+        "from models import Company, AdminUser, AdminRole\n"
+        "from auth.jwt import get_password_hash\n"
+        "init_db()\n"
+        "db = SessionLocal()\n"
+        "company = Company(name='Bench', slug='bench', email='bench@example.com')\n"
+        "db.add(company)\n"
+        "db.commit()\n"
+        f"db.add(AdminUser(company_id=company.id, username={USERNAME!r}, email='admin@example.com',\n"
+        f"    hashed_password=get_password_hash({PASSWORD!r}), role=AdminRole.COMPANY_ADMIN, is_active=1))\n"
+        "db.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True)
+
+
+async def wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+async def login(session: aiohttp.ClientSession, base_url: str) -> int:
+    async with session.post(f"{base_url}/api/auth/login", json={"username": USERNAME, "password": PASSWORD}) as response:
+        await response.read()
+        return response.status
+
+
+async def probe_latency(ws: aiohttp.ClientWebSocketResponse, stop: asyncio.Event, interval: float) -> list:
+    """Send get_queue round trips until stop is set and return their latencies in ms."""
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await ws.send_json({"type": "get_queue"})
+        while True:
+            message = json.loads((await ws.receive()).data)
+            if message.get("type") == "queue_update":
+                break
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return samples
+
+
+def describe(samples: list) -> str:
+    if not samples:
+        return "no samples"
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"n={len(samples):<4} p50={statistics.median(samples):7.1f} ms  p95={p95:7.1f} ms  max={ordered[-1]:7.1f} ms"
+
+
+async def run(base_url: str, args):
+    await wait_until_up(base_url)
+    async with aiohttp.ClientSession() as session:
+        async with session.post(f"{base_url}/api/auth/login", json={"username": USERNAME, "password": PASSWORD}) as response:
+            token = (await response.json())["access_token"]
+
+        async with session.ws_connect(f"{base_url.replace('http', 'ws')}/ws/admin?token={token}") as ws:
+            await ws.receive()  # Welcome message
+
+            stop = asyncio.Event()
+            probe = asyncio.create_task(probe_latency(ws, stop, args.interval))
+            await asyncio.sleep(args.idle_seconds)
+            stop.set()
+            idle = await probe
+
+            stop = asyncio.Event()
+            probe = asyncio.create_task(probe_latency(ws, stop, args.interval))
+            limiter = asyncio.Semaphore(args.concurrency)
+
+            async def limited_login():
+                async with limiter:
+                    return await login(session, base_url)
+
+            start = time.perf_counter()
+            statuses = await asyncio.gather(*(limited_login() for _ in range(args.logins)))
+            storm_seconds = time.perf_counter() - start
+            stop.set()
+            storm = await probe
+
+    counts = {status: statuses.count(status) for status in sorted(set(statuses))}
+    print(f"idle WebSocket RTT:  {describe(idle)}")
+    print(f"storm WebSocket RTT: {describe(storm)}")
+    print(f"{args.logins} logins in {storm_seconds:.2f}s ({args.logins / storm_seconds:.1f}/s), status counts: {counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.02, help="Pause between WebSocket probes (s)")
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ)
+        env.setdefault("SECRET_KEY", "bench-secret")
+        env.setdefault("GEMINI_API_KEY", "bench")
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+        env["DEBUG"] = "false"
+        seed_database(env)
+
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT,
+            env=env,
+        )
+        try:
+            asyncio.run(run(f"http://127.0.0.1:{port}", args))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark PDF text extraction: serial pdfplumber pass vs. the page-parallel
+process pool used by PDFProcessor, and a re-parse where every page is
+unchanged and skipped by source hash.
+
+Generates large text-only fixture PDFs (no extra dependencies) and reports
+wall time for each strategy.
+
+Usage:
+    python scripts/bench_pdf_extraction.py --pages 100 300 --lines 40
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.pdf_processor import PDFProcessor, _parse_page_range  # noqa: E402
+from utils.process_pool import shutdown_process_pool  # noqa: E402
+
+
+def write_fixture_pdf(path: str, pages: int, lines_per_page: int):
+    """Write a simple multi-page PDF with lines of Helvetica text on every page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages tree, filled in once page object ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+
+    for page_num in range(pages):
+        lines = [b"BT /F1 10 Tf 50 760 Td 12 TL"]
+        for line_num in range(lines_per_page):
+            text = f"Page {page_num + 1} line {line_num + 1}: catalogue item {page_num * lines_per_page + line_num} costs {line_num * 3 + 7} USD"
+            lines.append(f"({text}) Tj T*".encode())
+        lines.append(b"ET")
+        stream = b"\n".join(lines)
+
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    with open(path, "wb") as out:
+        out.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(out.tell())
+            out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref_offset = out.tell()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            out.write(b"%010d 00000 n \n" % offset)
+        out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset))
+
+
+def bench_serial(path: str, pages: int) -> float:
+    start = time.perf_counter()
+    _parse_page_range(path, 0, pages, {})
+    return time.perf_counter() - start
+
+
+async def bench_pool(path: str, known_hashes: dict) -> float:
+    start = time.perf_counter()
+    metadata, error = await PDFProcessor.parse(
+        path,
+        on_pages=lambda pages: known_hashes.update({p["page_number"]: p["source_hash"] for p in pages}),
+        known_hashes=dict(known_hashes)
+    )
+    elapsed = time.perf_counter() - start
+    assert metadata, f"pooled extraction failed: {error}"
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 300])
+    parser.add_argument("--lines", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Warm the pool so worker start-up is not counted against the first run
+        warm = os.path.join(tmp, "warm.pdf")
+        write_fixture_pdf(warm, 2, 2)
+        await PDFProcessor.parse(warm)
+
+        print(f"{'pages':>6} {'serial (s)':>11} {'pool (s)':>9} {'speedup':>8} {'unchanged (s)':>14}")
+        for pages in args.pages:
+            path = os.path.join(tmp, f"fixture-{pages}.pdf")
+            write_fixture_pdf(path, pages, args.lines)
+            serial = bench_serial(path, pages)
+            known_hashes = {}
+            pooled = await bench_pool(path, known_hashes)
+            unchanged = await bench_pool(path, known_hashes)
+            print(f"{pages:>6} {serial:>11.2f} {pooled:>9.2f} {serial / pooled:>7.1f}x {unchanged:>14.2f}")
+
+    shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
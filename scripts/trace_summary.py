@@ -0,0 +1,127 @@
+"""
+Summarize span traces written by utils.tracing (TRACING_ENABLED=true).
+
+Prints per-span-name latency percentiles, and for each span name how much
+of its root span's time it accounts for on average, so the slow step of the
+chat message lifecycle stands out. With --trace, prints one trace as a tree.
+
+Usage:
+    python scripts/trace_summary.py traces.jsonl
+    python scripts/trace_summary.py traces.jsonl --root ws.client.message
+    python scripts/trace_summary.py traces.jsonl --trace 4bf92f3577b34da6a3ce929d0e0e4736
+"""
+
+import argparse
+import json
+import math
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+
+def load_spans(paths: List[str]) -> List[dict]:
+    spans = []
+    for path in paths:
+        with open(path, encoding="utf-8") as trace_file:
+            for line in trace_file:
+                line = line.strip()
+                if line:
+                    spans.append(json.loads(line))
+    return spans
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(spans: List[dict], root_name: str = None):
+    by_trace: Dict[str, List[dict]] = defaultdict(list)
+    for span in spans:
+        by_trace[span["trace_id"]].append(span)
+
+    durations: Dict[str, List[float]] = defaultdict(list)
+    shares: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    traces = 0
+
+    for trace_spans in by_trace.values():
+        span_ids = {span["span_id"] for span in trace_spans}
+        roots = [span for span in trace_spans if span["parent_id"] not in span_ids]
+        if root_name and not any(root["name"] == root_name for root in roots):
+            continue
+        traces += 1
+        root_duration = sum(root["duration_ms"] for root in roots) or None
+        for span in trace_spans:
+            durations[span["name"]].append(span["duration_ms"])
+            if span["error"]:
+                errors[span["name"]] += 1
+            if root_duration:
+                shares[span["name"]].append(span["duration_ms"] / root_duration)
+
+    print(f"{traces} traces, {sum(len(values) for values in durations.values())} spans")
+    print()
+    header = f"{'span':<34} {'count':>7} {'errors':>6} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'of root':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = sorted(durations.items(), key=lambda item: sum(item[1]), reverse=True)
+    for name, values in rows:
+        values.sort()
+        share = sum(shares[name]) / len(shares[name]) if shares[name] else 0.0
+        print(
+            f"{name[:34]:<34} {len(values):>7} {errors[name]:>6} {sum(values) / len(values):>9.2f} "
+            f"{percentile(values, 0.5):>9.2f} {percentile(values, 0.95):>9.2f} {percentile(values, 0.99):>9.2f} "
+            f"{values[-1]:>9.2f} {share:>7.0%}"
+        )
+    print()
+    print("Durations in milliseconds; 'of root' is the mean share of the enclosing trace's root span.")
+
+
+def print_trace(spans: List[dict], trace_id: str):
+    trace_spans = sorted((span for span in spans if span["trace_id"] == trace_id), key=lambda span: span["start"])
+    if not trace_spans:
+        print(f"Trace {trace_id} not found")
+        sys.exit(1)
+
+    children: Dict[str, List[dict]] = defaultdict(list)
+    span_ids = {span["span_id"] for span in trace_spans}
+    roots = []
+    for span in trace_spans:
+        if span["parent_id"] in span_ids:
+            children[span["parent_id"]].append(span)
+        else:
+            roots.append(span)
+
+    trace_start = trace_spans[0]["start"]
+
+    def show(span: dict, depth: int):
+        offset = (span["start"] - trace_start) * 1000
+        attributes = " ".join(f"{key}={value}" for key, value in span["attributes"].items())
+        error = f" ERROR={span['error']}" if span["error"] else ""
+        print(f"{offset:>9.2f} ms {'  ' * depth}{span['name']} {span['duration_ms']:.2f} ms {attributes}{error}")
+        for child in children[span["span_id"]]:
+            show(child, depth + 1)
+
+    for root in roots:
+        show(root, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="JSONL trace files")
+    parser.add_argument("--root", help="Only include traces whose root span has this name")
+    parser.add_argument("--trace", help="Print a single trace as a tree")
+    args = parser.parse_args()
+
+    spans = load_spans(args.files)
+    if args.trace:
+        print_trace(spans, args.trace)
+    else:
+        summarize(spans, args.root)
+
+
+if __name__ == "__main__":
+    main()
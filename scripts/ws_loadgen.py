@@ -0,0 +1,360 @@
+"""
+Load-generate the real-time chat path with simulated clients and agents.
+
+Each simulated client creates a session with POST /api/sessions, opens
+/ws/client/{session_id} and plays a scripted conversation with think time
+between turns. A --handoff-rate fraction of clients end by asking for a
+human. --agents simulated agents log in, hold /ws/admin sockets, claim
+queued sessions as soon as they are announced, answer the client and close
+the session.
+
+Reported latencies (p50/p95/p99):
+    time to first frame    WebSocket connect until the "connected" frame
+    AI turn                client message until the AI reply
+    handoff claim          handoff request until "agent_connected"
+
+By default the API is started with uvicorn on a scratch SQLite database and
+the stub LLM provider (LLM_PROVIDER=stub), whose replies take a
+--llm-latency-distribution draw around --llm-latency-ms, so the run is
+fully offline. Companies are
+seeded on the ENTERPRISE plan; replies shed by the LLM scheduler are counted
+as "busy". Server settings can be overridden through the environment (e.g.
+LLM_MAX_CONCURRENCY=32). Use --url with --company-id and --agent to target
+a running server instead.
+
+Usage:
+    python scripts/ws_loadgen.py --clients 200 --agents 4 --turns 3
+    python scripts/ws_loadgen.py --url http://localhost:8000 --company-id 1 --agent alice:secret
+"""
+
+import argparse
+import asyncio
+import itertools
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Set
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+AGENT_PASSWORD = "loadgen-password"
+
+SCRIPT = [
+    "Hi there",
+    "What are your opening hours?",
+    "How long does shipping take to Canada?",
+    "Can I change my delivery address after ordering?",
+    "What payment methods do you accept?",
+    "Does the product come with a warranty?",
+]
+HANDOFF_MESSAGE = "I want to speak to a human agent please"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(env: dict, companies: int, agents: int) -> List[int]:
+    """Create the schema, ENTERPRISE companies and agent accounts in a child interpreter."""
+    code = (
+        "from models.database import init_db, SessionLocal\n"
+        "from models import Company, AdminUser, AdminRole, SubscriptionPlan\n"
+        "from auth.jwt import get_password_hash\n"
+        "init_db()\n"
+        "db = SessionLocal()\n"
+        f"for i in range({companies}):\n"
+        "    db.add(Company(name=f'Load {i}', slug=f'load-{i}', email=f'load{i}@example.com',\n"
+        "                   subscription_plan=SubscriptionPlan.ENTERPRISE))\n"
+        "db.commit()\n"
+        "first = db.query(Company).order_by(Company.id).first()\n"
+        f"hashed = get_password_hash({AGENT_PASSWORD!r})\n"
+        f"for i in range({agents}):\n"
+        "    db.add(AdminUser(company_id=first.id, username=f'agent{i}', email=f'agent{i}@example.com',\n"
+        "                     hashed_password=hashed, role=AdminRole.AGENT, is_active=1))\n"
+        "db.commit()\n"
+        "print(' '.join(str(c.id) for c in db.query(Company).order_by(Company.id)))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True, capture_output=True, text=True)
+    return [int(value) for value in output.stdout.split()]
+
+
+async def wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[max(1, math.ceil(fraction * len(sorted_values))) - 1]
+
+
+class Results:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float):
+        self.latencies[name].append(seconds * 1000)
+
+    def count(self, name: str):
+        self.counts[name] += 1
+
+    def report(self, elapsed: float):
+        print(f"{'metric':<22} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for name in ("time to first frame", "AI turn", "handoff claim", "agent reply"):
+            values = sorted(self.latencies.get(name, []))
+            if not values:
+                print(f"{name:<22} {0:>7}")
+                continue
+            print(
+                f"{name:<22} {len(values):>7} {percentile(values, 0.5):>9.1f} {percentile(values, 0.95):>9.1f} "
+                f"{percentile(values, 0.99):>9.1f} {values[-1]:>9.1f}"
+            )
+        print()
+        turns = len(self.latencies.get("AI turn", []))
+        print(f"elapsed {elapsed:.1f} s, {turns / elapsed:.1f} AI turns/s")
+        for name, value in sorted(self.counts.items()):
+            print(f"{name}: {value}")
+
+
+class Receiver:
+    """Reads one socket's frames into a queue so waits can filter by frame type."""
+
+    def __init__(self, ws: aiohttp.ClientWebSocketResponse):
+        self.ws = ws
+        self.frames: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        async for msg in self.ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                self.frames.put_nowait(msg.json())
+        self.frames.put_nowait(None)
+
+    async def wait_for(self, predicate, timeout: float) -> dict:
+        deadline = time.monotonic() + timeout
+        while True:
+            frame = await asyncio.wait_for(self.frames.get(), max(0.0, deadline - time.monotonic()))
+            if frame is None:
+                raise ConnectionError("socket closed")
+            if predicate(frame):
+                return frame
+
+
+async def run_client(http: aiohttp.ClientSession, args, company_id: int, results: Results):
+    client_id = next(CLIENT_IDS)
+    payload = {"client_info": {
+        "company_id": company_id,
+        "name": f"Load Client {client_id}",
+        "email": f"client{client_id}@example.com",
+        "phone": "+1 555 010 0000",
+    }}
+    async with http.post(f"{args.url}/api/sessions", json=payload) as response:
+        if response.status != 201:
+            results.count(f"session create HTTP {response.status}")
+            return
+        session_id = (await response.json())["session_id"]
+
+    ws_url = args.url.replace("http", "ws", 1) + f"/ws/client/{session_id}"
+    started = time.perf_counter()
+    async with http.ws_connect(ws_url, max_msg_size=0) as ws:
+        receiver = Receiver(ws)
+        try:
+            await receiver.wait_for(lambda f: f.get("type") == "connected", args.timeout)
+            results.record("time to first frame", time.perf_counter() - started)
+
+            messages = random.sample(SCRIPT, min(args.turns, len(SCRIPT)))
+            for content in messages:
+                await asyncio.sleep(random.uniform(0.5, 1.5) * args.think_time)
+                sent = time.perf_counter()
+                await ws.send_json({"content": content})
+                frame = await receiver.wait_for(
+                    lambda f: f.get("type") == "message" and f.get("sender_type") == "AI", args.timeout
+                )
+                if frame["content"].startswith("We're receiving a lot of messages"):
+                    results.count("AI turns shed (busy)")
+                else:
+                    results.record("AI turn", time.perf_counter() - sent)
+
+            if random.random() < args.handoff_rate:
+                await asyncio.sleep(random.uniform(0.5, 1.5) * args.think_time)
+                sent = time.perf_counter()
+                await ws.send_json({"content": HANDOFF_MESSAGE})
+                await receiver.wait_for(lambda f: f.get("type") == "handoff_requested", args.timeout)
+                await receiver.wait_for(lambda f: f.get("type") == "agent_connected", args.handoff_timeout)
+                results.record("handoff claim", time.perf_counter() - sent)
+                await receiver.wait_for(lambda f: f.get("type") == "message" and f.get("sender_type") == "ADMIN", args.timeout)
+                results.record("agent reply", time.perf_counter() - sent)
+            results.count("conversations completed")
+        except asyncio.TimeoutError:
+            results.count("client timeouts")
+        except ConnectionError:
+            results.count("client sockets closed early")
+        finally:
+            receiver.task.cancel()
+
+
+async def run_agent(http: aiohttp.ClientSession, args, username: str, password: str,
+                    claimed: Set[str], stop: asyncio.Event, results: Results):
+    async with http.post(f"{args.url}/api/auth/login", json={"username": username, "password": password}) as response:
+        if response.status != 200:
+            results.count(f"agent login HTTP {response.status}")
+            return
+        token = (await response.json())["access_token"]
+
+    ws_url = args.url.replace("http", "ws", 1) + f"/ws/admin?token={token}"
+    async with http.ws_connect(ws_url, max_msg_size=0) as ws:
+        async def claim(session_id: str):
+            if session_id in claimed:
+                return
+            claimed.add(session_id)
+            await ws.send_json({"type": "claim_session", "session_id": session_id})
+
+        async def answer(session_id: str):
+            await asyncio.sleep(args.agent_reply_delay)
+            await ws.send_json({"type": "message", "session_id": session_id, "content": "Hi, this is a human agent."})
+            await asyncio.sleep(args.agent_reply_delay)
+            await ws.send_json({"type": "close_session", "session_id": session_id})
+
+        reader = asyncio.ensure_future(ws.receive())
+        stopper = asyncio.ensure_future(stop.wait())
+        try:
+            while True:
+                done, _ = await asyncio.wait({reader, stopper}, return_when=asyncio.FIRST_COMPLETED)
+                if stopper in done:
+                    break
+                msg = reader.result()
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+                reader = asyncio.ensure_future(ws.receive())
+                frame = msg.json()
+                if frame.get("type") == "new_session_queued":
+                    await claim(frame["session_id"])
+                elif frame.get("type") in ("connected", "queue_update"):
+                    for item in frame.get("queued_sessions", []):
+                        await claim(item["session_id"])
+                elif frame.get("type") == "session_claimed":
+                    results.count("sessions claimed")
+                    asyncio.create_task(answer(frame["session_id"]))
+        finally:
+            reader.cancel()
+            stopper.cancel()
+
+
+CLIENT_IDS = itertools.count()
+
+
+async def run(args, company_ids: List[int], agents: List[str]):
+    results = Results()
+    claimed: Set[str] = set()
+    stop = asyncio.Event()
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=args.timeout)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http:
+        agent_tasks = []
+        for agent in agents:
+            username, password = agent.split(":", 1)
+            agent_tasks.append(asyncio.create_task(run_agent(http, args, username, password, claimed, stop, results)))
+        await asyncio.sleep(1.0)
+
+        started = time.perf_counter()
+
+        async def delayed_client(index: int):
+            await asyncio.sleep(args.ramp_up * index / max(1, args.clients))
+            try:
+                await run_client(http, args, company_ids[index % len(company_ids)], results)
+            except aiohttp.ClientError as e:
+                results.count(f"client errors ({type(e).__name__})")
+
+        await asyncio.gather(*(delayed_client(index) for index in range(args.clients)))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await asyncio.gather(*agent_tasks, return_exceptions=True)
+
+    print(f"{args.clients} clients, {len(agents)} agents, {args.turns} turns, handoff rate {args.handoff_rate:.0%}")
+    print()
+    results.report(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target a running server instead of starting one with the stub LLM")
+    parser.add_argument("--company-id", type=int, action="append", help="Company for sessions (with --url)")
+    parser.add_argument("--agent", action="append", default=[], help="Agent credentials username:password (with --url)")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--agents", type=int, default=4, help="Agents to seed (without --url)")
+    parser.add_argument("--companies", type=int, default=10, help="Companies to seed (without --url)")
+    parser.add_argument("--turns", type=int, default=3, help="AI turns per conversation")
+    parser.add_argument("--handoff-rate", type=float, default=0.2, help="Fraction of clients that ask for a human")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean seconds between client messages")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="Seconds over which clients connect")
+    parser.add_argument("--agent-reply-delay", type=float, default=0.5)
+    parser.add_argument("--llm-latency-ms", type=float, default=400.0, help="Stub LLM median time to first token")
+    parser.add_argument("--llm-latency-distribution", default="lognormal",
+                        choices=("fixed", "uniform", "normal", "lognormal"))
+    parser.add_argument("--llm-latency-spread", type=float, default=0.5)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Fraction of stub LLM calls that fail")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a frame")
+    parser.add_argument("--handoff-timeout", type=float, default=120.0, help="Seconds to wait for an agent")
+    args = parser.parse_args()
+
+    if args.url:
+        if not args.company_id:
+            parser.error("--url needs at least one --company-id")
+        args.url = args.url.rstrip("/")
+        asyncio.run(run(args, args.company_id, args.agent))
+        return
+
+    port = free_port()
+    args.url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'loadgen.db')}",
+            "SECRET_KEY": "loadgen",
+            "DEBUG": "false",
+            "LLM_PROVIDER": "stub",
+            "LLM_STUB_LATENCY_MS": str(args.llm_latency_ms),
+            "LLM_STUB_LATENCY_DISTRIBUTION": args.llm_latency_distribution,
+            "LLM_STUB_LATENCY_SPREAD": str(args.llm_latency_spread),
+            "LLM_STUB_ERROR_RATE": str(args.llm_error_rate),
+        }
+        company_ids = seed_database(env, args.companies, args.agents)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=workdir, env={**env, "PYTHONPATH": ROOT},
+        )
+        try:
+            asyncio.run(wait_until_up(args.url))
+            agents = [f"agent{i}:{AGENT_PASSWORD}" for i in range(args.agents)]
+            asyncio.run(run(args, company_ids, agents))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Content-Addressed Document Store
+Stores uploaded files once per SHA-256 hash and shares them across resources.
+"""
+
+import os
+import uuid
+import hashlib
+import logging
+from typing import AsyncIterator, List, Optional, Tuple
+
+import aiofiles
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+
+from config import settings
+from models import Document, Resource, ResourceStatus
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
+DOCUMENTS_DIR = os.path.join(UPLOAD_DIR, "documents")
+TEMP_DIR = os.path.join(UPLOAD_DIR, "tmp")
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+MULTIPART_OVERHEAD = 64 * 1024  # Allowance for boundaries and part headers
+PDF_MAGIC = b"%PDF-"
+
+
+class UploadRejected(Exception):
+    """Raised when an upload is invalid or exceeds the size limit."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _FilePartReceiver:
+    """Multipart parser callbacks that collect one file field's data as it arrives."""
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name.encode()
+        self.filename: Optional[str] = None
+        self._in_file = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._pending: List[bytes] = []
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def take_data(self) -> List[bytes]:
+        """Return and clear the file data received since the last call."""
+        pending, self._pending = self._pending, []
+        return pending
+
+    def on_part_begin(self):
+        self._disposition = b""
+        self._in_file = False
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self._pending.append(data[start:end])
+
+    def on_part_end(self):
+        self._in_file = False
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if options.get(b"name") == self.field_name and b"filename" in options and self.filename is None:
+            self.filename = options[b"filename"].decode("utf-8", errors="replace")
+            self._in_file = True
+
+
+class DocumentStore:
+    """Service for storing uploaded files by content hash."""
+
+    @staticmethod
+    def path_for_hash(sha256: str, extension: str = ".pdf") -> str:
+        """Get the storage path for a content hash (fanned out by hash prefix)."""
+        return os.path.join(DOCUMENTS_DIR, sha256[:2], f"{sha256}{extension}")
+
+    @staticmethod
+    async def save_stream(
+        headers: Headers,
+        stream: AsyncIterator[bytes],
+        db: Session,
+        field_name: str = "file"
+    ) -> Tuple[Document, str]:
+        """
+        Stream a multipart PDF upload to disk and store it once by hash.
+
+        The request body is parsed incrementally; file data is hashed,
+        size-checked and written chunk by chunk, so memory stays O(chunk size)
+        whatever the upload size. The size cap and PDF magic bytes are
+        enforced while streaming, and the temp file is always removed if the
+        upload fails, is rejected or the client disconnects.
+
+        If a document with the same SHA-256 already exists (uploaded by any
+        company), the new copy is discarded and the existing document is
+        returned.
+
+        Args:
+            headers: Request headers (Content-Type with boundary, Content-Length)
+            stream: Request body chunks
+            db: Database session
+            field_name: Multipart field holding the file
+
+        Returns:
+            Tuple of (new or existing Document, original filename)
+
+        Raises:
+            UploadRejected: Invalid, non-PDF or oversized upload
+        """
+        max_bytes = settings.max_upload_size_mb * 1024 * 1024
+
+        # Reject obviously oversized bodies before reading anything
+        content_length = headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes + MULTIPART_OVERHEAD:
+            raise UploadRejected(
+                f"File too large. Maximum size is {settings.max_upload_size_mb} MB",
+                status_code=413
+            )
+
+        _, params = parse_options_header(headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise UploadRejected("Expected a multipart/form-data upload")
+
+        receiver = _FilePartReceiver(field_name)
+        parser = MultipartParser(boundary, receiver.callbacks())
+
+        os.makedirs(TEMP_DIR, exist_ok=True)
+        temp_path = os.path.join(TEMP_DIR, f"{uuid.uuid4()}.part")
+        digest = hashlib.sha256()
+        head = b""
+        size = 0
+
+        try:
+            async with aiofiles.open(temp_path, 'wb') as out_file:
+                async for body_chunk in stream:
+                    parser.write(body_chunk)
+
+                    if receiver.filename is not None and not receiver.filename.lower().endswith('.pdf'):
+                        raise UploadRejected("Only PDF files are allowed")
+
+                    for data in receiver.take_data():
+                        # Validate magic bytes as soon as they arrive
+                        if len(head) < len(PDF_MAGIC):
+                            head = (head + data)[:len(PDF_MAGIC)]
+                            if not PDF_MAGIC.startswith(head):
+                                raise UploadRejected("File is not a valid PDF")
+
+                        size += len(data)
+                        if size > max_bytes:
+                            raise UploadRejected(
+                                f"File too large. Maximum size is {settings.max_upload_size_mb} MB",
+                                status_code=413
+                            )
+                        digest.update(data)
+                        await out_file.write(data)
+
+                parser.finalize()
+
+            if receiver.filename is None:
+                raise UploadRejected(f"Missing file field '{field_name}'")
+            if head != PDF_MAGIC:
+                raise UploadRejected("File is not a valid PDF")
+
+            document = DocumentStore._store(temp_path, digest.hexdigest(), size, db)
+            return document, receiver.filename
+        except MultipartParseError as e:
+            raise UploadRejected(f"Malformed multipart body: {str(e)}")
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def register_file(file_path: str, db: Session) -> Document:
+        """
+        Get or create the Document for a file already on disk.
+
+        Used for resources uploaded before content-addressed storage existed;
+        the file is hashed and left where it is.
+
+        Args:
+            file_path: Path to the existing file
+            db: Database session
+
+        Returns:
+            The new or existing Document
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+
+        document = DocumentStore.get_by_hash(sha256, db)
+        if document:
+            return document
+
+        document = Document(
+            sha256=sha256,
+            storage_path=file_path,
+            size_bytes=os.path.getsize(file_path),
+            status=ResourceStatus.PENDING
+        )
+        db.add(document)
+        db.commit()
+        db.refresh(document)
+        return document
+
+    @staticmethod
+    def get_by_hash(sha256: str, db: Session) -> Optional[Document]:
+        """Get a document by its content hash."""
+        return db.query(Document).filter(Document.sha256 == sha256).first()
+
+    @staticmethod
+    def release(document: Document, db: Session, exclude_resource_id: Optional[int] = None):
+        """
+        Delete a document and its file once no resource references it.
+
+        Args:
+            document: Document to release
+            db: Database session
+            exclude_resource_id: Resource being deleted, not counted as a reference
+        """
+        query = db.query(Resource).filter(Resource.document_id == document.id)
+        if exclude_resource_id is not None:
+            query = query.filter(Resource.id != exclude_resource_id)
+        if query.count() > 0:
+            return
+
+        if os.path.exists(document.storage_path):
+            try:
+                os.remove(document.storage_path)
+            except OSError as e:
+                logger.error(f"Failed to delete document file: {str(e)}")
+
+        db.delete(document)
+
+    @staticmethod
+    def _store(temp_path: str, sha256: str, size: int, db: Session) -> Document:
+        """Move a fully written temp file into content-addressed storage."""
+        document = DocumentStore.get_by_hash(sha256, db)
+        if document and os.path.exists(document.storage_path):
+            logger.info(f"Upload matches existing document {document.id} ({sha256[:12]}), reusing it")
+            return document
+
+        storage_path = DocumentStore.path_for_hash(sha256)
+        os.makedirs(os.path.dirname(storage_path), exist_ok=True)
+        os.replace(temp_path, storage_path)
+
+        if document:
+            # Row survived but its file went missing; restore the file
+            document.storage_path = storage_path
+        else:
+            document = Document(
+                sha256=sha256,
+                storage_path=storage_path,
+                size_bytes=size,
+                status=ResourceStatus.PENDING
+            )
+            db.add(document)
+        try:
+            db.commit()
+        except IntegrityError:
+            # The same file was stored concurrently; use that row
+            db.rollback()
+            return DocumentStore.get_by_hash(sha256, db)
+        db.refresh(document)
+        return document
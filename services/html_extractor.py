@@ -0,0 +1,370 @@
+"""
+HTML Content Extraction Service
+Extracts readable, sectioned text from HTML pages with lxml.
+"""
+
+import asyncio
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from lxml import etree
+
+from config import settings
+from utils.process_pool import get_process_pool
+
+logger = logging.getLogger(__name__)
+
+# Removed outright: never part of the readable content
+NON_CONTENT_TAGS = (
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "embed",
+    "nav", "aside", "footer", "button", "select", "input", "textarea",
+)
+NON_CONTENT_ROLES = {"navigation", "banner", "contentinfo", "complementary"}
+# Structural containers that are scored and may be dropped as boilerplate
+# (paragraphs and list items are kept, so a sentence that is mostly a link survives)
+CONTAINER_TAGS = {"div", "section", "ul", "ol", "dl", "table", "form", "header"}
+# Tags whose boundaries break lines in the extracted text
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "dd", "div", "dl", "dt", "figcaption", "figure", "form", "header",
+    "hr", "li", "main", "ol", "p", "pre", "section", "table", "tr", "ul", "caption", "details", "summary",
+}
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+CELL_TAGS = {"td", "th"}
+
+BOILERPLATE_RE = re.compile(
+    r"nav|menu|footer|sidebar|breadcrumb|cookie|consent|share|social|banner|advert|promo|"
+    r"related|comment|subscribe|newsletter|popup|modal|widget|pagination",
+    re.I
+)
+LINK_DENSITY_MAX = 0.5  # Blocks whose text is mostly link text are navigation
+BOILERPLATE_LINK_DENSITY_MAX = 0.3  # Stricter limit for blocks with boilerplate class names
+BOILERPLATE_MIN_CHARS = 300  # Boilerplate-named blocks shorter than this are dropped
+SPARSE_MIN_TAGS = 20  # Blocks with at least this many tags...
+SPARSE_MAX_DENSITY = 5.0  # ...and fewer characters per tag are widget grids
+MIN_CONTENT_CHARS = 200  # Below this, pruning is assumed to have removed the content
+MAX_HEADING_CHARS = 200
+
+Stats = Tuple[int, int, int]  # (text length, link text length, tag count)
+
+
+def _parse(html: str):
+    """Parse an HTML string into a plain lxml tree (comments and processing instructions dropped)."""
+    try:
+        parser = etree.HTMLParser(remove_comments=True, remove_pis=True)
+        return etree.fromstring(html, parser)
+    except ValueError:
+        # Strings with an XML encoding declaration must be parsed as bytes
+        parser = etree.HTMLParser(remove_comments=True, remove_pis=True, encoding="utf-8")
+        return etree.fromstring(html.encode("utf-8"), parser)
+
+
+def _drop(el):
+    """Remove an element and its subtree, keeping the text that follows it."""
+    parent = el.getparent()
+    if parent is None:
+        return
+    if el.tail:
+        previous = el.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + el.tail
+        else:
+            parent.text = (parent.text or "") + el.tail
+    parent.remove(el)
+
+
+def _text_content(el) -> str:
+    return " ".join("".join(el.itertext()).split())
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace within lines and drop empty lines."""
+    lines = (" ".join(line.split()) for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _strip_non_content(body):
+    """Remove scripts, styles, navigation landmarks, hidden elements and comments."""
+    etree.strip_elements(body, *NON_CONTENT_TAGS, with_tail=False)
+    # Attribute checks in Python are much cheaper than string predicates in the XPath
+    for el in body.xpath(".//*[@hidden or @aria-hidden or @role or @style]"):
+        if (
+            el.get("hidden") is not None
+            or el.get("aria-hidden") == "true"
+            or el.get("role") in NON_CONTENT_ROLES
+            or "display:none" in el.get("style", "").replace(" ", "").lower()
+        ):
+            _drop(el)
+    # A page-level header is navigation; a header inside an article holds its title
+    for el in body.xpath(".//header[not(ancestor::article or ancestor::main)]"):
+        _drop(el)
+
+
+def _measure(root) -> Dict[object, Stats]:
+    """Compute text length, link text length and tag count for every element, in one bottom-up pass."""
+    stats: Dict[object, Stats] = {}
+    # Reversed document order visits every element after all of its descendants
+    for el in reversed(list(root.iter(etree.Element))):
+        text_len = len(el.text.strip()) if el.text else 0
+        link_len = 0
+        tags = 1
+        for child in el:
+            if child.tail:
+                text_len += len(child.tail.strip())
+            child_stats = stats.get(child)
+            if child_stats:
+                text_len += child_stats[0]
+                link_len += child_stats[1]
+                tags += child_stats[2]
+        if el.tag == "a":
+            link_len = text_len
+        stats[el] = (text_len, link_len, tags)
+    return stats
+
+
+def _is_boilerplate(el, stats: Stats) -> bool:
+    """Decide from text density and link density whether a container is boilerplate."""
+    text_len, link_len, tags = stats
+    if text_len == 0:
+        return True
+
+    link_density = link_len / text_len
+    if link_density > LINK_DENSITY_MAX:
+        return True
+
+    if tags >= SPARSE_MIN_TAGS and text_len / tags < SPARSE_MAX_DENSITY:
+        return True
+
+    names = f"{el.get('class', '')} {el.get('id', '')}"
+    if names.strip() and BOILERPLATE_RE.search(names):
+        return link_density > BOILERPLATE_LINK_DENSITY_MAX or text_len < BOILERPLATE_MIN_CHARS
+
+    return False
+
+
+def _prune(root, stats: Dict[object, Stats]):
+    """Drop boilerplate containers top-down, so a kept block's boilerplate children are still checked."""
+    stack = [root]
+    while stack:
+        el = stack.pop()
+        for child in list(el):
+            if child.tag in CONTAINER_TAGS and _is_boilerplate(child, stats[child]):
+                _drop(child)
+            else:
+                stack.append(child)
+
+
+def _content_root(body, stats: Dict[object, Stats]):
+    """Pick the main content element: the largest main/article if it holds enough of the page, else body."""
+    candidates = body.xpath(".//main | .//article | .//*[@role='main']")
+    if not candidates:
+        return body
+    best = max(candidates, key=lambda el: stats[el][0])
+    # A small <article> (e.g. a teaser card) is not the page content
+    if stats[best][0] >= 0.3 * stats[body][0]:
+        return best
+    return body
+
+
+def _sections(content) -> List[Dict]:
+    """Walk the content tree and split its text into sections at headings."""
+    sections = []
+    current = {"heading": "", "level": 0, "parts": []}
+
+    def flush():
+        text = _normalize("".join(current["parts"]))
+        if text or current["heading"]:
+            sections.append({"heading": current["heading"], "level": current["level"], "text": text})
+
+    walker = etree.iterwalk(content, events=("start", "end"))
+    for event, el in walker:
+        tag = el.tag
+
+        if event == "start":
+            if tag in HEADING_TAGS:
+                flush()
+                heading = _text_content(el)[:MAX_HEADING_CHARS]
+                current = {"heading": heading, "level": HEADING_TAGS[tag], "parts": []}
+                walker.skip_subtree()
+                continue
+            if tag in BLOCK_TAGS:
+                current["parts"].append("\n")
+            if el.text:
+                current["parts"].append(el.text)
+        else:
+            if tag in BLOCK_TAGS or tag == "br":
+                current["parts"].append("\n")
+            elif tag in CELL_TAGS:
+                current["parts"].append(" ")
+            if el.tail and el is not content:
+                current["parts"].append(el.tail)
+
+    flush()
+    return sections
+
+
+def _extract_html(html: str, url: str) -> Dict:
+    """
+    Extract title, description, links and sectioned text from a page (may run in a worker process).
+
+    Non-content elements are removed, then containers are pruned by link
+    density, text density and boilerplate class names. Text is collected
+    from the main content element and split into sections at h1-h6.
+    """
+    root = _parse(html)
+    if root is None:
+        return {"title": "", "description": "", "text": "", "links": [], "sections": []}
+
+    title_el = root.find(".//title")
+    title = _text_content(title_el) if title_el is not None else ""
+
+    descriptions = root.xpath(
+        "//meta[@name='description' or @name='Description' or @property='og:description']/@content"
+    )
+    description = descriptions[0].strip() if descriptions else ""
+
+    base = root.xpath("//base/@href")
+    base_url = urljoin(url, base[0].strip()) if base else url
+    links = []
+    # Pages repeat the same links in menus and footers; resolve each href once
+    for href in dict.fromkeys(href.strip() for href in root.xpath("//a/@href")):
+        if not href or href.startswith(("#", "javascript:", "mailto:", "tel:")):
+            continue
+        absolute_url = urljoin(base_url, href)
+        if absolute_url.startswith("http"):
+            links.append(absolute_url)
+
+    body = root.find("body")
+    if body is None:
+        return {"title": title, "description": description, "text": "", "links": links, "sections": []}
+
+    _strip_non_content(body)
+    stats = _measure(body)
+    content = _content_root(body, stats)
+    _prune(content, stats)
+    sections = _sections(content)
+
+    if sum(len(section["text"]) for section in sections) < MIN_CONTENT_CHARS:
+        # Density pruning removed too much (e.g. a page that is mostly links); skip it
+        body = _parse(html).find("body")
+        _strip_non_content(body)
+        fallback = _sections(_content_root(body, _measure(body)))
+        if sum(len(section["text"]) for section in fallback) > sum(len(section["text"]) for section in sections):
+            sections = fallback
+
+    text = "\n".join(
+        "\n".join(part for part in (section["heading"], section["text"]) if part)
+        for section in sections
+    )
+
+    return {"title": title, "description": description, "text": text, "links": links, "sections": sections}
+
+
+def chunk_text(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Split text into chunks of at most max_chars, breaking on line boundaries.
+
+    Args:
+        text: Text to split
+        max_chars: Chunk size (defaults to settings.crawl_chunk_chars)
+
+    Returns:
+        List of non-empty chunks in order
+    """
+    max_chars = max_chars or settings.crawl_chunk_chars
+    chunks = []
+    current = []
+    current_length = 0
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        # Hard-split lines that are longer than a whole chunk
+        pieces = [line[i:i + max_chars] for i in range(0, len(line), max_chars)]
+        for piece in pieces:
+            if current and current_length + len(piece) + 1 > max_chars:
+                chunks.append("\n".join(current))
+                current = []
+                current_length = 0
+            current.append(piece)
+            current_length += len(piece) + 1
+
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def chunk_sections(sections: List[Dict], max_chars: Optional[int] = None) -> List[str]:
+    """
+    Group sections into chunks of at most max_chars without splitting a section across chunks.
+
+    Small consecutive sections share a chunk. A section longer than a chunk
+    is split on line boundaries, and every piece repeats its heading.
+
+    Args:
+        sections: Sections produced by HTMLExtractor
+        max_chars: Chunk size (defaults to settings.crawl_chunk_chars)
+
+    Returns:
+        List of non-empty chunks in order
+    """
+    max_chars = max_chars or settings.crawl_chunk_chars
+    chunks = []
+    current = []
+    current_length = 0
+
+    def flush():
+        nonlocal current, current_length
+        if current:
+            chunks.append("\n\n".join(current))
+        current = []
+        current_length = 0
+
+    for section in sections:
+        heading = section["heading"]
+        block = "\n".join(part for part in (heading, section["text"]) if part)
+        if not block:
+            continue
+
+        if len(block) > max_chars:
+            flush()
+            piece_chars = max(max_chars - len(heading) - 1, max_chars // 2)
+            for piece in chunk_text(section["text"], piece_chars):
+                chunks.append(f"{heading}\n{piece}" if heading else piece)
+            continue
+
+        if current and current_length + len(block) + 2 > max_chars:
+            flush()
+        current.append(block)
+        current_length += len(block) + 2
+
+    flush()
+    return chunks
+
+
+class HTMLExtractor:
+    """Service for extracting content from HTML pages."""
+
+    @staticmethod
+    async def extract(html: str, url: str) -> Dict:
+        """
+        Extract a page's content without blocking the event loop.
+
+        Pages up to settings.html_offload_min_kb are parsed in a thread;
+        larger ones go to the shared extraction process pool so they do not
+        hold the GIL against request handling.
+
+        Args:
+            html: Page HTML
+            url: Page URL, used to resolve relative links
+
+        Returns:
+            Dictionary with title, description, text, absolute http(s)
+            links and sections (heading, level, text)
+        """
+        if len(html) >= settings.html_offload_min_kb * 1024:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(get_process_pool(), _extract_html, html, url)
+        return await asyncio.to_thread(_extract_html, html, url)
@@ -0,0 +1,211 @@
+"""
+Async HTTP Fetcher
+Shared, connection-pooled HTTP client for website and Facebook ingestion.
+"""
+
+import asyncio
+import codecs
+import logging
+import re
+from typing import Dict, Mapping, Optional
+
+import aiohttp
+from multidict import CIMultiDict
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+READ_CHUNK_SIZE = 64 * 1024
+# Non-text/* media types whose bodies are text (robots.txt, sitemaps and feeds included)
+TEXT_CONTENT_TYPES = ("application/xhtml+xml", "application/xml", "application/json", "application/rss+xml",
+                      "application/atom+xml")
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([A-Za-z0-9_\-]+)', re.I)
+
+
+class FetchError(Exception):
+    """Raised when a URL cannot be fetched or its response is rejected."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class UnsupportedContentError(FetchError):
+    """Raised for a response whose content type is not text, before its body is read."""
+
+
+def is_text_content_type(content_type: str) -> bool:
+    """Whether a media type (without parameters) has a text body."""
+    return (
+        content_type.startswith("text/")
+        or content_type in TEXT_CONTENT_TYPES
+        or content_type.endswith(("+xml", "+json"))
+    )
+
+
+class FetchResult:
+    """Decoded response of a fetch."""
+
+    def __init__(self, url: str, status: int, headers: Mapping[str, str], text: str, size: int):
+        self.url = url  # Final URL after redirects
+        self.status = status
+        self.headers = CIMultiDict(headers)
+        self.text = text
+        self.size = size  # Bytes received (after content decoding)
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+    @property
+    def not_modified(self) -> bool:
+        """True for a 304 answer to a conditional request (the body is empty)."""
+        return self.status == 304
+
+
+def _sniff_charset(head: bytes) -> Optional[str]:
+    """Find a <meta charset> declaration in the first bytes of an HTML document."""
+    match = META_CHARSET_RE.search(head)
+    if not match:
+        return None
+    charset = match.group(1).decode("ascii", errors="ignore")
+    try:
+        codecs.lookup(charset)
+        return charset
+    except LookupError:
+        return None
+
+
+class HTTPFetcher:
+    """
+    Shared asynchronous HTTP client.
+
+    One aiohttp session is reused for every fetch, giving a keep-alive
+    connection pool, a per-host connection limit and a DNS cache. Bodies are
+    read and decoded incrementally and aborted once they pass the size cap;
+    responses that declare a non-text content type are rejected unread.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session, creating it on first use in the running loop."""
+        if self._session is None or self._session.closed:
+            async with self._lock:
+                if self._session is None or self._session.closed:
+                    connector = aiohttp.TCPConnector(
+                        limit=settings.http_pool_size,
+                        limit_per_host=settings.http_per_host_limit,
+                        ttl_dns_cache=settings.http_dns_cache_seconds,
+                        keepalive_timeout=30,
+                    )
+                    self._session = aiohttp.ClientSession(
+                        connector=connector,
+                        timeout=aiohttp.ClientTimeout(
+                            total=settings.http_timeout_seconds,
+                            connect=settings.http_connect_timeout_seconds,
+                        ),
+                        headers=DEFAULT_HEADERS,
+                    )
+        return self._session
+
+    async def fetch(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_bytes: Optional[int] = None,
+    ) -> FetchResult:
+        """
+        Fetch a URL and decode its body as text.
+
+        A 304 Not Modified answer to a conditional request (If-None-Match /
+        If-Modified-Since in headers) is returned as a result with an empty
+        body rather than an error.
+
+        Args:
+            url: URL to fetch
+            headers: Extra request headers
+            max_bytes: Body size cap (defaults to settings.http_max_response_mb)
+
+        Returns:
+            FetchResult with the decoded body
+
+        Raises:
+            UnsupportedContentError: The response declares a non-text content type
+            FetchError: Network error, timeout, HTTP error status or oversized body
+        """
+        max_bytes = max_bytes or settings.http_max_response_mb * 1024 * 1024
+        session = await self._get_session()
+
+        try:
+            async with session.get(url, headers=headers, allow_redirects=True) as response:
+                if response.status >= 400:
+                    raise FetchError(f"HTTP {response.status} for {url}", status=response.status)
+
+                content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if content_type and not is_text_content_type(content_type):
+                    raise UnsupportedContentError(f"Unsupported content type {content_type} for {url}",
+                                                  status=response.status)
+
+                if response.content_length and response.content_length > max_bytes:
+                    raise FetchError(f"Response too large ({response.content_length} bytes)", status=response.status)
+
+                text, size = await self._read_text(response, max_bytes)
+
+                return FetchResult(
+                    url=str(response.url),
+                    status=response.status,
+                    headers=response.headers,
+                    text=text,
+                    size=size,
+                )
+        except asyncio.TimeoutError:
+            raise FetchError(f"Timed out fetching {url}")
+        except aiohttp.ClientError as e:
+            raise FetchError(f"Failed to fetch {url}: {str(e)}")
+
+    async def _read_text(self, response: aiohttp.ClientResponse, max_bytes: int) -> tuple[str, int]:
+        """Stream and incrementally decode a response body, enforcing the size cap."""
+        decoder = None
+        parts = []
+        size = 0
+
+        async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise FetchError(f"Response exceeded {max_bytes} bytes", status=response.status)
+
+            if decoder is None:
+                charset = response.charset or _sniff_charset(chunk[:4096]) or "utf-8"
+                try:
+                    decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+                except LookupError:
+                    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+            parts.append(decoder.decode(chunk))
+
+        if decoder is not None:
+            parts.append(decoder.decode(b"", final=True))
+
+        return "".join(parts), size
+
+    async def close(self):
+        """Close the shared session and its connection pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# Global fetcher instance
+http_fetcher = HTTPFetcher()
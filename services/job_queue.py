@@ -0,0 +1,414 @@
+"""
+Background Job Queue
+Persistent job table with lease-based claiming and an asyncio worker pool.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.database import SessionLocal
+from models.job import Job, JobType, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Job priorities (higher runs first)
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 0
+
+JobHandler = Callable[[Job, Session], Awaitable[None]]
+
+
+class JobError(Exception):
+    """Raised by job handlers to fail a job, optionally without retrying."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class JobDeferred(Exception):
+    """Raised by job handlers to run a job again later without using up an attempt."""
+
+    def __init__(self, message: str, delay_seconds: float):
+        super().__init__(message)
+        self.delay_seconds = delay_seconds
+
+
+class JobQueue:
+    """Database operations for enqueueing, claiming and finishing jobs."""
+
+    @staticmethod
+    def enqueue(
+        db: Session,
+        job_type: JobType,
+        company_id: int,
+        resource_id: Optional[int] = None,
+        payload: Optional[dict] = None,
+        priority: int = PRIORITY_NORMAL,
+        max_attempts: Optional[int] = None,
+    ) -> Job:
+        """
+        Add a job to the queue.
+
+        A resource job that is already queued or running is reused instead of
+        creating a duplicate; its priority is raised if the new one is higher.
+
+        Args:
+            db: Database session
+            job_type: Type of job to run
+            company_id: Owning company (used for per-company concurrency caps)
+            resource_id: Resource the job operates on, if any
+            payload: JSON-serializable handler arguments
+            priority: Higher priorities are claimed first
+            max_attempts: Attempts before the job is marked FAILED
+
+        Returns:
+            The queued Job
+        """
+        if resource_id is not None:
+            existing = db.query(Job).filter(
+                Job.job_type == job_type,
+                Job.resource_id == resource_id,
+                Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+            ).first()
+            if existing:
+                if priority > existing.priority:
+                    existing.priority = priority
+                    db.commit()
+                return existing
+
+        job = Job(
+            job_type=job_type,
+            company_id=company_id,
+            resource_id=resource_id,
+            payload=json.dumps(payload) if payload else None,
+            status=JobStatus.QUEUED,
+            priority=priority,
+            max_attempts=max_attempts or settings.job_max_attempts,
+            run_after=datetime.utcnow(),
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        job_worker_pool.notify()
+        return job
+
+    @staticmethod
+    def claim_next(db: Session, worker_id: str) -> Optional[Job]:
+        """
+        Claim the next runnable job by taking a lease on it.
+
+        Jobs are ordered by priority then age. Companies already running
+        `job_per_company_concurrency` jobs are skipped. The claim is a
+        conditional UPDATE, so concurrent workers (even in other processes)
+        can never hold the same job.
+
+        Returns:
+            The claimed Job, or None if nothing is runnable
+        """
+        now = datetime.utcnow()
+
+        running = dict(
+            db.query(Job.company_id, func.count(Job.id)).filter(
+                Job.status == JobStatus.RUNNING,
+                Job.lease_expires_at >= now
+            ).group_by(Job.company_id).all()
+        )
+
+        candidates = db.query(Job.id, Job.company_id).filter(
+            Job.status == JobStatus.QUEUED,
+            Job.run_after <= now
+        ).order_by(Job.priority.desc(), Job.run_after, Job.id).limit(20).all()
+
+        for job_id, company_id in candidates:
+            if running.get(company_id, 0) >= settings.job_per_company_concurrency:
+                continue
+
+            claimed = db.query(Job).filter(
+                Job.id == job_id,
+                Job.status == JobStatus.QUEUED
+            ).update({
+                Job.status: JobStatus.RUNNING,
+                Job.lease_owner: worker_id,
+                Job.lease_expires_at: now + timedelta(seconds=settings.job_lease_seconds),
+                Job.heartbeat_at: now,
+                Job.started_at: now,
+                Job.attempts: Job.attempts + 1,
+                Job.progress_current: 0,
+                Job.progress_total: None,
+            }, synchronize_session=False)
+            db.commit()
+
+            if claimed:
+                return db.query(Job).filter(Job.id == job_id).first()
+
+        return None
+
+    @staticmethod
+    def heartbeat(db: Session, job_id: int, worker_id: str) -> bool:
+        """
+        Extend the lease on a running job.
+
+        Returns:
+            False if the lease was lost (expired and recovered by another worker)
+        """
+        now = datetime.utcnow()
+        extended = db.query(Job).filter(
+            Job.id == job_id,
+            Job.status == JobStatus.RUNNING,
+            Job.lease_owner == worker_id
+        ).update({
+            Job.heartbeat_at: now,
+            Job.lease_expires_at: now + timedelta(seconds=settings.job_lease_seconds),
+        }, synchronize_session=False)
+        db.commit()
+        return bool(extended)
+
+    @staticmethod
+    def update_progress(db: Session, job_id: int, current: int, total: Optional[int] = None):
+        """Record handler progress on a running job."""
+        db.query(Job).filter(Job.id == job_id).update({
+            Job.progress_current: current,
+            Job.progress_total: total,
+        }, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def complete(db: Session, job: Job, worker_id: str):
+        """Mark a job as succeeded and release its lease."""
+        db.query(Job).filter(
+            Job.id == job.id,
+            Job.lease_owner == worker_id
+        ).update({
+            Job.status: JobStatus.SUCCEEDED,
+            Job.lease_owner: None,
+            Job.lease_expires_at: None,
+            Job.finished_at: datetime.utcnow(),
+            Job.last_error: None,
+        }, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def fail(db: Session, job: Job, worker_id: str, error: str, retryable: bool = True) -> bool:
+        """
+        Record a failed attempt, scheduling a retry with backoff if allowed.
+
+        Returns:
+            True if the job was requeued for another attempt
+        """
+        now = datetime.utcnow()
+        will_retry = retryable and job.attempts < job.max_attempts
+
+        values = {
+            Job.lease_owner: None,
+            Job.lease_expires_at: None,
+            Job.last_error: error,
+        }
+        if will_retry:
+            values[Job.status] = JobStatus.QUEUED
+            values[Job.run_after] = now + JobQueue.retry_delay(job.attempts)
+        else:
+            values[Job.status] = JobStatus.FAILED
+            values[Job.finished_at] = now
+
+        db.query(Job).filter(
+            Job.id == job.id,
+            Job.lease_owner == worker_id
+        ).update(values, synchronize_session=False)
+        db.commit()
+        return will_retry
+
+    @staticmethod
+    def defer(db: Session, job: Job, worker_id: str, delay_seconds: float, reason: str):
+        """Requeue a job to run after a delay, giving back the attempt it claimed."""
+        db.query(Job).filter(
+            Job.id == job.id,
+            Job.lease_owner == worker_id
+        ).update({
+            Job.status: JobStatus.QUEUED,
+            Job.attempts: Job.attempts - 1,
+            Job.run_after: datetime.utcnow() + timedelta(seconds=delay_seconds),
+            Job.lease_owner: None,
+            Job.lease_expires_at: None,
+            Job.last_error: reason,
+        }, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def retry_delay(attempts: int) -> timedelta:
+        """Exponential backoff with full jitter, capped at one hour."""
+        ceiling = min(settings.job_retry_backoff_seconds * (2 ** max(attempts - 1, 0)), 3600)
+        return timedelta(seconds=random.uniform(0, ceiling))
+
+    @staticmethod
+    def recover_expired(db: Session) -> int:
+        """
+        Requeue running jobs whose lease expired (worker crashed or restarted).
+
+        Jobs that have used all their attempts are marked FAILED instead.
+
+        Returns:
+            Number of jobs recovered
+        """
+        now = datetime.utcnow()
+        stuck = db.query(Job).filter(
+            Job.status == JobStatus.RUNNING,
+            or_(Job.lease_expires_at == None, Job.lease_expires_at < now)
+        ).all()
+
+        for job in stuck:
+            logger.warning(f"Recovering job {job.id} from expired lease held by {job.lease_owner}")
+            job.lease_owner = None
+            job.lease_expires_at = None
+            job.last_error = "Lease expired before the job finished"
+            if job.attempts < job.max_attempts:
+                job.status = JobStatus.QUEUED
+                job.run_after = now + JobQueue.retry_delay(job.attempts)
+            else:
+                job.status = JobStatus.FAILED
+                job.finished_at = now
+
+        if stuck:
+            db.commit()
+        return len(stuck)
+
+
+class JobWorkerPool:
+    """Pool of asyncio workers that claim and run queued jobs."""
+
+    def __init__(self):
+        self._handlers: Dict[JobType, JobHandler] = {}
+        self._tasks: list = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def register(self, job_type: JobType, handler: JobHandler):
+        """Register the coroutine that runs jobs of a given type."""
+        self._handlers[job_type] = handler
+
+    def notify(self):
+        """Wake idle workers after a job was enqueued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self, workers: Optional[int] = None):
+        """Start worker and lease-recovery tasks."""
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        count = workers or settings.job_workers
+
+        self._tasks = [
+            asyncio.create_task(self._worker(f"{self._worker_prefix}:{n}"))
+            for n in range(count)
+        ]
+        self._tasks.append(asyncio.create_task(self._recovery_loop()))
+        logger.info(f"Started {count} job workers")
+
+    async def stop(self):
+        """Stop all workers. Running jobs keep their lease and are recovered later."""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, worker_id: str):
+        """Claim and run jobs until stopped."""
+        while not self._stopping:
+            db = SessionLocal()
+            try:
+                job = JobQueue.claim_next(db, worker_id)
+                if job is None:
+                    await self._wait_for_work()
+                    continue
+                await self._run_job(job, worker_id, db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} error: {str(e)}")
+                await asyncio.sleep(settings.job_poll_interval_seconds)
+            finally:
+                db.close()
+
+    async def _wait_for_work(self):
+        """Sleep until a job is enqueued or the poll interval passes."""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=settings.job_poll_interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_job(self, job: Job, worker_id: str, db: Session):
+        """Run a claimed job while heartbeating its lease."""
+        handler = self._handlers.get(job.job_type)
+        if handler is None:
+            JobQueue.fail(db, job, worker_id, f"No handler registered for {job.job_type.value}", retryable=False)
+            return
+
+        logger.info(f"Worker {worker_id} running job {job.id} ({job.job_type.value}, attempt {job.attempts})")
+        heartbeat = asyncio.create_task(self._heartbeat(job.id, worker_id))
+        try:
+            await handler(job, db)
+        except asyncio.CancelledError:
+            raise
+        except JobDeferred as e:
+            JobQueue.defer(db, job, worker_id, e.delay_seconds, str(e))
+            logger.info(f"Job {job.id} deferred for {e.delay_seconds}s: {str(e)}")
+        except JobError as e:
+            retried = JobQueue.fail(db, job, worker_id, str(e), retryable=e.retryable)
+            logger.warning(f"Job {job.id} failed ({'retrying' if retried else 'giving up'}): {str(e)}")
+        except Exception as e:
+            db.rollback()
+            retried = JobQueue.fail(db, job, worker_id, f"Unexpected error: {str(e)}")
+            logger.error(f"Job {job.id} crashed ({'retrying' if retried else 'giving up'}): {str(e)}")
+        else:
+            JobQueue.complete(db, job, worker_id)
+            logger.info(f"Job {job.id} succeeded")
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: int, worker_id: str):
+        """Periodically extend the lease of a running job."""
+        interval = max(settings.job_lease_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            db = SessionLocal()
+            try:
+                if not JobQueue.heartbeat(db, job_id, worker_id):
+                    logger.warning(f"Worker {worker_id} lost the lease on job {job_id}")
+                    return
+            except Exception as e:
+                logger.error(f"Heartbeat failed for job {job_id}: {str(e)}")
+            finally:
+                db.close()
+
+    async def _recovery_loop(self):
+        """Periodically requeue jobs whose workers stopped heartbeating."""
+        while not self._stopping:
+            db = SessionLocal()
+            try:
+                recovered = JobQueue.recover_expired(db)
+                if recovered:
+                    self.notify()
+            except Exception as e:
+                logger.error(f"Job recovery failed: {str(e)}")
+            finally:
+                db.close()
+            await asyncio.sleep(settings.job_lease_seconds / 2)
+
+
+# Global worker pool instance
+job_worker_pool = JobWorkerPool()
@@ -5,142 +5,249 @@ Extracts text content from PDF files.
 
 import PyPDF2
 import pdfplumber
+from pdfminer.pdftypes import resolve1
+import asyncio
+import hashlib
 import logging
-from typing import Optional
+from contextlib import ExitStack
+from typing import Optional, Callable, Dict, List
+
+from config import settings
+from utils.process_pool import get_process_pool
 
 logger = logging.getLogger(__name__)
 
+ProgressCallback = Callable[[int, int], None]
+PagesCallback = Callable[[List[dict]], None]
+
+
+def _read_document_info(file_path: str) -> dict:
+    """
+    Read page count and document metadata from the trailer (runs in a worker process).
+
+    Only the cross-reference table and info dictionary are read here; page
+    content is parsed once, by the range workers.
+    """
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        metadata = pdf_reader.metadata or {}
+
+        return {
+            "pages": len(pdf_reader.pages),
+            "title": metadata.get("/Title", ""),
+            "author": metadata.get("/Author", ""),
+            "subject": metadata.get("/Subject", ""),
+            "creator": metadata.get("/Creator", ""),
+            "producer": metadata.get("/Producer", ""),
+        }
+
+
+def _format_table(table: list) -> str:
+    """Convert an extracted table to a tab-separated text block."""
+    return "\n".join(["\t".join([str(cell) if cell else "" for cell in row]) for row in table])
+
+
+def _page_source_hash(page) -> str:
+    """Hash a page's raw content streams and geometry, without decoding them."""
+    digest = hashlib.sha256()
+    digest.update(repr((page.page_obj.mediabox, page.page_obj.rotate)).encode())
+    for stream in page.page_obj.contents:
+        stream = resolve1(stream)
+        rawdata = getattr(stream, "rawdata", None)
+        if rawdata:
+            digest.update(rawdata)
+    return digest.hexdigest()
+
+
+def _parse_page_range(file_path: str, start: int, end: int, known_hashes: Dict[int, str]) -> List[dict]:
+    """
+    Extract text and tables from pages [start, end) in a single pdfplumber pass.
+
+    Runs in a worker process. Pages whose source hash matches `known_hashes`
+    are skipped. Pages where pdfplumber finds no text fall back to PyPDF2 for
+    that page only; its reader is opened once per range, on the first such
+    page, over the open file rather than a path (which PyPDF2 would read
+    into memory whole). Each page's layout cache is flushed once it has been
+    read so memory stays proportional to one page, not the whole range.
+
+    Returns:
+        One dict per page with page_number, content, table_count,
+        source_hash, extractor and skipped
+    """
+    pages = []
+    fallback_reader = None
+
+    with ExitStack() as stack:
+        pdf = stack.enter_context(pdfplumber.open(file_path, pages=list(range(start + 1, end + 1))))
+        for page in pdf.pages:
+            source_hash = _page_source_hash(page)
+
+            if known_hashes.get(page.page_number) == source_hash:
+                pages.append({
+                    "page_number": page.page_number,
+                    "content": None,
+                    "table_count": 0,
+                    "source_hash": source_hash,
+                    "extractor": None,
+                    "skipped": True,
+                })
+                page.flush_cache()
+                continue
+
+            text_content = []
+            extractor = "pdfplumber"
+
+            text = page.extract_text()
+            if not text or not text.strip():
+                # Fall back to PyPDF2 for this page only
+                if fallback_reader is None:
+                    fallback_reader = PyPDF2.PdfReader(stack.enter_context(open(file_path, 'rb')))
+                text = fallback_reader.pages[page.page_number - 1].extract_text()
+                extractor = "pypdf2"
+            if text and text.strip():
+                text_content.append(text)
+
+            # Also extract tables
+            tables = page.extract_tables()
+            for table in tables:
+                table_text = _format_table(table)
+                if table_text:
+                    text_content.append(f"\n[TABLE]\n{table_text}\n[/TABLE]\n")
+
+            pages.append({
+                "page_number": page.page_number,
+                "content": "\n\n".join(text_content),
+                "table_count": len(tables),
+                "source_hash": source_hash,
+                "extractor": extractor,
+                "skipped": False,
+            })
+            page.flush_cache()
+
+    return pages
+
 
 class PDFProcessor:
     """Service for processing PDF files and extracting content."""
-    
-    @staticmethod
-    async def extract_text_pypdf2(file_path: str) -> Optional[str]:
-        """
-        Extract text from PDF using PyPDF2.
-        
-        Args:
-            file_path: Path to the PDF file
-            
-        Returns:
-            Extracted text content or None if failed
-        """
-        try:
-            text_content = []
-            
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
-                
-                logger.info(f"Extracting text from {total_pages} pages using PyPDF2")
-                
-                for page_num in range(total_pages):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    if text:
-                        text_content.append(text)
-                
-                return "\n\n".join(text_content)
-                
-        except Exception as e:
-            logger.error(f"PyPDF2 extraction failed: {str(e)}")
-            return None
-    
-    @staticmethod
-    async def extract_text_pdfplumber(file_path: str) -> Optional[str]:
-        """
-        Extract text from PDF using pdfplumber (more accurate for tables).
-        
-        Args:
-            file_path: Path to the PDF file
-            
-        Returns:
-            Extracted text content or None if failed
-        """
-        try:
-            text_content = []
-            
-            with pdfplumber.open(file_path) as pdf:
-                total_pages = len(pdf.pages)
-                logger.info(f"Extracting text from {total_pages} pages using pdfplumber")
-                
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        text_content.append(text)
-                    
-                    # Also extract tables
-                    tables = page.extract_tables()
-                    for table in tables:
-                        # Convert table to text representation
-                        table_text = "\n".join(["\t".join([str(cell) if cell else "" for cell in row]) for row in table])
-                        if table_text:
-                            text_content.append(f"\n[TABLE]\n{table_text}\n[/TABLE]\n")
-                
-                return "\n\n".join(text_content)
-                
-        except Exception as e:
-            logger.error(f"pdfplumber extraction failed: {str(e)}")
-            return None
-    
+
     @staticmethod
-    async def extract_text(file_path: str) -> tuple[Optional[str], Optional[str]]:
+    async def parse(
+        file_path: str,
+        on_pages: Optional[PagesCallback] = None,
+        known_hashes: Optional[Dict[int, str]] = None,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> tuple[Optional[dict], Optional[str]]:
         """
-        Extract text from PDF using both methods and return the best result.
-        
+        Parse a PDF once, returning metadata and streaming per-page text.
+
+        Page ranges are parsed in parallel in the shared process pool. Each
+        finished range is handed to `on_pages` straight away and not kept, so
+        peak memory is bounded by the ranges in flight, not the document size.
+
         Args:
             file_path: Path to the PDF file
-            
+            on_pages: Called with the page dicts of each finished range
+            known_hashes: {page_number: source_hash} of pages already stored;
+                matching pages are skipped and reported with skipped=True
+            progress_callback: Called with (pages_done, total_pages) as ranges finish
+
         Returns:
-            Tuple of (extracted_text, error_message)
+            Tuple of (metadata, error_message). Metadata includes page, table,
+            character and skipped-page counts.
         """
         try:
-            # Try pdfplumber first (better for complex layouts)
             logger.info(f"Starting PDF extraction for: {file_path}")
-            text = await PDFProcessor.extract_text_pdfplumber(file_path)
-            
-            # If pdfplumber fails or returns empty, try PyPDF2
-            if not text or len(text.strip()) < 100:
-                logger.info("pdfplumber extraction insufficient, trying PyPDF2")
-                text = await PDFProcessor.extract_text_pypdf2(file_path)
-            
-            if text and len(text.strip()) > 0:
-                logger.info(f"Successfully extracted {len(text)} characters")
-                return text, None
-            else:
+            loop = asyncio.get_running_loop()
+            pool = get_process_pool()
+            known_hashes = known_hashes or {}
+
+            metadata = await loop.run_in_executor(pool, _read_document_info, file_path)
+            total_pages = metadata["pages"]
+            logger.info(f"Extracting text from {total_pages} pages")
+
+            chunk_size = max(settings.pdf_pages_per_chunk, 1)
+            ranges = [
+                (start, min(start + chunk_size, total_pages))
+                for start in range(0, total_pages, chunk_size)
+            ]
+
+            # Limit how many workers a single document may occupy
+            limiter = asyncio.Semaphore(max(settings.pdf_max_workers_per_job, 1))
+            stats = {"pages_done": 0, "tables": 0, "characters": 0, "pages_skipped": 0}
+
+            async def parse_range(start: int, end: int):
+                range_hashes = {
+                    number: known_hashes[number]
+                    for number in range(start + 1, end + 1)
+                    if number in known_hashes
+                }
+                async with limiter:
+                    pages = await loop.run_in_executor(
+                        pool, _parse_page_range, file_path, start, end, range_hashes
+                    )
+
+                for page in pages:
+                    if page["skipped"]:
+                        stats["pages_skipped"] += 1
+                    else:
+                        stats["tables"] += page["table_count"]
+                        stats["characters"] += len(page["content"].strip())
+                if on_pages:
+                    on_pages(pages)
+
+                stats["pages_done"] += end - start
+                if progress_callback:
+                    progress_callback(stats["pages_done"], total_pages)
+
+            await asyncio.gather(*(parse_range(start, end) for start, end in ranges))
+
+            metadata["tables"] = stats["tables"]
+            metadata["pages_skipped"] = stats["pages_skipped"]
+
+            if stats["characters"] == 0 and stats["pages_skipped"] == 0:
                 error_msg = "No text content could be extracted from PDF"
                 logger.error(error_msg)
                 return None, error_msg
-                
+
+            logger.info(
+                f"Extracted {stats['characters']} characters from {total_pages - stats['pages_skipped']} pages "
+                f"({stats['pages_skipped']} unchanged pages skipped)"
+            )
+            return metadata, None
+
         except Exception as e:
             error_msg = f"PDF processing error: {str(e)}"
             logger.error(error_msg)
             return None, error_msg
-    
+
     @staticmethod
-    def get_pdf_metadata(file_path: str) -> dict:
+    async def extract_text(
+        file_path: str,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> tuple[Optional[str], Optional[str]]:
         """
-        Get metadata from PDF file.
-        
+        Extract the full text of a PDF in memory.
+
+        Convenience wrapper around `parse` for callers that do not persist
+        pages; it holds the whole document text, so prefer `parse` for
+        large files.
+
         Args:
             file_path: Path to the PDF file
-            
+            progress_callback: Called with (pages_done, total_pages) during extraction
+
         Returns:
-            Dictionary containing metadata
+            Tuple of (extracted_text, error_message)
         """
-        try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                metadata = pdf_reader.metadata
-                
-                return {
-                    "pages": len(pdf_reader.pages),
-                    "title": metadata.get("/Title", ""),
-                    "author": metadata.get("/Author", ""),
-                    "subject": metadata.get("/Subject", ""),
-                    "creator": metadata.get("/Creator", ""),
-                    "producer": metadata.get("/Producer", ""),
-                }
-        except Exception as e:
-            logger.error(f"Failed to get PDF metadata: {str(e)}")
-            return {}
+        pages: Dict[int, str] = {}
+
+        def collect(batch: List[dict]):
+            for page in batch:
+                if page["content"]:
+                    pages[page["page_number"]] = page["content"]
+
+        metadata, error = await PDFProcessor.parse(file_path, on_pages=collect, progress_callback=progress_callback)
+        if error:
+            return None, error
+
+        return "\n\n".join(pages[number] for number in sorted(pages)), None
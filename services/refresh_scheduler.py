@@ -0,0 +1,93 @@
+"""
+Resource Refresh Scheduler
+Periodically queues incremental re-crawls of website resources that are due.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Resource, ResourceType, ResourceStatus, JobType
+from models.database import SessionLocal
+from services.job_queue import JobQueue, PRIORITY_LOW
+from services.resource_service import ResourceService
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+
+
+class RefreshScheduler:
+    """Background loop that enqueues scheduled website refreshes."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the scheduling loop."""
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop the scheduling loop."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @staticmethod
+    def enqueue_due(db: Session) -> int:
+        """
+        Queue a low-priority refresh job for every website resource that is due.
+
+        Each resource's next refresh is rescheduled (with jitter) as it is
+        queued, so a slow queue never enqueues the same refresh twice.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of resources queued
+        """
+        now = datetime.utcnow()
+        due = db.query(Resource).filter(
+            Resource.resource_type == ResourceType.WEBSITE,
+            Resource.is_active == 1,
+            Resource.status != ResourceStatus.PROCESSING,
+            Resource.next_refresh_at.isnot(None),
+            Resource.next_refresh_at <= now
+        ).order_by(Resource.next_refresh_at).limit(BATCH_SIZE).all()
+
+        for resource in due:
+            ResourceService.schedule_refresh(resource, now)
+            JobQueue.enqueue(
+                db,
+                JobType.PROCESS_RESOURCE,
+                company_id=resource.company_id,
+                resource_id=resource.id,
+                payload={"refresh": True},
+                priority=PRIORITY_LOW
+            )
+        db.commit()
+
+        if due:
+            logger.info(f"Queued {len(due)} scheduled website refreshes")
+        return len(due)
+
+    async def _loop(self):
+        while True:
+            db = SessionLocal()
+            try:
+                RefreshScheduler.enqueue_due(db)
+            except Exception as e:
+                logger.error(f"Refresh scheduling failed: {str(e)}")
+            finally:
+                db.close()
+            await asyncio.sleep(settings.refresh_check_interval_seconds)
+
+
+# Global scheduler instance
+refresh_scheduler = RefreshScheduler()
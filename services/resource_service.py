@@ -5,14 +5,23 @@ Handles resource processing and knowledge base management.
 
 import os
 import json
+import random
 import logging
-from datetime import datetime
-from typing import Optional, List
+from datetime import datetime, timedelta
+from typing import Optional, List, Callable, Dict, Tuple
 from sqlalchemy.orm import Session
 
-from models import Resource, ResourceType, ResourceStatus
+from models import Resource, ResourceType, ResourceStatus, Document, DocumentPage, Job, CrawledPage, ResourceChunk
+from models.resource import CONTENT_PREVIEW_CHARS
+from config import settings
+from services.document_store import DocumentStore
+from services.job_queue import JobQueue, JobDeferred, JobError
+from services.html_extractor import chunk_sections
 from services.pdf_processor import PDFProcessor
+from services.site_crawler import SiteCrawler
 from services.web_scraper import WebScraper
+from utils.blob_store import blob_store
+from utils.metrics import RESOURCE_STAGE_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +30,81 @@ class ResourceService:
     """Service for managing company resources and knowledge base."""
     
     @staticmethod
-    async def process_pdf_resource(resource: Resource, file_path: str, db: Session) -> bool:
+    async def process_resource_job(job: Job, db: Session) -> None:
+        """
+        Job handler that processes the resource attached to a job.
+        
+        Args:
+            job: Claimed PROCESS_RESOURCE job
+            db: Database session
+            
+        Raises:
+            JobError: If processing failed, so the worker can retry it
+            JobDeferred: If another job is extracting the same document
+        """
+        resource = db.query(Resource).filter(Resource.id == job.resource_id).first()
+        if not resource:
+            logger.info(f"Resource ID {job.resource_id} no longer exists, skipping job {job.id}")
+            return
+        
+        payload = json.loads(job.payload) if job.payload else {}
+        
+        def report_progress(done: int, total: int):
+            JobQueue.update_progress(db, job.id, done, total)
+        
+        if resource.resource_type == ResourceType.PDF:
+            document = resource.document
+            if document and document.status == ResourceStatus.PROCESSING:
+                stale_after = datetime.utcnow() - timedelta(seconds=settings.job_lease_seconds)
+                if document.updated_at and document.updated_at > stale_after:
+                    # Another job is extracting the same file; link to its result once it is done
+                    resource.status = ResourceStatus.PENDING
+                    db.commit()
+                    raise JobDeferred(
+                        "Document is being extracted by another job",
+                        delay_seconds=settings.job_retry_backoff_seconds
+                    )
+        elif resource.resource_type not in (ResourceType.WEBSITE, ResourceType.FACEBOOK):
+            return
+        
+        with RESOURCE_STAGE_SECONDS.labels(resource.resource_type.value, "total").time():
+            if resource.resource_type == ResourceType.PDF:
+                success = await ResourceService.process_pdf_resource(
+                    resource, resource.file_path, db, progress_callback=report_progress
+                )
+            elif resource.resource_type == ResourceType.WEBSITE:
+                success = await ResourceService.process_website_resource(
+                    resource, db, progress_callback=report_progress, refresh=payload.get("refresh", False)
+                )
+            else:
+                success = await ResourceService.process_facebook_resource(resource, db)
+        
+        if not success:
+            # Keep the resource pending while the job still has attempts left
+            if job.attempts < job.max_attempts:
+                resource.status = ResourceStatus.PENDING
+                db.commit()
+            raise JobError(resource.error_message or "Resource processing failed")
+    
+    @staticmethod
+    async def process_pdf_resource(
+        resource: Resource,
+        file_path: str,
+        db: Session,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> bool:
         """
         Process a PDF resource and extract content.
         
+        The file's Document is extracted only if no completed extraction
+        exists for its content hash; otherwise the resource is linked to the
+        existing result without re-parsing.
+        
         Args:
             resource: Resource database object
             file_path: Path to the PDF file
             db: Database session
+            progress_callback: Called with (pages_done, total_pages) during extraction
             
         Returns:
             True if successful, False otherwise
@@ -40,25 +116,24 @@ class ResourceService:
             resource.status = ResourceStatus.PROCESSING
             db.commit()
             
-            # Extract text
-            text, error = await PDFProcessor.extract_text(file_path)
+            document = resource.document
+            if document is None:
+                # Uploaded before content-addressed storage; hash the file in place
+                document = DocumentStore.register_file(file_path, db)
+                resource.document_id = document.id
+                db.commit()
             
-            if text:
-                # Get metadata
-                metadata = PDFProcessor.get_pdf_metadata(file_path)
-                
-                # Update resource
-                resource.extracted_content = text
-                resource.resource_metadata = json.dumps(metadata)
-                resource.status = ResourceStatus.COMPLETED
-                resource.processed_at = datetime.utcnow()
-                resource.error_message = None
-                
+            if document.status != ResourceStatus.COMPLETED:
+                await ResourceService.extract_document(document, db, progress_callback)
+            
+            if document.status == ResourceStatus.COMPLETED:
+                ResourceService.link_document(resource, document)
                 db.commit()
                 logger.info(f"Successfully processed PDF resource ID {resource.id}")
                 return True
             else:
                 # Update with error
+                error = document.error_message
                 resource.status = ResourceStatus.FAILED
                 resource.error_message = error or "Failed to extract content"
                 db.commit()
@@ -68,34 +143,232 @@ class ResourceService:
         except Exception as e:
             error_msg = f"Error processing PDF resource: {str(e)}"
             logger.error(error_msg)
+            db.rollback()
             resource.status = ResourceStatus.FAILED
             resource.error_message = error_msg
             db.commit()
             return False
     
     @staticmethod
-    async def process_website_resource(resource: Resource, db: Session) -> bool:
+    async def extract_document(
+        document: Document,
+        db: Session,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> bool:
+        """
+        Extract a document's text into its page table and combined content.
+        
+        Args:
+            document: Document database object
+            db: Database session
+            progress_callback: Called with (pages_done, total_pages) during extraction
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        document.status = ResourceStatus.PROCESSING
+        db.commit()
+        
+        # Pages stored by a previous run are skipped if their source is unchanged
+        known_hashes = dict(
+            db.query(DocumentPage.page_number, DocumentPage.source_hash).filter(
+                DocumentPage.document_id == document.id,
+                DocumentPage.source_hash.isnot(None)
+            ).all()
+        )
+        
+        def store_pages(pages: List[dict]):
+            with RESOURCE_STAGE_SECONDS.labels(ResourceType.PDF.value, "store").time():
+                ResourceService.store_pages(document.id, pages, db)
+        
+        # Parse once, streaming each page into the page table
+        with RESOURCE_STAGE_SECONDS.labels(ResourceType.PDF.value, "extract").time():
+            metadata, error = await PDFProcessor.parse(
+                document.storage_path,
+                on_pages=store_pages,
+                known_hashes=known_hashes,
+                progress_callback=progress_callback
+            )
+        
+        if not metadata:
+            document.status = ResourceStatus.FAILED
+            document.error_message = error or "Failed to extract content"
+            db.commit()
+            return False
+        
+        # Drop pages left over from a longer previous version of the file
+        db.query(DocumentPage).filter(
+            DocumentPage.document_id == document.id,
+            DocumentPage.page_number > metadata["pages"]
+        ).delete(synchronize_session=False)
+        
+        with RESOURCE_STAGE_SECONDS.labels(ResourceType.PDF.value, "assemble").time():
+            key, length, preview = ResourceService.assemble_pages(document.id, db)
+        document.content_blob_key = key
+        document.content_length = length
+        document.content_preview = preview
+        document.document_metadata = json.dumps(metadata)
+        document.status = ResourceStatus.COMPLETED
+        document.processed_at = datetime.utcnow()
+        document.error_message = None
+        db.commit()
+        logger.info(f"Extracted document ID {document.id} ({document.sha256[:12]})")
+        return True
+    
+    @staticmethod
+    def link_document(resource: Resource, document: Document):
+        """
+        Complete a resource from an already extracted document.
+        
+        Args:
+            resource: Resource database object
+            document: Completed Document the resource points at
+        """
+        resource.document_id = document.id
+        # Share the document's blob instead of copying its text
+        resource.set_content_blob(document.content_blob_key, document.content_length, document.content_preview)
+        resource.resource_metadata = document.document_metadata
+        resource.status = ResourceStatus.COMPLETED
+        resource.processed_at = datetime.utcnow()
+        resource.error_message = None
+    
+    @staticmethod
+    def store_pages(document_id: int, pages: List[dict], db: Session):
+        """
+        Insert or update extracted pages for a document.
+        
+        Args:
+            document_id: Document ID
+            pages: Page dicts produced by PDFProcessor.parse
+            db: Database session
+        """
+        numbers = [page["page_number"] for page in pages if not page["skipped"]]
+        
+        existing = dict(
+            db.query(DocumentPage.page_number, DocumentPage.id).filter(
+                DocumentPage.document_id == document_id,
+                DocumentPage.page_number.in_(numbers)
+            ).all()
+        ) if numbers else {}
+        
+        for page in pages:
+            if page["skipped"]:
+                continue
+            values = {
+                "content": page["content"],
+                "table_count": page["table_count"],
+                "source_hash": page["source_hash"],
+                "extractor": page["extractor"],
+            }
+            if page["page_number"] in existing:
+                db.query(DocumentPage).filter(
+                    DocumentPage.id == existing[page["page_number"]]
+                ).update({**values, "updated_at": datetime.utcnow()}, synchronize_session=False)
+            else:
+                db.add(DocumentPage(document_id=document_id, page_number=page["page_number"], **values))
+        
+        # Touch the document so other workers can see extraction is still alive
+        db.query(Document).filter(Document.id == document_id).update(
+            {"updated_at": datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+    
+    @staticmethod
+    def assemble_pages(document_id: int, db: Session) -> Tuple[Optional[str], int, Optional[str]]:
+        """
+        Stream a document's stored pages, in page order, into one blob.
+        
+        Pages are read in batches and written as they arrive, so the
+        combined text is never held in memory.
+        
+        Args:
+            document_id: Document ID
+            db: Database session
+            
+        Returns:
+            Tuple of (blob key, character count, preview); the key is None
+            when the pages hold no text
+        """
+        rows = db.query(DocumentPage.content).filter(
+            DocumentPage.document_id == document_id
+        ).order_by(DocumentPage.page_number).yield_per(64)
+        
+        preview = []
+        
+        def pieces():
+            written = 0
+            for (content,) in rows:
+                if not content:
+                    continue
+                if written:
+                    yield "\n\n"
+                if written < CONTENT_PREVIEW_CHARS:
+                    preview.append(content[:CONTENT_PREVIEW_CHARS - written])
+                written += len(content) + 2
+                yield content
+        
+        key, length = blob_store.put_chunks(pieces())
+        if not length:
+            return None, 0, None
+        return key, length, "\n\n".join(preview)[:CONTENT_PREVIEW_CHARS]
+    
+    @staticmethod
+    async def process_website_resource(
+        resource: Resource,
+        db: Session,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        refresh: bool = False
+    ) -> bool:
         """
         Process a website resource and extract content.
         
+        Resources with a crawl configuration are crawled across the site;
+        otherwise only the resource URL is scraped.
+        
+        A scheduled refresh requests pages conditionally and leaves the
+        content untouched when nothing changed. The resource stays COMPLETED
+        while it refreshes, so the knowledge base keeps serving it, and a
+        failed refresh keeps the previous content.
+        
         Args:
             resource: Resource database object
             db: Database session
+            progress_callback: Called with (pages_done, page_limit) while crawling
+            refresh: Incremental scheduled refresh instead of a full re-extraction
             
         Returns:
             True if successful, False otherwise
         """
+        refresh = refresh and resource.content_blob_key is not None
+        
+        if resource.crawl_config:
+            return await ResourceService.crawl_website_resource(resource, db, progress_callback, refresh)
+        
         try:
             logger.info(f"Processing website resource ID {resource.id}")
             
             # Update status to processing
-            resource.status = ResourceStatus.PROCESSING
+            if not refresh:
+                resource.status = ResourceStatus.PROCESSING
             db.commit()
             
-            # Scrape website
-            text, error, metadata = await WebScraper.scrape_website(resource.source_url)
+            # Scrape website, conditionally on the previous scrape when refreshing
+            validators = json.loads(resource.resource_metadata) if refresh and resource.resource_metadata else None
+            with RESOURCE_STAGE_SECONDS.labels(ResourceType.WEBSITE.value, "fetch").time():
+                text, error, metadata = await WebScraper.scrape_website(resource.source_url, validators)
             
-            if text:
+            if metadata and metadata.get("not_modified"):
+                # Keep content; only record the latest validators
+                validators = validators or {}
+                validators.update(etag=metadata["etag"], last_modified=metadata["last_modified"])
+                resource.resource_metadata = json.dumps(validators)
+                resource.status = ResourceStatus.COMPLETED
+                resource.processed_at = datetime.utcnow()
+                resource.error_message = None
+                db.commit()
+                logger.info(f"Website resource ID {resource.id} unchanged, skipped re-extraction")
+                return True
+            elif text:
                 # Update resource
                 resource.extracted_content = text
                 resource.resource_metadata = json.dumps(metadata) if metadata else None
@@ -106,6 +379,12 @@ class ResourceService:
                 db.commit()
                 logger.info(f"Successfully processed website resource ID {resource.id}")
                 return True
+            elif refresh:
+                # Keep serving the previous content until the next refresh
+                resource.error_message = f"Refresh failed: {error or 'Failed to extract content'}"
+                db.commit()
+                logger.warning(f"Failed to refresh website resource ID {resource.id}: {error}")
+                return True
             else:
                 # Update with error
                 resource.status = ResourceStatus.FAILED
@@ -117,10 +396,248 @@ class ResourceService:
         except Exception as e:
             error_msg = f"Error processing website resource: {str(e)}"
             logger.error(error_msg)
-            resource.status = ResourceStatus.FAILED
+            db.rollback()
+            if not refresh:
+                resource.status = ResourceStatus.FAILED
             resource.error_message = error_msg
             db.commit()
-            return False
+            # A failed refresh keeps serving the previous content
+            return refresh
+    
+    @staticmethod
+    async def crawl_website_resource(
+        resource: Resource,
+        db: Session,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        refresh: bool = False
+    ) -> bool:
+        """
+        Crawl a website resource's site and store each page as chunks.
+        
+        Pages that were not reached by this crawl are removed, and the
+        resource's content is rebuilt from the stored chunks. On a refresh,
+        known pages are fetched conditionally; unchanged pages keep their
+        chunks, and the content is only rebuilt if some page changed.
+        
+        Args:
+            resource: Resource database object with crawl_config set
+            db: Database session
+            progress_callback: Called with (pages_done, page_limit) as pages complete
+            refresh: Incremental scheduled refresh instead of a full re-crawl
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            logger.info(f"Crawling website resource ID {resource.id}{' (refresh)' if refresh else ''}")
+            
+            if not refresh:
+                resource.status = ResourceStatus.PROCESSING
+            db.commit()
+            
+            known_pages = {}
+            if refresh:
+                rows = db.query(
+                    CrawledPage.url, CrawledPage.etag, CrawledPage.last_modified,
+                    CrawledPage.content_hash, CrawledPage.links
+                ).filter(
+                    CrawledPage.resource_id == resource.id,
+                    CrawledPage.content_hash.isnot(None)
+                ).all()
+                known_pages = {
+                    url: {
+                        "etag": etag,
+                        "last_modified": last_modified,
+                        "content_hash": content_hash,
+                        "links": json.loads(links) if links else [],
+                    }
+                    for url, etag, last_modified, content_hash, links in rows
+                }
+            
+            config = json.loads(resource.crawl_config)
+            crawler = SiteCrawler(
+                resource.source_url,
+                max_pages=config.get("max_pages"),
+                max_depth=config.get("max_depth"),
+                use_sitemap=config.get("use_sitemap", True),
+                known_pages=known_pages
+            )
+            crawled_ids = set()
+            changed = False
+            
+            def store_page(page: Dict):
+                nonlocal changed
+                with RESOURCE_STAGE_SECONDS.labels(ResourceType.WEBSITE.value, "store").time():
+                    page_id, page_changed = ResourceService.store_crawled_page(resource.id, page, db)
+                crawled_ids.add(page_id)
+                changed = changed or page_changed
+                if progress_callback:
+                    progress_callback(crawler.pages_done + crawler.pages_failed, crawler.max_pages)
+            
+            with RESOURCE_STAGE_SECONDS.labels(ResourceType.WEBSITE.value, "crawl").time():
+                summary, error = await crawler.crawl(on_page=store_page)
+            
+            if summary and summary["pages_crawled"] > 0:
+                # Drop pages (and their chunks) the site no longer links to
+                stale_ids = [
+                    page_id for (page_id,) in db.query(CrawledPage.id).filter(
+                        CrawledPage.resource_id == resource.id
+                    ).all() if page_id not in crawled_ids
+                ]
+                if stale_ids:
+                    db.query(ResourceChunk).filter(ResourceChunk.page_id.in_(stale_ids)).delete(synchronize_session=False)
+                    db.query(CrawledPage).filter(CrawledPage.id.in_(stale_ids)).delete(synchronize_session=False)
+                
+                if changed or stale_ids or resource.content_blob_key is None:
+                    with RESOURCE_STAGE_SECONDS.labels(ResourceType.WEBSITE.value, "assemble").time():
+                        resource.extracted_content = ResourceService.assemble_chunks(resource.id, db)
+                else:
+                    logger.info(f"Website resource ID {resource.id} unchanged, skipped re-indexing")
+                resource.resource_metadata = json.dumps(summary)
+                resource.status = ResourceStatus.COMPLETED
+                resource.processed_at = datetime.utcnow()
+                resource.error_message = None
+                db.commit()
+                logger.info(
+                    f"Crawled {summary['pages_crawled']} pages ({summary['pages_unchanged']} unchanged) "
+                    f"for website resource ID {resource.id}"
+                )
+                return True
+            elif refresh:
+                # Keep serving the previous content until the next refresh
+                resource.error_message = f"Refresh failed: {error or 'No pages could be crawled from the website'}"
+                db.commit()
+                logger.warning(f"Failed to refresh website resource ID {resource.id}: {error}")
+                return True
+            else:
+                error = error or "No pages could be crawled from the website"
+                resource.status = ResourceStatus.FAILED
+                resource.error_message = error
+                db.commit()
+                logger.error(f"Failed to crawl website resource ID {resource.id}: {error}")
+                return False
+                
+        except Exception as e:
+            error_msg = f"Error crawling website resource: {str(e)}"
+            logger.error(error_msg)
+            db.rollback()
+            if not refresh:
+                resource.status = ResourceStatus.FAILED
+            resource.error_message = error_msg
+            db.commit()
+            # A failed refresh keeps serving the previous content
+            return refresh
+    
+    @staticmethod
+    def store_crawled_page(resource_id: int, page: Dict, db: Session) -> Tuple[int, bool]:
+        """
+        Insert or update a crawled page and replace its chunks if it changed.
+        
+        Unchanged pages only get their fetch time and validators updated.
+        A page that failed to fetch keeps its previous chunks unless the
+        server reported it gone (404/410).
+        
+        Args:
+            resource_id: Resource ID
+            page: Page dict produced by SiteCrawler
+            db: Database session
+            
+        Returns:
+            Tuple of (CrawledPage ID, whether the page's chunks changed)
+        """
+        crawled_page = db.query(CrawledPage).filter(
+            CrawledPage.resource_id == resource_id,
+            CrawledPage.url == page["url"]
+        ).first()
+        if crawled_page is None:
+            crawled_page = CrawledPage(resource_id=resource_id, url=page["url"])
+            db.add(crawled_page)
+        
+        now = datetime.utcnow()
+        crawled_page.depth = page["depth"]
+        crawled_page.status_code = page["status_code"]
+        crawled_page.error_message = page["error"]
+        crawled_page.fetched_at = now
+        
+        if page["unchanged"]:
+            crawled_page.etag = page["etag"]
+            crawled_page.last_modified = page["last_modified"]
+            db.commit()
+            return crawled_page.id, False
+        
+        if page["error"] and page["status_code"] not in (404, 410):
+            # Transient failure: keep the last good content
+            db.commit()
+            return crawled_page.id, False
+        
+        crawled_page.title = (page["title"] or "")[:500]
+        crawled_page.content_length = len(page["text"])
+        crawled_page.etag = page["etag"]
+        crawled_page.last_modified = page["last_modified"]
+        crawled_page.content_hash = page["content_hash"]
+        crawled_page.links = json.dumps(page["links"])
+        crawled_page.changed_at = now
+        db.flush()
+        
+        db.query(ResourceChunk).filter(ResourceChunk.page_id == crawled_page.id).delete(synchronize_session=False)
+        if page["text"]:
+            header = f"# {page['title']}\nURL: {page['url']}" if page["title"] else f"URL: {page['url']}"
+            sections = page["sections"]
+            if page["description"]:
+                sections = [{"heading": "", "level": 0, "text": page["description"]}] + sections
+            # Chunk boundaries fall on the page's headings
+            for position, content in enumerate(chunk_sections(sections)):
+                if position == 0:
+                    content = f"{header}\n\n{content}"
+                db.add(ResourceChunk(
+                    resource_id=resource_id,
+                    page_id=crawled_page.id,
+                    position=position,
+                    content=content
+                ))
+        
+        db.commit()
+        return crawled_page.id, True
+    
+    @staticmethod
+    def assemble_chunks(resource_id: int, db: Session) -> str:
+        """
+        Join a resource's chunks into one text, page by page in crawl order.
+        
+        Args:
+            resource_id: Resource ID
+            db: Database session
+            
+        Returns:
+            Combined chunk text
+        """
+        rows = db.query(ResourceChunk.content).outerjoin(
+            CrawledPage, ResourceChunk.page_id == CrawledPage.id
+        ).filter(
+            ResourceChunk.resource_id == resource_id
+        ).order_by(CrawledPage.depth, CrawledPage.id, ResourceChunk.position).yield_per(64)
+        
+        return "\n\n".join(content for (content,) in rows)
+    
+    @staticmethod
+    def schedule_refresh(resource: Resource, now: Optional[datetime] = None):
+        """
+        Set a resource's next scheduled refresh from its interval.
+        
+        The interval is jittered by settings.refresh_jitter_fraction so
+        resources added together do not all refresh at the same moment.
+        
+        Args:
+            resource: Resource database object
+            now: Time to schedule from (defaults to the current time)
+        """
+        if not resource.refresh_interval_hours:
+            resource.next_refresh_at = None
+            return
+        
+        jitter = random.uniform(-settings.refresh_jitter_fraction, settings.refresh_jitter_fraction)
+        interval = timedelta(hours=resource.refresh_interval_hours) * (1 + jitter)
+        resource.next_refresh_at = (now or datetime.utcnow()) + interval
     
     @staticmethod
     async def process_facebook_resource(resource: Resource, db: Session) -> bool:
@@ -142,7 +659,8 @@ class ResourceService:
             db.commit()
             
             # Scrape Facebook page
-            text, error, metadata = await WebScraper.scrape_facebook_page(resource.source_url)
+            with RESOURCE_STAGE_SECONDS.labels(ResourceType.FACEBOOK.value, "fetch").time():
+                text, error, metadata = await WebScraper.scrape_facebook_page(resource.source_url)
             
             if text:
                 # Update resource
@@ -233,7 +751,8 @@ class ResourceService:
             current_length = 0
             
             for resource in resources:
-                if not resource.extracted_content:
+                # Check the length column first so empty resources never touch the blob store
+                if not resource.content_length or not resource.extracted_content:
                     continue
                 
                 # Add resource header
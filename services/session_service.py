@@ -20,6 +20,7 @@ def create_session(db: Session, client_info_data: ClientInfoCreate) -> ChatSessi
     """
     # Create client info
     client_info = ClientInfo(
+        company_id=client_info_data.company_id,
         name=client_info_data.name,
         email=client_info_data.email,
         phone=client_info_data.phone,
@@ -30,6 +31,7 @@ def create_session(db: Session, client_info_data: ClientInfoCreate) -> ChatSessi
     # Create chat session
     session = ChatSession(
         session_id=str(uuid.uuid4()),
+        company_id=client_info_data.company_id,
         state=SessionState.AI,
         client_info_id=client_info.id,
     )
@@ -0,0 +1,397 @@
+"""
+Website Crawler
+Crawls a site from a seed URL and its sitemap, honouring robots.txt.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+from lxml import etree
+
+from config import settings
+from services.html_extractor import HTMLExtractor
+from services.http_fetcher import http_fetcher, FetchError, UnsupportedContentError, USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".zip", ".gz", ".tar", ".rar", ".exe", ".dmg", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".bmp",
+    ".mp3", ".mp4", ".avi", ".mov", ".webm", ".css", ".js", ".json", ".xml", ".rss",
+)
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "ref", "_ga"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+ROBOTS_MAX_BYTES = 512 * 1024
+SITEMAP_MAX_BYTES = 10 * 1024 * 1024
+SITEMAP_MAX_FILES = 10  # Sitemaps read per crawl, including nested sitemap indexes
+XML_DECLARATION_RE = re.compile(r"^\s*<\?xml[^>]*\?>")
+PERCENT_ESCAPE_RE = re.compile(r"%[0-9a-fA-F]{2}")
+
+
+def canonicalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Normalize a URL so equivalent spellings of a page compare equal.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, resolves dot segments, collapses repeated slashes
+    and sorts the query string.
+
+    Args:
+        url: Absolute or relative URL
+        base: Base URL to resolve a relative URL against
+
+    Returns:
+        Canonical URL, or None if it is not an http(s) URL
+    """
+    try:
+        if base:
+            url = urljoin(base, url.strip())
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = parts.hostname
+        port = parts.port
+    except ValueError:
+        return None
+
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+
+    netloc = host.lower().rstrip(".")
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path) or "/"
+    # urljoin against the origin resolves "." and ".." segments
+    path = urlsplit(urljoin(f"{scheme}://{netloc}/", path)).path
+    path = PERCENT_ESCAPE_RE.sub(lambda match: match.group(0).upper(), path)
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def _site_host(host: str) -> str:
+    """Host name used for same-site checks (www. prefix ignored)."""
+    host = host.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class SiteCrawler:
+    """
+    Concurrent same-site crawler for one WEBSITE resource.
+
+    URLs come from the seed page's links (breadth-first up to max_depth) and
+    the site's sitemaps. Every URL is canonicalized before it is queued so
+    each page is fetched once. A pool of workers fetches through the shared
+    HTTP client, spacing requests to the host by the politeness delay (or the
+    robots.txt Crawl-delay if longer), and parses pages off the event loop
+    so parsing overlaps with other workers' fetches.
+
+    Pages from a previous crawl (known_pages) are fetched conditionally with
+    their ETag / Last-Modified. A 304, or a body whose hash is unchanged,
+    is reported as unchanged without parsing, and the page's stored links
+    are followed instead.
+    """
+
+    def __init__(
+        self,
+        seed_url: str,
+        max_pages: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        use_sitemap: bool = True,
+        concurrency: Optional[int] = None,
+        delay_seconds: Optional[float] = None,
+        known_pages: Optional[Dict[str, Dict]] = None,
+    ):
+        self.seed_url = canonicalize_url(seed_url)
+        self.max_pages = max_pages or settings.crawl_max_pages
+        self.max_depth = settings.crawl_max_depth if max_depth is None else max_depth
+        self.use_sitemap = use_sitemap
+        self.concurrency = concurrency or settings.crawl_concurrency
+        self.delay_seconds = settings.crawl_delay_seconds if delay_seconds is None else delay_seconds
+
+        self.pages_done = 0
+        self.pages_failed = 0
+        self.pages_unchanged = 0
+        self.sitemap_urls = 0
+        self.known_pages = known_pages or {}
+
+        parts = urlsplit(self.seed_url or "")
+        self._site = _site_host(parts.hostname or "")
+        self._origin = f"{parts.scheme}://{parts.netloc}"
+        self._robots: Optional[RobotFileParser] = None
+        self._seen: set = set()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._next_fetch_at: Dict[str, float] = {}
+        self._on_page: Optional[Callable[[Dict], None]] = None
+
+    async def crawl(self, on_page: Callable[[Dict], None]) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Crawl the site, handing each fetched page to on_page as it completes.
+
+        Page dicts have the keys url, depth, status_code, title, description,
+        text, sections, error (set when the fetch failed), unchanged, etag,
+        last_modified, content_hash and links.
+
+        Args:
+            on_page: Called with each page dict
+
+        Returns:
+            Tuple of (crawl summary, error_message)
+        """
+        if not self.seed_url:
+            return None, "Invalid URL format"
+
+        self._on_page = on_page
+
+        robots_error = await self._load_robots()
+        if robots_error:
+            return None, robots_error
+
+        crawl_delay = self._robots.crawl_delay(USER_AGENT)
+        if crawl_delay:
+            self.delay_seconds = max(self.delay_seconds, float(crawl_delay))
+
+        if not self._schedule(self.seed_url, 0):
+            return None, "The URL is disallowed by the site's robots.txt"
+
+        if self.use_sitemap:
+            await self._load_sitemaps()
+
+        logger.info(f"Crawling {self.seed_url}: {len(self._seen)} URLs seeded, limit {self.max_pages} pages")
+
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        try:
+            await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        summary = {
+            "url": self.seed_url,
+            "pages_crawled": self.pages_done,
+            "pages_failed": self.pages_failed,
+            "pages_unchanged": self.pages_unchanged,
+            "urls_discovered": len(self._seen),
+            "sitemap_urls": self.sitemap_urls,
+            "max_pages": self.max_pages,
+            "max_depth": self.max_depth,
+            "crawl_delay_seconds": self.delay_seconds,
+        }
+        return summary, None
+
+    def _in_scope(self, url: str) -> bool:
+        """Check whether a canonical URL belongs to the crawled site and may be fetched."""
+        parts = urlsplit(url)
+        if _site_host(parts.hostname or "") != self._site:
+            return False
+        if parts.path.lower().endswith(SKIPPED_EXTENSIONS):
+            return False
+        return self._robots.can_fetch(USER_AGENT, url)
+
+    def _schedule(self, url: str, depth: int) -> bool:
+        """Queue a URL unless it was already seen, is out of scope or the page limit is reached."""
+        url = canonicalize_url(url)
+        if not url or url in self._seen or len(self._seen) >= self.max_pages:
+            return False
+        if not self._in_scope(url):
+            return False
+        self._seen.add(url)
+        self._queue.put_nowait((url, depth))
+        return True
+
+    async def _load_robots(self) -> Optional[str]:
+        """Fetch and parse robots.txt; a missing file allows everything."""
+        self._robots = RobotFileParser(f"{self._origin}/robots.txt")
+        try:
+            response = await http_fetcher.fetch(self._robots.url, max_bytes=ROBOTS_MAX_BYTES)
+            self._robots.parse(response.text.splitlines())
+        except FetchError as e:
+            if e.status and 400 <= e.status < 500:
+                self._robots.parse([])
+            else:
+                # Server errors mean the rules are unknown; don't crawl blind
+                return f"Could not read robots.txt: {str(e)}"
+        return None
+
+    async def _load_sitemaps(self):
+        """Seed the queue from the site's sitemaps (robots.txt entries or /sitemap.xml)."""
+        pending = list(self._robots.site_maps() or [f"{self._origin}/sitemap.xml"])
+        fetched = 0
+
+        while pending and fetched < SITEMAP_MAX_FILES and len(self._seen) < self.max_pages:
+            sitemap_url = pending.pop(0)
+            if sitemap_url.lower().endswith(".gz"):
+                continue
+            fetched += 1
+            try:
+                response = await http_fetcher.fetch(sitemap_url, max_bytes=SITEMAP_MAX_BYTES)
+            except FetchError as e:
+                logger.info(f"Skipping sitemap {sitemap_url}: {str(e)}")
+                continue
+
+            page_urls, child_sitemaps = self._parse_sitemap(response.text)
+            pending.extend(child_sitemaps)
+            for url in page_urls:
+                if self._schedule(url, 0):
+                    self.sitemap_urls += 1
+
+    @staticmethod
+    def _parse_sitemap(xml_text: str) -> Tuple[List[str], List[str]]:
+        """
+        Parse a sitemap or sitemap index.
+
+        Returns:
+            Tuple of (page URLs, nested sitemap URLs)
+        """
+        parser = etree.XMLParser(resolve_entities=False, no_network=True, recover=True)
+        try:
+            root = etree.fromstring(XML_DECLARATION_RE.sub("", xml_text, count=1), parser)
+        except etree.XMLSyntaxError:
+            return [], []
+        if root is None:
+            return [], []
+
+        locations = [loc.text.strip() for loc in root.iter("{*}loc") if loc.text]
+        if etree.QName(root).localname == "sitemapindex":
+            return [], locations
+        return locations, []
+
+    async def _wait_turn(self, host: str):
+        """Sleep until the politeness delay for a host has passed, reserving the next slot."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        fetch_at = max(now, self._next_fetch_at.get(host, 0.0))
+        self._next_fetch_at[host] = fetch_at + self.delay_seconds
+        if fetch_at > now:
+            await asyncio.sleep(fetch_at - now)
+
+    async def _worker(self):
+        while True:
+            url, depth = await self._queue.get()
+            try:
+                await self._crawl_page(url, depth)
+            except Exception as e:
+                logger.error(f"Error crawling {url}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _crawl_page(self, url: str, depth: int):
+        """Fetch and parse one page, then queue its links."""
+        await self._wait_turn(urlsplit(url).netloc)
+
+        known = self.known_pages.get(url, {})
+        headers = {}
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+        try:
+            response = await http_fetcher.fetch(url, headers=headers or None)
+        except UnsupportedContentError:
+            return  # Not a page (file download, image, ...)
+        except FetchError as e:
+            self.pages_failed += 1
+            self._emit(url, depth, e.status, error=str(e))
+            return
+
+        # Follow redirects only within the site, and only once per target
+        final_url = canonicalize_url(response.url) or url
+        if final_url != url:
+            if final_url in self._seen or not self._in_scope(final_url):
+                return
+            self._seen.add(final_url)
+
+        validators = {
+            "etag": response.headers.get("ETag") or known.get("etag"),
+            "last_modified": response.headers.get("Last-Modified") or known.get("last_modified"),
+        }
+
+        if response.not_modified:
+            self._emit_unchanged(final_url, depth, response.status, known, validators)
+            return
+
+        if response.content_type and response.content_type not in HTML_CONTENT_TYPES:
+            return
+
+        content_hash = hashlib.sha256(response.text.encode("utf-8")).hexdigest()
+        if content_hash == known.get("content_hash"):
+            # Server ignored the validators but the page is byte-for-byte the same
+            self._emit_unchanged(final_url, depth, response.status, known, validators)
+            return
+
+        page = await HTMLExtractor.extract(response.text, final_url)
+        links = self._site_links(page["links"])
+
+        if depth < self.max_depth:
+            for link in links:
+                self._schedule(link, depth + 1)
+
+        self.pages_done += 1
+        self._emit(
+            final_url, depth, response.status, page=page,
+            validators={**validators, "content_hash": content_hash, "links": links}
+        )
+
+    def _emit_unchanged(self, url: str, depth: int, status_code: int, known: Dict, validators: Dict):
+        """Report a page whose content has not changed and follow its stored links."""
+        links = known.get("links") or []
+        if depth < self.max_depth:
+            for link in links:
+                self._schedule(link, depth + 1)
+
+        self.pages_done += 1
+        self.pages_unchanged += 1
+        self._emit(
+            url, depth, status_code, unchanged=True,
+            validators={**validators, "content_hash": known.get("content_hash"), "links": links}
+        )
+
+    def _site_links(self, links: List[str]) -> List[str]:
+        """Canonical, de-duplicated in-site links in page order."""
+        site_links = {}
+        for link in links:
+            link = canonicalize_url(link)
+            if link and link not in site_links and self._in_scope(link):
+                site_links[link] = None
+        return list(site_links)
+
+    def _emit(
+        self,
+        url: str,
+        depth: int,
+        status_code: Optional[int],
+        page: Optional[Dict] = None,
+        error: Optional[str] = None,
+        unchanged: bool = False,
+        validators: Optional[Dict] = None,
+    ):
+        page = page or {}
+        validators = validators or {}
+        self._on_page({
+            "url": url,
+            "depth": depth,
+            "status_code": status_code,
+            "title": page.get("title", ""),
+            "description": page.get("description", ""),
+            "text": page.get("text", ""),
+            "sections": page.get("sections", []),
+            "error": error,
+            "unchanged": unchanged,
+            "etag": validators.get("etag"),
+            "last_modified": validators.get("last_modified"),
+            "content_hash": validators.get("content_hash"),
+            "links": validators.get("links") or [],
+        })
@@ -3,12 +3,14 @@ Web Content Extraction Service
 Scrapes and extracts text content from websites and Facebook pages.
 """
 
-import requests
 from bs4 import BeautifulSoup
+import hashlib
 import logging
 from typing import Optional, Dict
-from urllib.parse import urljoin, urlparse
-import re
+from urllib.parse import urlparse
+
+from services.html_extractor import HTMLExtractor
+from services.http_fetcher import http_fetcher, FetchError
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +18,6 @@ logger = logging.getLogger(__name__)
 class WebScraper:
     """Service for scraping web content."""
     
-    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    
     @staticmethod
     def is_valid_url(url: str) -> bool:
         """Validate URL format."""
@@ -28,15 +28,24 @@ class WebScraper:
             return False
     
     @staticmethod
-    async def scrape_website(url: str) -> tuple[Optional[str], Optional[str], Optional[Dict]]:
+    async def scrape_website(
+        url: str,
+        validators: Optional[Dict] = None
+    ) -> tuple[Optional[str], Optional[str], Optional[Dict]]:
         """
         Scrape content from a website.
         
+        With validators from a previous scrape (etag, last_modified,
+        content_hash), the page is requested conditionally and not parsed
+        if it has not changed.
+        
         Args:
             url: Website URL to scrape
+            validators: Metadata of the previous scrape
             
         Returns:
-            Tuple of (extracted_text, error_message, metadata)
+            Tuple of (extracted_text, error_message, metadata). If the page is
+            unchanged, text and error are None and metadata has not_modified set.
         """
         try:
             if not WebScraper.is_valid_url(url):
@@ -44,50 +53,32 @@ class WebScraper:
             
             logger.info(f"Scraping website: {url}")
             
-            headers = {
-                'User-Agent': WebScraper.USER_AGENT,
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-            }
-            
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'lxml')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            
-            # Get page title
-            title = soup.find('title')
-            title_text = title.get_text().strip() if title else ""
-            
-            # Get meta description
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            description = meta_desc.get('content', '').strip() if meta_desc else ""
-            
-            # Extract main content
-            # Try to find main content area
-            main_content = (
-                soup.find('main') or 
-                soup.find('article') or 
-                soup.find('div', class_=re.compile(r'content|main|article', re.I)) or
-                soup.find('body')
-            )
-            
-            # Get text
-            if main_content:
-                text = main_content.get_text(separator='\n', strip=True)
-            else:
-                text = soup.get_text(separator='\n', strip=True)
-            
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = '\n'.join(chunk for chunk in chunks if chunk)
+            validators = validators or {}
+            headers = {}
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+            
+            response = await http_fetcher.fetch(url, headers=headers or None)
+            
+            etag = response.headers.get("ETag") or validators.get("etag")
+            last_modified = response.headers.get("Last-Modified") or validators.get("last_modified")
+            content_hash = hashlib.sha256(response.text.encode("utf-8")).hexdigest()
+            
+            if response.not_modified or content_hash == validators.get("content_hash"):
+                logger.info(f"Website unchanged since last scrape: {url}")
+                return None, None, {
+                    "url": url,
+                    "not_modified": True,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                }
+            
+            page = await HTMLExtractor.extract(response.text, url)
+            text = page["text"]
+            title_text = page["title"]
+            description = page["description"]
             
             # Create metadata
             metadata = {
@@ -95,18 +86,12 @@ class WebScraper:
                 "title": title_text,
                 "description": description,
                 "content_length": len(text),
+                "links_found": len(page["links"]),
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": content_hash,
             }
             
-            # Get all links
-            links = []
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                absolute_url = urljoin(url, href)
-                if absolute_url.startswith('http'):
-                    links.append(absolute_url)
-            
-            metadata["links_found"] = len(links)
-            
             if text and len(text.strip()) > 100:
                 logger.info(f"Successfully scraped {len(text)} characters from {url}")
                 
@@ -119,7 +104,7 @@ class WebScraper:
                 logger.error(error_msg)
                 return None, error_msg, metadata
                 
-        except requests.exceptions.RequestException as e:
+        except FetchError as e:
             error_msg = f"Failed to fetch website: {str(e)}"
             logger.error(error_msg)
             return None, error_msg, None
@@ -150,16 +135,9 @@ class WebScraper:
             
             logger.info(f"Scraping Facebook page: {url}")
             
-            headers = {
-                'User-Agent': WebScraper.USER_AGENT,
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-            }
-            
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
+            response = await http_fetcher.fetch(url)
             
-            soup = BeautifulSoup(response.content, 'lxml')
+            soup = BeautifulSoup(response.text, 'lxml')
             
             # Try to extract page title
             title = soup.find('title')
@@ -192,7 +170,7 @@ class WebScraper:
                 logger.error(error_msg)
                 return None, error_msg, metadata
                 
-        except requests.exceptions.RequestException as e:
+        except FetchError as e:
             error_msg = f"Failed to fetch Facebook page: {str(e)}"
             logger.error(error_msg)
             return None, error_msg, None
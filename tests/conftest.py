@@ -0,0 +1,21 @@
+"""
+Test configuration.
+
+Settings are read from the environment at import time, so the test
+environment is set up here, before any application module is imported:
+the offline stub LLM provider and a throwaway SQLite database.
+"""
+
+import os
+import sys
+import tempfile
+
+TEST_DIR = tempfile.mkdtemp(prefix="chatbot-tests-")
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("DEBUG", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ["LLM_PROVIDER"] = "stub"
+os.environ["TRACING_FILE"] = os.path.join(TEST_DIR, "traces.jsonl")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,90 @@
+"""Tests for admin registration."""
+
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from models.chat import AdminUser
+from models.company import Company
+from models.database import SessionLocal, init_db
+from routes.auth import register_admin
+from schemas.chat import AdminRegister
+
+
+@pytest.fixture
+def company_id():
+    init_db()
+    db = SessionLocal()
+    try:
+        slug = f"acme-{uuid.uuid4().hex[:8]}"
+        company = Company(name="Acme", slug=slug, email=f"{slug}@example.com")
+        db.add(company)
+        db.commit()
+        return company.id
+    finally:
+        db.close()
+
+
+def registration(company_id, username, email) -> AdminRegister:
+    return AdminRegister(company_id=company_id, username=username, email=email, password="correct horse")
+
+
+def register_concurrently(*requests):
+    """Run registrations at once, each with its own session, as separate requests would."""
+    async def register(request):
+        db = SessionLocal()
+        try:
+            return await register_admin(request, db)
+        finally:
+            db.close()
+
+    async def main():
+        return await asyncio.gather(*(register(request) for request in requests), return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+def test_register_rejects_existing_username_and_email(company_id):
+    name = uuid.uuid4().hex[:8]
+    first, = register_concurrently(registration(company_id, name, f"{name}@example.com"))
+    assert first.access_token
+
+    for request, detail in (
+        (registration(company_id, name, f"other-{name}@example.com"), "Username already registered"),
+        (registration(company_id, f"other-{name}", f"{name}@example.com"), "Email already registered"),
+    ):
+        result, = register_concurrently(request)
+        assert isinstance(result, HTTPException)
+        assert (result.status_code, result.detail) == (400, detail)
+
+
+@pytest.mark.parametrize("same_field", ["username", "email"])
+def test_concurrent_duplicate_registration_is_rejected(company_id, same_field):
+    name = uuid.uuid4().hex[:8]
+    requests = [
+        registration(
+            company_id,
+            name if same_field == "username" else f"{name}-{n}",
+            f"{name}@example.com" if same_field == "email" else f"{name}-{n}@example.com",
+        )
+        for n in range(2)
+    ]
+
+    # Both pass the duplicate check before either has finished hashing its password
+    results = register_concurrently(*requests)
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    assert len(errors) == 1
+    assert isinstance(errors[0], HTTPException)
+    expected = "Username already registered" if same_field == "username" else "Email already registered"
+    assert (errors[0].status_code, errors[0].detail) == (400, expected)
+
+    db = SessionLocal()
+    try:
+        column = AdminUser.username if same_field == "username" else AdminUser.email
+        value = name if same_field == "username" else f"{name}@example.com"
+        assert db.query(AdminUser).filter(column == value).count() == 1
+    finally:
+        db.close()
@@ -0,0 +1,153 @@
+"""Tests for the shared HTTP fetcher, against a local aiohttp server."""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from config import settings
+from services.http_fetcher import FetchError, HTTPFetcher, UnsupportedContentError
+from services.web_scraper import WebScraper
+
+PAGE = "<html><head><title>Hours</title></head><body><main><p>{}</p></main></body></html>".format(
+    "We are open from nine to five on weekdays. " * 10
+)
+ETAG = '"v1"'
+
+
+def run_with_server(handlers, scenario):
+    """Start a local server with the given routes, then run scenario(server, fetcher)."""
+    async def main():
+        app = web.Application()
+        for path, handler in handlers.items():
+            app.router.add_get(path, handler)
+        fetcher = HTTPFetcher()
+        async with TestServer(app) as server:
+            try:
+                return await scenario(server, fetcher)
+            finally:
+                await fetcher.close()
+
+    return asyncio.run(main())
+
+
+async def page(request):
+    return web.Response(text=PAGE, content_type="text/html")
+
+
+async def conditional_page(request):
+    if request.headers.get("If-None-Match") == ETAG:
+        return web.Response(status=304, headers={"ETag": ETAG})
+    return web.Response(text=PAGE, content_type="text/html", headers={"ETag": ETAG})
+
+
+async def large_page(request):
+    return web.Response(text="x" * 5000, content_type="text/plain")
+
+
+async def large_chunked_page(request):
+    # No Content-Length, so the cap has to be enforced while streaming
+    response = web.StreamResponse(headers={"Content-Type": "text/plain"})
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    for _ in range(10):
+        await response.write(b"x" * 1000)
+    await response.write_eof()
+    return response
+
+
+async def image(request):
+    return web.Response(body=b"\x89PNG\r\n\x1a\n" + b"\x00" * 100, content_type="image/png")
+
+
+def test_fetch_decodes_text():
+    async def scenario(server, fetcher):
+        return await fetcher.fetch(str(server.make_url("/")))
+
+    result = run_with_server({"/": page}, scenario)
+    assert result.status == 200
+    assert result.content_type == "text/html"
+    assert result.text == PAGE
+    assert result.size == len(PAGE.encode())
+
+
+def test_size_cap_with_content_length():
+    async def scenario(server, fetcher):
+        await fetcher.fetch(str(server.make_url("/large")), max_bytes=1000)
+
+    with pytest.raises(FetchError, match="too large"):
+        run_with_server({"/large": large_page}, scenario)
+
+
+def test_size_cap_while_streaming():
+    async def scenario(server, fetcher):
+        await fetcher.fetch(str(server.make_url("/chunked")), max_bytes=2500)
+
+    with pytest.raises(FetchError, match="exceeded 2500 bytes"):
+        run_with_server({"/chunked": large_chunked_page}, scenario)
+
+
+def test_per_host_limit(monkeypatch):
+    monkeypatch.setattr(settings, "http_per_host_limit", 2)
+    state = {"active": 0, "peak": 0}
+
+    async def slow_page(request):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.05)
+        state["active"] -= 1
+        return web.Response(text="ok", content_type="text/plain")
+
+    async def scenario(server, fetcher):
+        url = str(server.make_url("/slow"))
+        return await asyncio.gather(*(fetcher.fetch(url) for _ in range(6)))
+
+    results = run_with_server({"/slow": slow_page}, scenario)
+    assert [result.text for result in results] == ["ok"] * 6
+    assert state["peak"] == 2
+
+
+def test_conditional_get_not_modified():
+    async def scenario(server, fetcher):
+        url = str(server.make_url("/page"))
+        first = await fetcher.fetch(url)
+        second = await fetcher.fetch(url, headers={"If-None-Match": first.headers["ETag"]})
+        return first, second
+
+    first, second = run_with_server({"/page": conditional_page}, scenario)
+    assert not first.not_modified
+    assert second.status == 304
+    assert second.not_modified
+    assert second.text == ""
+
+
+def test_scraper_skips_unchanged_page(monkeypatch):
+    async def scenario(server, fetcher):
+        monkeypatch.setattr("services.web_scraper.http_fetcher", fetcher)
+        url = str(server.make_url("/page"))
+        text, error, metadata = await WebScraper.scrape_website(url)
+        assert text and error is None
+        return await WebScraper.scrape_website(url, metadata)
+
+    text, error, metadata = run_with_server({"/page": conditional_page}, scenario)
+    assert text is None and error is None
+    assert metadata["not_modified"] is True
+    assert metadata["etag"] == ETAG
+
+
+def test_rejects_non_text_content():
+    async def scenario(server, fetcher):
+        await fetcher.fetch(str(server.make_url("/logo.png")))
+
+    with pytest.raises(UnsupportedContentError, match="image/png"):
+        run_with_server({"/logo.png": image}, scenario)
+
+
+def test_http_error_status():
+    async def scenario(server, fetcher):
+        await fetcher.fetch(str(server.make_url("/missing")))
+
+    with pytest.raises(FetchError) as excinfo:
+        run_with_server({"/": page}, scenario)
+    assert excinfo.value.status == 404
@@ -0,0 +1,95 @@
+"""Tests for handoff detection: phrase matching and the intent classifier."""
+
+import pytest
+
+from ai.intent import HandoffDetector, KeywordMatcher, detect_handoff_request, handoff_detector, tokenize
+from config import settings
+
+
+@pytest.fixture(autouse=True)
+def default_thresholds(monkeypatch):
+    monkeypatch.setattr(settings, "handoff_intent_threshold", 0.95)
+    monkeypatch.setattr(settings, "frustration_threshold", 0.95)
+
+
+# Cancellations, identity questions, corrections and ordinary requests that
+# share words with handoff requests must stay with the assistant
+NOT_ESCALATED = [
+    "I want to cancel",
+    "i want to cancel my subscription",
+    "who am i talking to?",
+    "who are you",
+    "are you a human?",
+    "are you real",
+    "is this a bot?",
+    "this is wrong",
+    "that's wrong, the price is 20",
+    "what is wrong with my order",
+    "can i speak to sales",
+    "can i talk to you about pricing",
+    "can i talk to sales about a discount",
+    "can i speak english here",
+    "can someone tell me the opening hours",
+    "the agent field is empty",
+    "i want to return an item",
+    "i want to change my plan",
+]
+
+ESCALATED = [
+    ("I want to talk to a person", "keyword"),
+    ("I need a real person", "keyword"),
+    ("I'd like to talk to a live agent", "keyword"),
+    ("can a human help me", "keyword"),
+    ("can I chat with an actual human being?", "intent"),
+    ("connect me to a human please", "intent"),
+    ("let me speak to someone real", "intent"),
+    ("transfer me to an agent", "intent"),
+    ("get me a manager", "intent"),
+    ("put me through to a person please", "intent"),
+    ("this is useless", "frustration"),
+    ("you are not helping at all", "frustration"),
+    ("i am so frustrated", "frustration"),
+    ("this is ridiculous", "frustration"),
+    ("terrible service, nothing works", "frustration"),
+]
+
+
+@pytest.mark.parametrize("message", NOT_ESCALATED)
+def test_not_escalated(message):
+    intent = handoff_detector.detect(message)
+    assert not intent, f"{message!r} escalated ({intent.reason}, scores {intent.scores})"
+    assert not detect_handoff_request(message)
+
+
+@pytest.mark.parametrize("message,reason", ESCALATED)
+def test_escalated(message, reason):
+    intent = handoff_detector.detect(message)
+    assert intent, f"{message!r} not escalated (scores {intent.scores})"
+    assert intent.reason == reason
+
+
+def test_keyword_matcher_matches_whole_words():
+    matcher = KeywordMatcher(["live agent", "human help"])
+    assert matcher.search(tokenize("Can I get a LIVE agent, please?")) == "live agent"
+    assert matcher.search(tokenize("I need some human help")) == "human help"
+    assert matcher.search(tokenize("a deliveagent is not a live-agentx")) is None
+    assert matcher.search(tokenize("")) is None
+
+
+def test_company_handoff_keywords():
+    detector = HandoffDetector()
+    message = "Please forward this to the billing department"
+
+    assert not detector.detect(message)
+    assert not detector.detect(message, company_id=1)
+
+    intent = detector.detect(message, company_id=1, company_keywords=["billing department"])
+    assert intent.reason == "keyword"
+    assert intent.matched_keyword == "billing department"
+
+    # Other companies don't get the phrase; global phrases still apply to the company
+    assert not detector.detect(message, company_id=2, company_keywords=["sales team"])
+    assert detector.detect("talk to a human", company_id=1, company_keywords=["billing department"]).reason == "keyword"
+
+    # Changing the company's phrases takes effect immediately
+    assert not detector.detect(message, company_id=1, company_keywords=["accounts team"])
@@ -0,0 +1,198 @@
+"""Tests for lease-based job claiming, against a temporary SQLite database."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Query, sessionmaker
+
+from config import settings
+from models import Base, Company, Job, JobStatus, JobType, Resource, ResourceType
+from services.job_queue import PRIORITY_HIGH, PRIORITY_LOW, JobQueue
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def job_settings(monkeypatch):
+    monkeypatch.setattr(settings, "job_lease_seconds", 60)
+    monkeypatch.setattr(settings, "job_retry_backoff_seconds", 30)
+    monkeypatch.setattr(settings, "job_per_company_concurrency", 1)
+
+
+def make_resource(db, company_id=None) -> Resource:
+    if company_id is None:
+        number = db.query(Company).count() + 1
+        company = Company(name=f"Company {number}", slug=f"company-{number}", email=f"company{number}@example.com")
+        db.add(company)
+        db.commit()
+        company_id = company.id
+    resource = Resource(company_id=company_id, resource_type=ResourceType.TEXT)
+    db.add(resource)
+    db.commit()
+    return resource
+
+
+def enqueue(db, resource, **kwargs) -> Job:
+    return JobQueue.enqueue(db, JobType.PROCESS_RESOURCE, company_id=resource.company_id, resource_id=resource.id, **kwargs)
+
+
+def expire_lease(db, job):
+    db.query(Job).filter(Job.id == job.id).update({Job.lease_expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+
+def reload(db, job) -> Job:
+    db.expire_all()
+    return db.get(Job, job.id)
+
+
+def test_claim_takes_lease_once(db):
+    job = enqueue(db, make_resource(db))
+
+    claimed = JobQueue.claim_next(db, "worker-1")
+    assert claimed.id == job.id
+    assert claimed.status == JobStatus.RUNNING
+    assert claimed.lease_owner == "worker-1"
+    assert claimed.attempts == 1
+    assert claimed.lease_expires_at > datetime.utcnow()
+
+    assert JobQueue.claim_next(db, "worker-2") is None
+    assert reload(db, job).lease_owner == "worker-1"
+
+
+def test_claim_skips_job_claimed_since_it_was_listed(db, monkeypatch):
+    first = enqueue(db, make_resource(db))
+    second = enqueue(db, make_resource(db))
+
+    # Another worker takes the first job between the candidate query and the UPDATE
+    original_update = Query.update
+    raced = []
+
+    def racing_update(query, values, **kwargs):
+        if not raced:
+            raced.append(True)
+            db.query(Job).filter(Job.id == first.id).update(
+                {Job.status: JobStatus.RUNNING, Job.lease_owner: "worker-2"}, synchronize_session=False
+            )
+        return original_update(query, values, **kwargs)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Query, "update", racing_update)
+        claimed = JobQueue.claim_next(db, "worker-1")
+
+    assert claimed.id == second.id
+    assert reload(db, first).lease_owner == "worker-2"
+    assert reload(db, first).attempts == 0
+
+
+def test_claim_respects_company_concurrency(db):
+    resource = make_resource(db)
+    enqueue(db, resource)
+    enqueue(db, make_resource(db, resource.company_id))
+    other = enqueue(db, make_resource(db), priority=PRIORITY_LOW)
+
+    assert JobQueue.claim_next(db, "worker-1").company_id == resource.company_id
+    assert JobQueue.claim_next(db, "worker-2").id == other.id
+    assert JobQueue.claim_next(db, "worker-3") is None
+
+
+def test_heartbeat_extends_only_the_owners_lease(db):
+    job = enqueue(db, make_resource(db))
+    JobQueue.claim_next(db, "worker-1")
+    expire_lease(db, job)
+
+    assert not JobQueue.heartbeat(db, job.id, "worker-2")
+    assert JobQueue.heartbeat(db, job.id, "worker-1")
+    assert reload(db, job).lease_expires_at > datetime.utcnow()
+
+    # Once recovered, the old owner has lost the lease
+    expire_lease(db, job)
+    assert JobQueue.recover_expired(db) == 1
+    assert not JobQueue.heartbeat(db, job.id, "worker-1")
+
+
+def test_recover_expired_requeues_until_attempts_used_up(db):
+    job = enqueue(db, make_resource(db), max_attempts=2)
+
+    JobQueue.claim_next(db, "worker-1")
+    expire_lease(db, job)
+    assert JobQueue.recover_expired(db) == 1
+    recovered = reload(db, job)
+    assert recovered.status == JobStatus.QUEUED
+    assert recovered.lease_owner is None
+    assert recovered.run_after > datetime.utcnow() - timedelta(seconds=1)
+
+    db.query(Job).filter(Job.id == job.id).update({Job.run_after: datetime.utcnow()})
+    db.commit()
+    JobQueue.claim_next(db, "worker-1")
+    expire_lease(db, job)
+    assert JobQueue.recover_expired(db) == 1
+    failed = reload(db, job)
+    assert failed.status == JobStatus.FAILED
+    assert failed.attempts == 2
+    assert failed.finished_at is not None
+    assert failed.last_error == "Lease expired before the job finished"
+
+
+def test_recover_expired_leaves_live_leases(db):
+    enqueue(db, make_resource(db))
+    JobQueue.claim_next(db, "worker-1")
+    assert JobQueue.recover_expired(db) == 0
+
+
+def test_defer_does_not_use_an_attempt(db):
+    job = enqueue(db, make_resource(db), max_attempts=1)
+    claimed = JobQueue.claim_next(db, "worker-1")
+
+    JobQueue.defer(db, claimed, "worker-1", delay_seconds=120, reason="Waiting for the shared document")
+    deferred = reload(db, job)
+    assert deferred.status == JobStatus.QUEUED
+    assert deferred.attempts == 0
+    assert deferred.lease_owner is None
+    assert deferred.run_after > datetime.utcnow() + timedelta(seconds=100)
+    assert deferred.last_error == "Waiting for the shared document"
+    assert JobQueue.claim_next(db, "worker-1") is None
+
+
+def test_fail_retries_then_fails(db):
+    job = enqueue(db, make_resource(db), max_attempts=2)
+
+    assert JobQueue.fail(db, JobQueue.claim_next(db, "worker-1"), "worker-1", "boom")
+    assert reload(db, job).status == JobStatus.QUEUED
+
+    db.query(Job).filter(Job.id == job.id).update({Job.run_after: datetime.utcnow()})
+    db.commit()
+    assert not JobQueue.fail(db, JobQueue.claim_next(db, "worker-1"), "worker-1", "boom")
+    assert reload(db, job).status == JobStatus.FAILED
+
+
+def test_enqueue_reuses_active_resource_job(db):
+    resource = make_resource(db)
+    job = enqueue(db, resource)
+
+    again = enqueue(db, resource, priority=PRIORITY_HIGH)
+    assert again.id == job.id
+    assert again.priority == PRIORITY_HIGH
+
+    # Still deduplicated while running, but not once finished
+    claimed = JobQueue.claim_next(db, "worker-1")
+    assert enqueue(db, resource).id == job.id
+    JobQueue.complete(db, claimed, "worker-1")
+    assert enqueue(db, resource).id != job.id
+    assert db.query(Job).count() == 2
+
+
+def test_retry_delay_is_full_jitter():
+    delays = [JobQueue.retry_delay(3).total_seconds() for _ in range(200)]
+    assert all(0 <= delay <= 120 for delay in delays)
+    assert min(delays) < 60
+    assert JobQueue.retry_delay(20).total_seconds() <= 3600
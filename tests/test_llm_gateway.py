@@ -0,0 +1,111 @@
+"""Tests for LLM gateway retries, circuit breaking and hedging."""
+
+import asyncio
+
+import pytest
+
+from ai.gateway import CircuitBreaker, CircuitOpenError, LLMGateway
+from ai.providers import GenerationResult, LLMProviderError
+from config import settings
+
+
+class ScriptedProvider:
+    """Provider whose calls sleep and fail as scripted."""
+
+    name = "scripted"
+
+    def __init__(self, delay: float = 0.0, failures: int = 0, retryable: bool = True):
+        self.delay = delay
+        self.failures = failures
+        self.retryable = retryable
+        self.calls = 0
+
+    async def generate(self, message, timeout=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise LLMProviderError("scripted failure", retryable=self.retryable)
+        return GenerationResult(text=f"re: {message}", model="test-model")
+
+
+@pytest.fixture(autouse=True)
+def fast_gateway_settings(monkeypatch):
+    monkeypatch.setattr(settings, "llm_timeout_seconds", 0.2)
+    monkeypatch.setattr(settings, "llm_retry_base_seconds", 0)
+    monkeypatch.setattr(settings, "llm_max_attempts", 3)
+    monkeypatch.setattr(settings, "llm_breaker_failure_threshold", 2)
+    monkeypatch.setattr(settings, "llm_breaker_reset_seconds", 60)
+    monkeypatch.setattr(settings, "llm_hedge_enabled", False)
+
+
+def test_retries_retryable_errors():
+    provider = ScriptedProvider(failures=1)
+    gateway = LLMGateway(provider)
+
+    result = asyncio.run(gateway.generate("hi"))
+    assert result.text == "re: hi"
+    assert provider.calls == 2
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_does_not_retry_fatal_errors():
+    provider = ScriptedProvider(failures=5, retryable=False)
+    gateway = LLMGateway(provider)
+
+    with pytest.raises(LLMProviderError):
+        asyncio.run(gateway.generate("hi"))
+    assert provider.calls == 1
+    assert gateway.breaker.consecutive_failures == 0
+
+
+def test_breaker_opens_and_fails_fast():
+    provider = ScriptedProvider(failures=100)
+    gateway = LLMGateway(provider)
+
+    with pytest.raises(LLMProviderError):
+        asyncio.run(gateway.generate("hi"))
+    assert gateway.breaker.state == CircuitBreaker.OPEN
+    calls = provider.calls
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(gateway.generate("hi"))
+    assert provider.calls == calls
+
+
+def test_hedged_attempt_counts_once_toward_breaker(monkeypatch):
+    monkeypatch.setattr(settings, "llm_hedge_enabled", True)
+    monkeypatch.setattr(settings, "llm_hedge_min_samples", 1)
+    monkeypatch.setattr(settings, "llm_max_attempts", 1)
+    provider = ScriptedProvider(delay=0.01)
+    gateway = LLMGateway(provider)
+    asyncio.run(gateway.generate("warm up"))
+
+    # Primary and hedge both time out: one failed attempt, not two
+    provider.delay = 1.0
+    with pytest.raises(LLMProviderError, match="timed out"):
+        asyncio.run(gateway.generate("hi"))
+    assert provider.calls == 3
+    assert gateway.breaker.consecutive_failures == 1
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_hedge_wins_over_slow_primary(monkeypatch):
+    monkeypatch.setattr(settings, "llm_hedge_enabled", True)
+    monkeypatch.setattr(settings, "llm_hedge_min_samples", 1)
+    monkeypatch.setattr(settings, "llm_timeout_seconds", 1.0)
+
+    class SlowFirstProvider(ScriptedProvider):
+        async def generate(self, message, timeout=None, **kwargs):
+            self.calls += 1
+            await asyncio.sleep(0.5 if self.calls == 2 else 0.01)
+            return GenerationResult(text=f"call {self.calls}", model="test-model")
+
+    provider = SlowFirstProvider()
+    gateway = LLMGateway(provider)
+
+    async def main():
+        await gateway.generate("warm up")
+        return await gateway.generate("hi")
+
+    assert asyncio.run(main()).text == "call 3"
+    assert gateway.breaker.consecutive_failures == 0
@@ -0,0 +1,94 @@
+"""Tests for the chat reply pipeline running offline on the stub LLM provider."""
+
+import asyncio
+
+import pytest
+
+from ai.client import FALLBACK_RESPONSE, AIClient
+from ai.gateway import LLMGateway
+from ai.providers import LLMProviderError, create_provider
+from ai.providers.stub import StubProvider
+from config import settings
+
+
+def instant_stub(**kwargs) -> StubProvider:
+    """A stub that answers without sleeping."""
+    options = {"distribution": "fixed", "latency_ms": 0, "tokens_per_second": 0, "prefill_tokens_per_second": 0}
+    options.update(kwargs)
+    return StubProvider("gemini-1.5-flash", **options)
+
+
+def test_create_provider():
+    assert isinstance(create_provider("stub"), StubProvider)
+    with pytest.raises(ValueError):
+        create_provider("nonexistent")
+
+
+def test_stub_is_deterministic():
+    async def main():
+        provider = instant_stub()
+        first = await provider.generate("What are your opening hours?")
+        second = await provider.generate("What are your opening hours?")
+        streamed = [chunk async for chunk in provider.stream("What are your opening hours?")]
+        return first, second, "".join(streamed)
+
+    first, second, streamed = asyncio.run(main())
+    assert first.text == second.text == streamed
+    assert "What are your opening hours?" in first.text
+    assert first.output_tokens > 0 and first.input_tokens > 0
+
+
+def test_stub_latency_distributions():
+    for distribution in ("fixed", "uniform", "normal", "lognormal"):
+        provider = StubProvider("m", distribution=distribution, latency_ms=100, seed=1)
+        assert all(0 <= provider.first_token_seconds() < 1 for _ in range(50))
+    with pytest.raises(ValueError):
+        StubProvider("m", distribution="bimodal")
+
+
+def test_stub_error_injection():
+    async def main():
+        await instant_stub(error_rate=1.0).generate("hello")
+
+    with pytest.raises(LLMProviderError) as excinfo:
+        asyncio.run(main())
+    assert excinfo.value.retryable
+
+
+def test_stub_cached_context_counts_cached_tokens():
+    async def main():
+        provider = instant_stub()
+        prefix = "Knowledge base. " * 200
+        handle = await provider.create_cached_context(prefix, ttl_seconds=60)
+        cached = await provider.generate("hello", system_instruction=prefix, cached_context=handle)
+        await provider.delete_cached_context(handle)
+        uncached = await provider.generate("hello", system_instruction=prefix, cached_context=handle)
+        return cached, uncached
+
+    cached, uncached = asyncio.run(main())
+    assert cached.cached_tokens > 0
+    assert uncached.cached_tokens == 0
+    assert cached.input_tokens == uncached.input_tokens
+
+
+def test_client_replies_through_gateway(monkeypatch):
+    monkeypatch.setattr(settings, "llm_hedge_enabled", False)
+    provider = instant_stub()
+    client = AIClient(LLMGateway(provider))
+    history = client.build_conversation_context([
+        {"sender_type": "CLIENT", "content": "Hi"},
+        {"sender_type": "AI", "content": "Hello! How can I help?"},
+        {"sender_type": "CLIENT", "content": "Do you ship to Canada?"},
+    ])
+
+    reply = asyncio.run(client.generate_response("Do you ship to Canada?", history))
+    assert reply == provider.reply_for("Do you ship to Canada?")
+
+
+def test_client_falls_back_when_provider_fails(monkeypatch):
+    monkeypatch.setattr(settings, "llm_hedge_enabled", False)
+    monkeypatch.setattr(settings, "llm_max_attempts", 2)
+    monkeypatch.setattr(settings, "llm_retry_base_seconds", 0)
+    client = AIClient(LLMGateway(instant_stub(error_rate=1.0)))
+
+    assert asyncio.run(client.generate_response("Hello")) == FALLBACK_RESPONSE
@@ -0,0 +1,63 @@
+"""Tests for upgrading a database created before the current models."""
+
+import os
+import shutil
+
+from sqlalchemy import create_engine, inspect, text
+
+import models  # noqa: F401  (registers every table on Base.metadata)
+from models.migrations import upgrade_schema
+from utils.blob_store import blob_store
+
+SHIPPED_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chatbot.db")
+
+
+def legacy_engine(tmp_path):
+    """Engine on a copy of the shipped database, which has the original schema."""
+    path = tmp_path / "legacy.db"
+    shutil.copy(SHIPPED_DB, path)
+    return create_engine(f"sqlite:///{path}")
+
+
+def test_adds_missing_columns_and_indexes(tmp_path):
+    engine = legacy_engine(tmp_path)
+    models.Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    inspector = inspect(engine)
+    for table in ("resources", "companies"):
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        expected = {column.name for column in models.Base.metadata.tables[table].columns}
+        assert expected <= existing
+    indexes = {index["name"] for index in inspector.get_indexes("resources")}
+    assert {"ix_resources_document_id", "ix_resources_next_refresh_at", "ix_resources_content_blob_key"} <= indexes
+
+    # Idempotent
+    upgrade_schema(engine)
+
+
+def test_moves_legacy_content_into_blobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "root", str(tmp_path / "blobs"))
+    engine = legacy_engine(tmp_path)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO companies (id, name, slug, email, subscription_plan, is_active) "
+            "VALUES (1, 'Acme', 'acme', 'acme@example.com', 'FREE', 1)"
+        ))
+        connection.execute(text(
+            "INSERT INTO resources (id, company_id, resource_type, extracted_content, status, is_active) "
+            "VALUES (1, 1, 'TEXT', :content, 'COMPLETED', 1)"
+        ), {"content": "Opening hours: nine to five. " * 40})
+
+    models.Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    with engine.connect() as connection:
+        key, length, preview, legacy = connection.execute(text(
+            "SELECT content_blob_key, content_length, content_preview, extracted_content FROM resources"
+        )).one()
+    content = "Opening hours: nine to five. " * 40
+    assert blob_store.get(key) == content
+    assert length == len(content)
+    assert preview == content[:500]
+    assert legacy is None
@@ -0,0 +1,225 @@
+"""Tests for debouncing and cancelling AI replies on the client WebSocket."""
+
+import asyncio
+import json
+import uuid
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from ai.client import ai_client
+from config import settings
+from models.chat import ChatSession, SenderType, SessionState
+from models.company import Company, SubscriptionPlan
+from models.database import SessionLocal, init_db
+from schemas.chat import ClientInfoCreate
+from services import create_session, get_session_messages
+from websocket import client as client_module
+from websocket.client import PendingReply, client_websocket
+
+TIMEOUT = 5.0
+
+
+class FakeWebSocket:
+    """Client socket fed from a queue; AI messages can be held back by a gate."""
+
+    def __init__(self):
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent = []
+        self.delivery_gate = asyncio.Event()
+        self.delivery_gate.set()
+        self.delivering = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+    async def receive_text(self):
+        data = await self.incoming.get()
+        if data is None:
+            raise WebSocketDisconnect()
+        return json.dumps(data)
+
+    async def send_text(self, text):
+        message = json.loads(text)
+        if message["type"] == "message":
+            self.delivering.set()
+            await self.delivery_gate.wait()
+        self.sent.append(message)
+
+    def send(self, content):
+        self.incoming.put_nowait({"content": content})
+
+    def replies(self):
+        return [message["content"] for message in self.sent if message["type"] == "message"]
+
+    async def wait_for(self, message_type, count=1):
+        async def condition():
+            while sum(message["type"] == message_type for message in self.sent) < count:
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(condition(), TIMEOUT)
+
+
+class ScriptedLLM:
+    """Answers each burst with 're: <burst>' once its gate is open."""
+
+    def __init__(self):
+        self.calls = []
+        self.started = asyncio.Event()
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def generate_response(self, message, **kwargs):
+        self.calls.append(message)
+        self.started.set()
+        await self.gate.wait()
+        return f"re: {message}"
+
+
+@pytest.fixture(autouse=True)
+def short_debounce(monkeypatch):
+    monkeypatch.setattr(settings, "chat_debounce_ms", 50)
+    monkeypatch.setattr(settings, "chat_debounce_max_ms", 1000)
+
+
+@pytest.fixture
+def chat_session():
+    """A new chat session in AI state; returns its session_id."""
+    init_db()
+    db = SessionLocal()
+    try:
+        slug = f"acme-{uuid.uuid4().hex[:8]}"
+        company = Company(name="Acme", slug=slug, email=f"{slug}@example.com",
+                          subscription_plan=SubscriptionPlan.ENTERPRISE)
+        db.add(company)
+        db.commit()
+        session = create_session(db, ClientInfoCreate(
+            company_id=company.id, name="Client", email="client@example.com", phone="5550000000"
+        ))
+        return session.session_id
+    finally:
+        db.close()
+
+
+def run_chat(session_id, monkeypatch, scenario):
+    """Run the client endpoint on a fake socket while scenario(socket, llm) drives it."""
+    async def main():
+        llm = ScriptedLLM()
+        monkeypatch.setattr(ai_client, "generate_response", llm.generate_response)
+        socket = FakeWebSocket()
+        db = SessionLocal()
+        endpoint = asyncio.create_task(client_websocket(socket, session_id, db))
+        try:
+            await scenario(socket, llm)
+        finally:
+            socket.incoming.put_nowait(None)
+            await asyncio.wait_for(endpoint, TIMEOUT)
+            db.close()
+        return socket, llm
+
+    return asyncio.run(main())
+
+
+def stored_messages(session_id):
+    db = SessionLocal()
+    try:
+        session = db.query(ChatSession).filter(ChatSession.session_id == session_id).one()
+        messages = [(message.sender_type, message.content) for message in get_session_messages(db, session.id)]
+        return session.state, messages
+    finally:
+        db.close()
+
+
+def test_debounce_is_capped_per_burst(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(client_module.time, "monotonic", lambda: now[0])
+
+    async def main():
+        pending = PendingReply()
+        delays = [pending.debounce_delay()]
+        pending.schedule(asyncio.sleep(10))
+        for step in (0.9, 0.08, 0.1):
+            now[0] += step
+            delays.append(pending.debounce_delay())
+        pending.cancel()
+        # A new burst starts once the pending reply is gone
+        await asyncio.sleep(0)
+        delays.append(pending.debounce_delay())
+        return delays
+
+    assert [round(delay, 3) for delay in asyncio.run(main())] == [0.05, 0.05, 0.02, 0.0, 0.05]
+
+
+def test_quick_messages_get_one_reply(chat_session, monkeypatch):
+    async def scenario(socket, llm):
+        for content in ("Hi", "Do you ship to Canada?", "And to Mexico?"):
+            socket.send(content)
+        await socket.wait_for("message")
+        await asyncio.sleep(0.2)
+
+    socket, llm = run_chat(chat_session, monkeypatch, scenario)
+    burst = "Hi\n\nDo you ship to Canada?\n\nAnd to Mexico?"
+    assert llm.calls == [burst]
+    assert socket.replies() == [f"re: {burst}"]
+    _, messages = stored_messages(chat_session)
+    assert [sender for sender, _ in messages] == [SenderType.CLIENT] * 3 + [SenderType.AI]
+
+
+def test_message_during_generation_restarts_reply(chat_session, monkeypatch):
+    async def scenario(socket, llm):
+        llm.gate.clear()
+        socket.send("Do you ship to Canada?")
+        await asyncio.wait_for(llm.started.wait(), TIMEOUT)
+        socket.send("And to Mexico?")
+        while len(llm.calls) < 2:
+            await asyncio.sleep(0.01)
+        llm.gate.set()
+        await socket.wait_for("message")
+        await asyncio.sleep(0.2)
+
+    socket, llm = run_chat(chat_session, monkeypatch, scenario)
+    burst = "Do you ship to Canada?\n\nAnd to Mexico?"
+    assert llm.calls == ["Do you ship to Canada?", burst]
+    assert socket.replies() == [f"re: {burst}"]
+
+
+def test_saved_reply_is_delivered_after_late_message(chat_session, monkeypatch):
+    async def scenario(socket, llm):
+        socket.delivery_gate.clear()
+        socket.send("Do you ship to Canada?")
+        await asyncio.wait_for(socket.delivering.wait(), TIMEOUT)
+        # The reply is saved and being sent when the next message arrives
+        socket.send("And to Mexico?")
+        await asyncio.sleep(0.2)
+        socket.delivery_gate.set()
+        await socket.wait_for("message", count=2)
+
+    socket, llm = run_chat(chat_session, monkeypatch, scenario)
+    assert socket.replies() == ["re: Do you ship to Canada?", "re: And to Mexico?"]
+    _, messages = stored_messages(chat_session)
+    assert messages == [
+        (SenderType.CLIENT, "Do you ship to Canada?"),
+        (SenderType.AI, "re: Do you ship to Canada?"),
+        (SenderType.CLIENT, "And to Mexico?"),
+        (SenderType.AI, "re: And to Mexico?"),
+    ]
+
+
+def test_handoff_cancels_pending_reply(chat_session, monkeypatch):
+    async def scenario(socket, llm):
+        llm.gate.clear()
+        socket.send("Do you ship to Canada?")
+        await asyncio.wait_for(llm.started.wait(), TIMEOUT)
+        socket.send("I want to talk to a human agent")
+        await socket.wait_for("handoff_requested")
+        llm.gate.set()
+        await asyncio.sleep(0.2)
+
+    socket, llm = run_chat(chat_session, monkeypatch, scenario)
+    assert llm.calls == ["Do you ship to Canada?"]
+    assert socket.replies() == []
+    state, messages = stored_messages(chat_session)
+    assert state == SessionState.HUMAN
+    assert all(sender == SenderType.CLIENT for sender, _ in messages)
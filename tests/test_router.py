@@ -0,0 +1,120 @@
+"""Tests for fast/strong model routing and company model overrides."""
+
+import pytest
+from pydantic import ValidationError
+
+from ai.intent import FRUSTRATION, HANDOFF
+from ai.router import FAST, STRONG, ModelRouter, retrieval_confidence
+from config import settings
+from schemas.company import CompanyUpdate, LLMRoutingSettings
+
+KNOWLEDGE_BASE = "We ship to Canada and Mexico. Opening hours are nine to five on weekdays."
+CALM = {HANDOFF: 0.0, FRUSTRATION: 0.0}
+ALLOWED = ["gemini-1.5-flash-8b", "gemini-1.5-flash", "gemini-1.5-pro"]
+
+
+@pytest.fixture(autouse=True)
+def router_settings(monkeypatch):
+    monkeypatch.setattr(settings, "llm_routing_enabled", True)
+    monkeypatch.setattr(settings, "gemini_model", "gemini-1.5-flash")
+    monkeypatch.setattr(settings, "llm_fast_model", "gemini-1.5-flash-8b")
+    monkeypatch.setattr(settings, "llm_strong_model", None)
+    monkeypatch.setattr(settings, "llm_company_models", ALLOWED)
+    monkeypatch.setattr(settings, "llm_router_long_message_words", 40)
+    monkeypatch.setattr(settings, "llm_router_frustration_threshold", 0.5)
+    monkeypatch.setattr(settings, "llm_router_min_retrieval_confidence", 0.5)
+
+
+@pytest.mark.parametrize("message,knowledge_base,intent_scores,expected", [
+    ("Hi!", None, CALM, (FAST, "simple")),
+    ("Thanks, that's all", KNOWLEDGE_BASE, CALM, (FAST, "simple")),
+    ("Do you ship to Canada?", KNOWLEDGE_BASE, CALM, (FAST, "simple")),
+    ("word " * 39, None, CALM, (FAST, "simple")),
+    ("word " * 40, None, CALM, (STRONG, "length")),
+    ("Do you ship to Canada? And to Mexico?", KNOWLEDGE_BASE, CALM, (STRONG, "multi_part")),
+    ("How do I get a refund?", KNOWLEDGE_BASE, CALM, (STRONG, "topic")),
+    ("My invoice looks odd", None, CALM, (STRONG, "topic")),
+    ("Hi!", None, {HANDOFF: 0.0, FRUSTRATION: 0.5}, (STRONG, "frustration")),
+    ("Hi!", None, {HANDOFF: 0.0, FRUSTRATION: 0.49}, (FAST, "simple")),
+    ("Do you sell gift vouchers online?", KNOWLEDGE_BASE, CALM, (STRONG, "low_retrieval_confidence")),
+    # Too short to judge retrieval, and no knowledge base to judge against
+    ("Gift vouchers?", KNOWLEDGE_BASE, CALM, (FAST, "simple")),
+    ("Do you sell gift vouchers online?", None, CALM, (FAST, "simple")),
+])
+def test_classify(message, knowledge_base, intent_scores, expected):
+    assert ModelRouter().classify(message, knowledge_base, intent_scores) == expected
+
+
+def test_classify_scores_intent_when_not_given():
+    assert ModelRouter().classify("This is useless, nothing works!!") == (STRONG, "frustration")
+
+
+def test_retrieval_confidence():
+    assert retrieval_confidence("Do you ship to Canada?", KNOWLEDGE_BASE) == 1.0
+    assert retrieval_confidence("ship gift vouchers", KNOWLEDGE_BASE) == pytest.approx(1 / 3)
+    assert retrieval_confidence("Do you?", KNOWLEDGE_BASE) is None
+    assert retrieval_confidence("Do you ship to Canada?", None) is None
+
+
+@pytest.mark.parametrize("overrides,expected", [
+    (None, {FAST: "gemini-1.5-flash-8b", STRONG: "gemini-1.5-flash"}),
+    ({"fast_model": "gemini-1.5-flash", "strong_model": "gemini-1.5-pro"},
+     {FAST: "gemini-1.5-flash", STRONG: "gemini-1.5-pro"}),
+    # Models outside llm_company_models fall back to the configured ones
+    ({"fast_model": "gemini-2.0-flash", "strong_model": "gemini-ultra"},
+     {FAST: "gemini-1.5-flash-8b", STRONG: "gemini-1.5-flash"}),
+    ({"strong_model": ""}, {FAST: "gemini-1.5-flash-8b", STRONG: "gemini-1.5-flash"}),
+])
+def test_models_only_apply_allowed_overrides(overrides, expected):
+    assert ModelRouter().models(overrides) == expected
+
+
+def test_model_no_longer_allowed_is_ignored(monkeypatch):
+    overrides = {"strong_model": "gemini-1.5-pro"}
+    assert ModelRouter().models(overrides)[STRONG] == "gemini-1.5-pro"
+
+    # A stored override stops applying once the model is removed from the allowlist
+    monkeypatch.setattr(settings, "llm_company_models", ["gemini-1.5-flash-8b", "gemini-1.5-flash"])
+    assert ModelRouter().models(overrides)[STRONG] == "gemini-1.5-flash"
+
+
+def test_strong_model_setting(monkeypatch):
+    assert ModelRouter().models()[STRONG] == "gemini-1.5-flash"
+    monkeypatch.setattr(settings, "llm_strong_model", "gemini-1.5-pro")
+    assert ModelRouter().models()[STRONG] == "gemini-1.5-pro"
+
+
+@pytest.mark.parametrize("overrides,route,model,reason", [
+    ({"route": "fast"}, FAST, "gemini-1.5-flash-8b", "company_override"),
+    ({"route": "strong", "strong_model": "gemini-1.5-pro"}, STRONG, "gemini-1.5-pro", "company_override"),
+    ({"route": "auto"}, FAST, "gemini-1.5-flash-8b", "simple"),
+    (None, FAST, "gemini-1.5-flash-8b", "simple"),
+])
+def test_route(overrides, route, model, reason):
+    chosen = ModelRouter().route("Hi!", intent_scores=CALM, overrides=overrides)
+    assert (chosen.route, chosen.model, chosen.reason) == (route, model, reason)
+    assert chosen.generation_config["max_output_tokens"] == (512 if route == FAST else 1024)
+
+
+def test_routing_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "llm_routing_enabled", False)
+    chosen = ModelRouter().route("Hi!", intent_scores=CALM)
+    assert (chosen.route, chosen.reason) == (STRONG, "routing_disabled")
+
+    # A company that forces a route still gets it
+    assert ModelRouter().route("Hi!", intent_scores=CALM, overrides={"route": "fast"}).route == FAST
+
+
+@pytest.mark.parametrize("field", ["fast_model", "strong_model"])
+def test_settings_schema_rejects_models_outside_allowlist(field):
+    assert getattr(LLMRoutingSettings(**{field: "gemini-1.5-pro"}), field) == "gemini-1.5-pro"
+    with pytest.raises(ValidationError, match="Model must be one of"):
+        LLMRoutingSettings(**{field: "gemini-2.0-flash"})
+    with pytest.raises(ValidationError):
+        CompanyUpdate(llm_routing={field: "some-expensive-model"})
+
+
+def test_settings_schema_rejects_unknown_route():
+    with pytest.raises(ValidationError):
+        LLMRoutingSettings(route="fastest")
+    assert LLMRoutingSettings().route == "auto"
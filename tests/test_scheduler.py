@@ -0,0 +1,189 @@
+"""Tests for LLM admission control and weighted fair queuing."""
+
+import asyncio
+
+import pytest
+
+from ai import scheduler as scheduler_module
+from ai.scheduler import LLMRequestRejected, LLMScheduler, TokenBucket
+from config import settings
+from models.company import SubscriptionPlan
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def scheduler_settings(monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_concurrency", 1)
+    monkeypatch.setattr(settings, "llm_max_queue_wait_seconds", 5.0)
+    monkeypatch.setattr(settings, "llm_max_queued_per_company", 20)
+
+
+async def queue_requests(scheduler, requests):
+    """Queue (company_id, plan) requests in order; return tasks and the grant order."""
+    order = []
+
+    async def request(company_id, plan):
+        await scheduler.acquire(company_id, plan)
+        order.append(company_id)
+
+    tasks = []
+    for company_id, plan in requests:
+        tasks.append(asyncio.create_task(request(company_id, plan)))
+        await asyncio.sleep(0)
+    return tasks, order
+
+
+async def drain(scheduler, tasks):
+    """Hand the held slot down the queue until every request has been served."""
+    while scheduler.stats()["queued"]:
+        scheduler.release()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    scheduler.release()
+
+
+def test_token_bucket_refills_at_rate(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler_module.time, "monotonic", clock)
+    bucket = TokenBucket(rate_per_second=2.0, capacity=3)
+
+    assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.5
+    assert bucket.take()
+    assert not bucket.take()
+
+    # Never refills past capacity
+    clock.now += 60
+    assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+
+
+def test_rate_limited_beyond_plan_burst():
+    scheduler = LLMScheduler()
+    burst = scheduler_module.PLAN_LIMITS[SubscriptionPlan.FREE]["burst"]
+
+    async def main():
+        for _ in range(burst):
+            await scheduler.acquire(1, SubscriptionPlan.FREE)
+            scheduler.release()
+        await scheduler.acquire(1, SubscriptionPlan.FREE)
+
+    with pytest.raises(LLMRequestRejected) as excinfo:
+        asyncio.run(main())
+    assert excinfo.value.reason == "rate_limited"
+    assert scheduler.stats(1)["companies"][1]["rejected"] == {"rate_limited": 1}
+
+
+def test_queue_full(monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_queued_per_company", 2)
+    scheduler = LLMScheduler()
+
+    async def main():
+        await scheduler.acquire(1, SubscriptionPlan.ENTERPRISE)
+        tasks, _ = await queue_requests(scheduler, [(2, SubscriptionPlan.ENTERPRISE)] * 2)
+        try:
+            await scheduler.acquire(2, SubscriptionPlan.ENTERPRISE)
+        finally:
+            await drain(scheduler, tasks)
+
+    with pytest.raises(LLMRequestRejected) as excinfo:
+        asyncio.run(main())
+    assert excinfo.value.reason == "queue_full"
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_queue_timeout_sheds_request(monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_queue_wait_seconds", 0.01)
+    scheduler = LLMScheduler()
+
+    async def main():
+        await scheduler.acquire(1, SubscriptionPlan.FREE)
+        await scheduler.acquire(2, SubscriptionPlan.FREE)
+
+    with pytest.raises(LLMRequestRejected) as excinfo:
+        asyncio.run(main())
+    assert excinfo.value.reason == "queue_timeout"
+    assert scheduler.stats()["queued"] == 0
+    assert scheduler.stats()["in_flight"] == 1
+
+
+def test_fair_queue_serves_by_plan_weight():
+    scheduler = LLMScheduler()
+
+    async def main():
+        await scheduler.acquire(0, SubscriptionPlan.FREE)
+        # Both companies queue 4 requests; FREE's burst arrives first
+        tasks, order = await queue_requests(
+            scheduler,
+            [(1, SubscriptionPlan.FREE)] * 4 + [(2, SubscriptionPlan.PREMIUM)] * 4,
+        )
+        await drain(scheduler, tasks)
+        return order
+
+    # Weight 4 vs 1: PREMIUM's four requests finish by the time FREE's first does
+    assert asyncio.run(main()) == [2, 2, 2, 1, 2, 1, 1, 1]
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_shed_requests_do_not_deprioritize_company(monkeypatch):
+    scheduler = LLMScheduler()
+
+    async def main():
+        await scheduler.acquire(0, SubscriptionPlan.ENTERPRISE)
+
+        monkeypatch.setattr(settings, "llm_max_queue_wait_seconds", 0.01)
+        shed = [scheduler.acquire(1, SubscriptionPlan.ENTERPRISE) for _ in range(15)]
+        results = await asyncio.gather(*shed, return_exceptions=True)
+        assert all(isinstance(result, LLMRequestRejected) for result in results)
+
+        monkeypatch.setattr(settings, "llm_max_queue_wait_seconds", 5.0)
+        tasks, order = await queue_requests(
+            scheduler,
+            [(1, SubscriptionPlan.ENTERPRISE), (2, SubscriptionPlan.ENTERPRISE)],
+        )
+        await drain(scheduler, tasks)
+        return order
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_abandoned_waiter_moves_later_waiters_up():
+    scheduler = LLMScheduler()
+
+    async def main():
+        await scheduler.acquire(0, SubscriptionPlan.FREE)
+        tasks, order = await queue_requests(
+            scheduler,
+            [(1, SubscriptionPlan.FREE)] * 3 + [(2, SubscriptionPlan.FREE)],
+        )
+        # Company 1's first request gives up; its other two keep their place
+        tasks[0].cancel()
+        await asyncio.sleep(0)
+        await drain(scheduler, tasks)
+        return order
+
+    assert asyncio.run(main()) == [1, 2, 1]
+
+
+def test_slot_granted_during_cancellation_is_released():
+    scheduler = LLMScheduler()
+
+    async def main():
+        await scheduler.acquire(1, SubscriptionPlan.FREE)
+        waiting = asyncio.create_task(scheduler.acquire(2, SubscriptionPlan.FREE))
+        await asyncio.sleep(0)
+
+        # The slot is handed over, but the caller is cancelled before it resumes
+        scheduler.release()
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(main())
+    assert scheduler.stats()["in_flight"] == 0
+    assert scheduler.stats()["queued"] == 0
@@ -0,0 +1,89 @@
+"""Tests for span tracing and its background file writer."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from config import settings
+from utils.tracing import Tracer, parse_traceparent
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = Tracer()
+    tracer.enabled = True
+    tracer.sample_rate = 1.0
+    tracer.path = str(tmp_path / "traces.jsonl")
+    return tracer
+
+
+def read_spans(path, count, timeout=3.0):
+    """Wait for the writer thread to append count spans, then return them."""
+    deadline = time.monotonic() + timeout
+    spans = []
+    while time.monotonic() < deadline:
+        try:
+            with open(path, encoding="utf-8") as trace_file:
+                spans = [json.loads(line) for line in trace_file]
+        except FileNotFoundError:
+            pass
+        if len(spans) >= count:
+            break
+        time.sleep(0.02)
+    return spans
+
+
+def test_spans_nest_under_trace(tracer):
+    trace_id = "0af7651916cd43dd8448eb211c80319c"
+    with tracer.trace("ws.client.message", trace_id, session_id="abc") as root:
+        with tracer.span("db.create_message") as child:
+            assert tracer.current_trace_id() == trace_id
+    tracer.flush()
+
+    spans = {span["name"]: span for span in read_spans(tracer.path, 2)}
+    assert spans["db.create_message"]["parent_id"] == root.span_id
+    assert spans["db.create_message"]["span_id"] == child.span_id
+    assert spans["ws.client.message"]["trace_id"] == trace_id
+    assert spans["ws.client.message"]["attributes"] == {"session_id": "abc"}
+
+
+def test_spans_are_written_off_the_calling_thread(tracer, monkeypatch):
+    monkeypatch.setattr(settings, "tracing_flush_batch", 2)
+    writers = []
+    flush = tracer.flush
+
+    def recording_flush():
+        writers.append(threading.current_thread())
+        flush()
+
+    monkeypatch.setattr(tracer, "flush", recording_flush)
+    with tracer.trace("root"):
+        with tracer.span("child"):
+            pass
+
+    assert len(read_spans(tracer.path, 2)) == 2
+    assert writers and threading.current_thread() not in writers
+
+
+def test_partial_batch_is_written_within_interval(tracer):
+    with tracer.trace("root"):
+        pass
+    assert [span["name"] for span in read_spans(tracer.path, 1)] == ["root"]
+
+
+def test_no_spans_outside_trace_or_when_disabled(tracer):
+    with tracer.span("orphan") as span:
+        assert span is None
+    tracer.enabled = False
+    with tracer.trace("root") as span:
+        assert span is None
+
+
+def test_parse_traceparent():
+    assert parse_traceparent("00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01") == (
+        "0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331"
+    )
+    assert parse_traceparent("garbage") == (None, None)
+    assert parse_traceparent(None) == (None, None)
@@ -1,3 +1,4 @@
 from .queue import session_queue, SessionQueue
+from .process_pool import get_process_pool, shutdown_process_pool
 
-__all__ = ["session_queue", "SessionQueue"]
+__all__ = ["session_queue", "SessionQueue", "get_process_pool", "shutdown_process_pool"]
@@ -0,0 +1,147 @@
+"""Content-addressed, compressed file store for large text blobs."""
+
+from typing import Iterable, Optional, Tuple
+import hashlib
+import logging
+import os
+import time
+import uuid
+import zlib
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads", "blobs")
+
+
+class BlobStore:
+    """
+    Stores text as zlib-compressed files named by the SHA-256 of the text.
+
+    Identical text is stored once, and writing it again only refreshes the
+    file's modification time, so blobs can be shared by any number of rows.
+    That time marks blobs a writer may still be about to reference (see
+    delete_unused).
+    """
+
+    def __init__(self, root: str = BLOB_DIR):
+        self.root = root
+
+    def path_for_key(self, key: str) -> str:
+        """Get the file path of a blob (fanned out by key prefix)."""
+        return os.path.join(self.root, key[:2], f"{key}.z")
+
+    def put(self, text: str) -> str:
+        """
+        Store text and return its key.
+
+        Args:
+            text: Text to store
+
+        Returns:
+            SHA-256 hex digest of the UTF-8 text
+        """
+        data = text.encode("utf-8")
+        key = hashlib.sha256(data).hexdigest()
+        path = self.path_for_key(key)
+        if os.path.exists(path):
+            try:
+                os.utime(path)
+                return key
+            except FileNotFoundError:
+                pass  # Deleted since we looked; write it again
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write under a unique name and rename so readers never see a partial blob
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(zlib.compress(data, settings.blob_compression_level))
+        os.replace(temp_path, path)
+        return key
+
+    def put_chunks(self, chunks: Iterable[str]) -> Tuple[str, int]:
+        """
+        Store text given as a sequence of pieces, without joining it in memory.
+
+        The pieces are hashed and compressed as they arrive, so the key is the
+        same as put() would give for the joined text.
+
+        Args:
+            chunks: Consecutive pieces of the text
+
+        Returns:
+            Tuple of (key, character count)
+        """
+        digest = hashlib.sha256()
+        compressor = zlib.compressobj(settings.blob_compression_level)
+        length = 0
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = os.path.join(self.root, f"{uuid.uuid4().hex}.tmp")
+        try:
+            with open(temp_path, "wb") as file:
+                for chunk in chunks:
+                    data = chunk.encode("utf-8")
+                    digest.update(data)
+                    file.write(compressor.compress(data))
+                    length += len(chunk)
+                file.write(compressor.flush())
+
+            key = digest.hexdigest()
+            path = self.path_for_key(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return key, length
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Load the text stored under a key.
+
+        Args:
+            key: Blob key returned by put
+
+        Returns:
+            The text, or None if the blob is missing or unreadable
+        """
+        try:
+            with open(self.path_for_key(key), "rb") as file:
+                return zlib.decompress(file.read()).decode("utf-8")
+        except (OSError, zlib.error) as e:
+            logger.error(f"Failed to read blob {key}: {str(e)}")
+            return None
+
+    def delete_unused(self, key: str, grace_seconds: float) -> bool:
+        """
+        Delete a blob no row references, unless it was written in the last grace_seconds.
+
+        A recent write may come from a transaction that has not committed the
+        row referencing it yet, so such blobs are kept.
+
+        Returns:
+            True if the blob was deleted
+        """
+        try:
+            age = time.time() - os.path.getmtime(self.path_for_key(key))
+        except OSError:
+            return False
+        if age < grace_seconds:
+            logger.info(f"Keeping blob {key}: written {age:.0f}s ago, may be in use")
+            return False
+        self.delete(key)
+        return True
+
+    def delete(self, key: str):
+        """Delete a blob if it exists."""
+        try:
+            os.remove(self.path_for_key(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Failed to delete blob {key}: {str(e)}")
+
+
+# Global blob store instance
+blob_store = BlobStore()
@@ -0,0 +1,354 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain Python objects updated in place,
+so recording a sample on the message path costs a dict lookup and an
+addition. Updates are not locked: they happen on the event loop or, for DB
+pool checkouts, in threadpool threads where a rare lost increment is an
+acceptable price for staying lock-free.
+
+Values owned by other components (cache and scheduler counters) are read at
+scrape time through collectors instead of being mirrored on every update.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond handlers to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+QUEUE_WAIT_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (name, type, help, [(labels, value), ...]) as returned by collectors
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, object], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, object]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * len(upper_bounds)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        # Per-bucket counts; made cumulative only when rendering
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of a with-block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Metric:
+    """A named metric with optional labels; each label combination is a child."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        """
+        Get the child for one combination of label values.
+
+        Label values can be given positionally (in labelnames order) or by name.
+        """
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def remove(self, *values):
+        """Drop the child for a label combination (e.g. a company with no connections left)."""
+        self._children.pop(tuple(str(value) for value in values), None)
+
+    def _samples(self) -> Iterable[Tuple[str, Dict[str, object], float]]:
+        for key, child in list(self._children.items()):
+            yield self.name, dict(zip(self.labelnames, key)), child.value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self._samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._children[()].dec(amount)
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.upper_bounds = tuple(sorted(buckets)) + (float("inf"),)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def time(self):
+        return self._children[()].time()
+
+    def _samples(self) -> Iterable[Tuple[str, Dict[str, object], float]]:
+        for key, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for upper_bound, count in zip(self.upper_bounds, list(child.counts)):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(upper_bound)}, cumulative
+            yield f"{self.name}_sum", labels, child.sum
+            yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """Holds every metric and collector and renders them for a scrape."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        """
+        Add a callable that reports metric families at scrape time.
+
+        Args:
+            collector: Returns (name, type, help, [(labels, value), ...]) tuples
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
+
+# HTTP
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "REST request latency by route template",
+    ("method", "route", "status")
+)
+
+# WebSockets and the handoff queue
+WS_CONNECTIONS = metrics.gauge(
+    "websocket_connections", "Open WebSocket connections", ("company_id", "role")
+)
+SESSION_QUEUE_WAIT_SECONDS = metrics.histogram(
+    "session_queue_wait_seconds", "Time sessions waited in the handoff queue before an agent took them",
+    buckets=QUEUE_WAIT_BUCKETS
+)
+
+# Chat replies
+CHAT_AI_REPLIES = metrics.counter(
+    "chat_ai_replies_total", "AI reply generations by result (sent, superseded, shed)", ("result",)
+)
+CHAT_MESSAGES_PER_REPLY = metrics.histogram(
+    "chat_messages_per_ai_reply", "Client messages answered by one AI reply", buckets=(1, 2, 3, 4, 6, 10)
+)
+
+# LLM provider calls
+LLM_REQUEST_SECONDS = metrics.histogram(
+    "llm_request_duration_seconds", "LLM call latency", ("provider", "route", "model", "outcome"), buckets=LLM_BUCKETS
+)
+LLM_ERRORS = metrics.counter("llm_errors_total", "Failed LLM calls by error kind", ("provider", "error"))
+LLM_IN_FLIGHT = metrics.gauge("llm_requests_in_flight", "LLM calls currently awaiting a response")
+LLM_TOKENS = metrics.counter("llm_tokens_total", "LLM tokens used", ("provider", "model", "direction"))
+LLM_COST = metrics.counter("llm_cost_usd_total", "Estimated LLM spend in USD", ("provider", "route", "model"))
+LLM_ROUTE_DECISIONS = metrics.counter("llm_route_decisions_total", "Model routing decisions", ("route", "reason"))
+CONTEXT_CACHE_REQUESTS = metrics.counter(
+    "llm_context_cache_requests_total", "Company prompt prefix lookups (hit, miss, refresh, expired)", ("result",)
+)
+LLM_RETRIES = metrics.counter("llm_retries_total", "LLM attempts retried after a retryable error", ("provider",))
+LLM_HEDGES = metrics.counter("llm_hedged_requests_total", "Hedged LLM requests fired and won", ("provider", "result"))
+LLM_QUEUE_WAIT_SECONDS = metrics.histogram(
+    "llm_scheduler_wait_seconds", "Time admitted LLM requests waited for a slot", ("company_id",),
+    buckets=WAIT_BUCKETS
+)
+
+# Database
+DB_POOL_CHECKOUT_SECONDS = metrics.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection", buckets=WAIT_BUCKETS
+)
+
+# Resource ingestion
+RESOURCE_STAGE_SECONDS = metrics.histogram(
+    "resource_stage_duration_seconds", "Resource processing time per stage", ("resource_type", "stage"),
+    buckets=STAGE_BUCKETS
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording REST latency per route template.
+
+    Routes are labelled by their path template (e.g. /api/chat/{session_id})
+    so ids in URLs do not create new series; requests that match no route are
+    labelled "unmatched". WebSocket traffic is counted by the connection
+    manager instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], route.path if route is not None else "unmatched", status_code
+            ).observe(time.perf_counter() - start)
+
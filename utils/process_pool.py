@@ -0,0 +1,55 @@
+"""Shared process pool for CPU-heavy extraction work."""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import multiprocessing
+import logging
+import os
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker(memory_limit_mb: int):
+    """Cap the address space of an extraction worker so one bad file cannot exhaust memory."""
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        # Not supported on this platform (e.g. Windows); run uncapped
+        pass
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get the shared extraction process pool, creating it on first use."""
+    global _pool
+    if _pool is not None and getattr(_pool, "_broken", False):
+        # A worker died (e.g. hit its memory cap); replace the unusable pool
+        logger.warning("Extraction process pool is broken, restarting it")
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    if _pool is None:
+        workers = settings.extraction_pool_workers or os.cpu_count() or 1
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(settings.extraction_worker_memory_mb,),
+            max_tasks_per_child=settings.extraction_worker_max_tasks,
+        )
+        logger.info(f"Started extraction process pool with {workers} workers")
+    return _pool
+
+
+def shutdown_process_pool():
+    """Shut down the shared process pool."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
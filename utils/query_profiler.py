@@ -0,0 +1,235 @@
+"""
+SQLAlchemy query profiler.
+
+Opt-in (QUERY_PROFILER_ENABLED) instrumentation that times every statement
+through the engine's cursor events and attributes it to the current unit of
+work: one REST request or one WebSocket message. Statements are normalized
+(literals and IN-lists collapsed) so the same query with different values
+is counted together.
+
+- Statements slower than query_slow_ms are logged with the unit they ran in.
+- A SELECT repeated query_n_plus_one_threshold times or more within one unit
+  is logged as a likely N+1 pattern.
+- Per-statement totals, recent slow queries and N+1 findings are kept for
+  the debug endpoint.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_current_unit: ContextVar[Optional["QueryUnit"]] = ContextVar("query_unit", default=None)
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Reduce a statement to its shape: literals become ?, IN-lists become IN (?).
+
+    Args:
+        statement: SQL text as sent to the driver
+
+    Returns:
+        Single-line normalized statement
+    """
+    statement = _STRING_RE.sub("?", statement)
+    statement = _NUMBER_RE.sub("?", statement)
+    statement = _IN_LIST_RE.sub("IN (?)", statement)
+    return _WHITESPACE_RE.sub(" ", statement).strip()
+
+
+class QueryUnit:
+    """Queries issued while handling one request or WebSocket message."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total_seconds = 0.0
+        self.statements: Counter = Counter()
+        self.token = None
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.statements[statement] += 1
+
+
+class _StatementStats:
+    __slots__ = ("count", "total_seconds", "max_seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+
+class QueryProfiler:
+    """Collects query timings from engine events and reports per unit of work."""
+
+    def __init__(self, history: int = 100):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._statements: Dict[str, _StatementStats] = {}
+        self._slow_queries: deque = deque(maxlen=history)
+        self._n_plus_one: deque = deque(maxlen=history)
+
+    def install(self, engine: Engine):
+        """Attach the cursor event listeners to an engine and start profiling."""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        self.enabled = True
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        normalized = normalize_sql(statement)
+        unit = _current_unit.get()
+        if unit is not None:
+            unit.record(normalized, elapsed)
+
+        with self._lock:
+            stats = self._statements.get(normalized)
+            if stats is None:
+                stats = self._statements[normalized] = _StatementStats()
+            stats.count += 1
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+
+        if elapsed * 1000 >= settings.query_slow_ms:
+            origin = unit.name if unit is not None else "background"
+            logger.warning(f"Slow query ({elapsed * 1000:.1f} ms) in {origin}: {normalized}")
+            with self._lock:
+                self._slow_queries.append({
+                    "unit": origin,
+                    "statement": normalized,
+                    "duration_ms": round(elapsed * 1000, 2),
+                    "at": time.time(),
+                })
+
+    def begin(self, name: str) -> Optional[QueryUnit]:
+        """Start a unit of work in the current context (None when profiling is off)."""
+        if not self.enabled:
+            return None
+        unit = QueryUnit(name)
+        unit.token = _current_unit.set(unit)
+        return unit
+
+    def end(self, unit: Optional[QueryUnit]):
+        """Finish a unit of work and check it for repeated statements."""
+        if unit is None:
+            return
+        _current_unit.reset(unit.token)
+        for statement, count in unit.statements.items():
+            if count >= settings.query_n_plus_one_threshold and statement.upper().startswith("SELECT"):
+                logger.warning(f"Possible N+1 in {unit.name}: statement ran {count} times: {statement}")
+                with self._lock:
+                    self._n_plus_one.append({
+                        "unit": unit.name,
+                        "statement": statement,
+                        "count": count,
+                        "at": time.time(),
+                    })
+
+    @contextmanager
+    def unit(self, name: str):
+        """Profile the queries of a with-block as one unit of work."""
+        unit = self.begin(name)
+        try:
+            yield unit
+        finally:
+            self.end(unit)
+
+    def report(self, limit: int = 20) -> dict:
+        """
+        Get the most expensive statements, recent slow queries and N+1 findings.
+
+        Args:
+            limit: Number of statements to return, by total time
+
+        Returns:
+            Profiling report
+        """
+        with self._lock:
+            top = sorted(self._statements.items(), key=lambda item: item[1].total_seconds, reverse=True)[:limit]
+            return {
+                "enabled": self.enabled,
+                "slow_query_ms": settings.query_slow_ms,
+                "statements": [
+                    {
+                        "statement": statement,
+                        "count": stats.count,
+                        "total_ms": round(stats.total_seconds * 1000, 2),
+                        "avg_ms": round(stats.total_seconds * 1000 / stats.count, 3),
+                        "max_ms": round(stats.max_seconds * 1000, 2),
+                    }
+                    for statement, stats in top
+                ],
+                "slow_queries": list(self._slow_queries),
+                "n_plus_one": list(self._n_plus_one),
+            }
+
+    def reset(self):
+        """Clear accumulated statistics."""
+        with self._lock:
+            self._statements.clear()
+            self._slow_queries.clear()
+            self._n_plus_one.clear()
+
+
+class QueryProfilerMiddleware:
+    """
+    ASGI middleware that makes each HTTP request one profiled unit of work.
+
+    In debug mode the request's query count and time are added to the
+    response as X-DB-Query-Count and a Server-Timing "db" entry.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not query_profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        unit = query_profiler.begin(f"{scope['method']} {scope['path']}")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                if route is not None:
+                    unit.name = f"{scope['method']} {route.path}"
+                if settings.debug:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(unit.count).encode()))
+                    headers.append((b"server-timing", f'db;dur={unit.total_seconds * 1000:.2f};desc="{unit.count} queries"'.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_profiler.end(unit)
+
+
+# Global profiler instance (installed on the engine when enabled)
+query_profiler = QueryProfiler()
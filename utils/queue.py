@@ -2,6 +2,7 @@ from typing import Dict, List
 from collections import deque
 import asyncio
 from datetime import datetime
+from utils.metrics import SESSION_QUEUE_WAIT_SECONDS
 
 
 class SessionQueue:
@@ -23,10 +24,13 @@ class SessionQueue:
     def remove_session(self, session_id: str):
         """Remove a session from the queue."""
         if session_id in self._session_set:
-            self._queue = deque([
-                item for item in self._queue 
-                if item["session_id"] != session_id
-            ])
+            remaining = deque()
+            for item in self._queue:
+                if item["session_id"] == session_id:
+                    self._observe_wait(item)
+                else:
+                    remaining.append(item)
+            self._queue = remaining
             self._session_set.discard(session_id)
     
     def get_next_session(self) -> str:
@@ -34,9 +38,15 @@ class SessionQueue:
         if self._queue:
             item = self._queue.popleft()
             self._session_set.discard(item["session_id"])
+            self._observe_wait(item)
             return item["session_id"]
         return None
     
+    @staticmethod
+    def _observe_wait(item: Dict):
+        """Record how long a session waited before leaving the queue."""
+        SESSION_QUEUE_WAIT_SECONDS.observe((datetime.utcnow() - item["queued_at"]).total_seconds())
+    
     def peek_next(self) -> str:
         """Peek at the next session without removing it."""
         if self._queue:
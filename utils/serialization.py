@@ -0,0 +1,44 @@
+"""Fast JSON encoding for REST list responses and WebSocket frames."""
+
+from functools import lru_cache
+from typing import Any, Iterable, List, Type
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+def dumps(obj: Any) -> str:
+    """
+    Encode an object as compact JSON text with orjson.
+
+    Handles datetimes, enums and UUIDs natively, which json.dumps (used by
+    Starlette's send_json) does not.
+    """
+    return orjson.dumps(obj).decode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """Get the compiled TypeAdapter for a list of a response model (built once per model)."""
+    return TypeAdapter(List[model])
+
+
+def list_response(model: Type[BaseModel], items: Iterable[Any]) -> Response:
+    """
+    Serialize ORM objects as a JSON list of a response model.
+
+    Validation and encoding both run in pydantic-core straight to bytes,
+    skipping FastAPI's per-item validate/serialize/jsonable round trip.
+    Routes keep response_model for the OpenAPI schema.
+
+    Args:
+        model: Pydantic response model (with from_attributes)
+        items: ORM objects or dicts to serialize
+
+    Returns:
+        application/json response
+    """
+    adapter = list_adapter(model)
+    body = adapter.dump_json(adapter.validate_python(list(items), from_attributes=True))
+    return Response(content=body, media_type="application/json")
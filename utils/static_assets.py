@@ -0,0 +1,215 @@
+"""
+Static asset pipeline for the widget and dashboard frontend.
+
+At startup every script and stylesheet in frontend/ is minified, given a
+content-hashed name and precompressed with gzip (and brotli when the
+Brotli package is installed). HTML pages are rewritten to reference the
+hashed names. Responses are then served from memory with ETags and
+Accept-Encoding negotiation.
+"""
+
+from typing import Dict, Optional
+import gzip
+import hashlib
+import logging
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip variants are built
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
+
+CONTENT_TYPES = {
+    ".js": "application/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+}
+
+MIN_COMPRESS_BYTES = 256  # Smaller bodies are not worth a compressed variant
+
+CSS_STRING = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''
+CSS_COMMENT_RE = re.compile(rf'({CSS_STRING})|/\*.*?\*/', re.S)
+CSS_SPACE_RE = re.compile(rf'({CSS_STRING})|\s+')
+CSS_TIGHT_AFTER = set("{};,>:")  # Whitespace after these is never significant
+CSS_TIGHT_BEFORE = set("{};,>")
+ASSET_REF_RE = re.compile(r'(\b(?:src|href)=")/?([\w.-]+\.(?:js|css))(")')
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and collapse whitespace outside of string literals."""
+    def collapse(match):
+        if match.group(1):
+            return match.group(1)
+        before = match.string[match.start() - 1] if match.start() > 0 else "{"
+        after = match.string[match.end()] if match.end() < len(match.string) else "}"
+        return "" if before in CSS_TIGHT_AFTER or after in CSS_TIGHT_BEFORE else " "
+
+    css = CSS_COMMENT_RE.sub(lambda match: match.group(1) or "", css)
+    return CSS_SPACE_RE.sub(collapse, css).strip()
+
+
+def minify_js(js: str) -> str:
+    """
+    Conservatively minify JavaScript line by line.
+
+    Drops indentation, blank lines and whole-line comments but never joins
+    lines, so automatic semicolon insertion is unaffected. Lines inside
+    template literals are kept verbatim.
+    """
+    lines = []
+    in_template = False
+    in_comment = False
+    for line in js.splitlines():
+        stripped = line.strip()
+        if in_template:
+            lines.append(line)
+        elif in_comment:
+            in_comment = "*/" not in stripped
+            continue
+        elif stripped.startswith("/*"):
+            in_comment = "*/" not in stripped
+            continue
+        elif stripped.startswith("//") or not stripped:
+            continue
+        else:
+            lines.append(stripped)
+        # An odd number of unescaped backticks opens or closes a template literal
+        if (line.count("`") - line.count("\\`")) % 2:
+            in_template = not in_template
+    return "\n".join(lines) + "\n"
+
+
+class StaticAsset:
+    """A built asset: its hashed URL and its identity and precompressed bodies."""
+
+    def __init__(self, name: str, body: bytes):
+        self.name = name
+        self.content_type = CONTENT_TYPES[os.path.splitext(name)[1]]
+        self.version = hashlib.sha256(body).hexdigest()[:12]
+        self.etag = f'"{self.version}"'
+        base, ext = os.path.splitext(name)
+        self.hashed_name = f"{base}.{self.version}{ext}"
+        self.url = f"/assets/{self.hashed_name}"
+
+        self.bodies: Dict[str, bytes] = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body, quality=11)
+
+    def etag_for(self, encoding: str) -> str:
+        """ETag of one encoded representation (each encoding is a distinct entity)."""
+        return self.etag if encoding == "identity" else f'"{self.version}-{encoding}"'
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available) -> str:
+    """
+    Pick the best available content coding for an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Request Accept-Encoding header value
+        available: Encodings the asset has bodies for
+
+    Returns:
+        "br", "gzip" or "identity"
+    """
+    if not accept_encoding:
+        return "identity"
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip().lower()] = quality
+
+    # Highest q-value wins; ties prefer the smaller encoding
+    best, best_weight = "identity", weights.get("identity", weights.get("*", 1.0))
+    for coding in ("gzip", "br"):
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if coding in available and weight > 0 and weight >= best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class StaticAssetPipeline:
+    """
+    Builds and holds the processed frontend assets.
+
+    Scripts and stylesheets are addressable by their plain name (what
+    existing embeds use) and by their content-hashed name, which is served
+    as immutable. Pages are rewritten to point at the hashed names.
+    """
+
+    def __init__(self, source_dir: str = FRONTEND_DIR):
+        self.source_dir = source_dir
+        self._assets: Dict[str, StaticAsset] = {}
+        self._by_hashed_name: Dict[str, StaticAsset] = {}
+        self._built = False
+
+    def build(self):
+        """Minify, fingerprint and compress every asset in the source directory."""
+        assets: Dict[str, StaticAsset] = {}
+        if os.path.isdir(self.source_dir):
+            names = sorted(os.listdir(self.source_dir))
+            for name in names:
+                ext = os.path.splitext(name)[1]
+                if ext not in (".js", ".css"):
+                    continue
+                with open(os.path.join(self.source_dir, name), encoding="utf-8") as file:
+                    source = file.read()
+                text = minify_js(source) if ext == ".js" else minify_css(source)
+                assets[name] = StaticAsset(name, text.encode("utf-8"))
+
+            # Pages go last so their references resolve to the hashed names
+            for name in names:
+                if not name.endswith(".html"):
+                    continue
+                with open(os.path.join(self.source_dir, name), encoding="utf-8") as file:
+                    page = self._rewrite_references(file.read(), assets)
+                assets[name] = StaticAsset(name, page.encode("utf-8"))
+
+        self._assets = assets
+        self._by_hashed_name = {asset.hashed_name: asset for asset in assets.values()}
+        self._built = True
+
+        raw = sum(os.path.getsize(os.path.join(self.source_dir, name)) for name in assets)
+        served = sum(len(asset.bodies.get("br") or asset.bodies.get("gzip") or asset.bodies["identity"]) for asset in assets.values())
+        logger.info(f"Built {len(assets)} static assets ({raw} bytes -> {served} bytes compressed)")
+
+    @staticmethod
+    def _rewrite_references(page: str, assets: Dict[str, StaticAsset]) -> str:
+        """Point src/href attributes of local scripts and stylesheets at their hashed URLs."""
+        def replace(match):
+            asset = assets.get(match.group(2))
+            if asset is None:
+                return match.group(0)
+            return f"{match.group(1)}{asset.url}{match.group(3)}"
+
+        return ASSET_REF_RE.sub(replace, page)
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        """Get an asset by its plain name."""
+        if not self._built:
+            self.build()
+        return self._assets.get(name)
+
+    def get_hashed(self, hashed_name: str) -> Optional[StaticAsset]:
+        """Get an asset by its content-hashed name."""
+        if not self._built:
+            self.build()
+        return self._by_hashed_name.get(hashed_name)
+
+
+# Global static asset pipeline
+static_assets = StaticAssetPipeline()
@@ -0,0 +1,221 @@
+"""
+Lightweight span tracing.
+
+A trace is started for each REST request and each WebSocket message, and
+nested spans time the steps inside it (DB writes, handoff detection, LLM
+queueing and the Gemini call, sends). The current span lives in a context
+variable, so spans nest across awaits without being passed around.
+
+Trace ids are propagated in both directions: REST calls accept a W3C
+traceparent header and answer with X-Trace-Id, and WebSocket frames accept
+a "trace_id" field and carry it on every frame sent while handling them.
+
+Finished spans are buffered and appended to settings.tracing_file as JSON
+lines by a background thread, so the event loop never waits on the file;
+scripts/trace_summary.py turns them into per-span percentiles.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from config import settings
+from utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+TRACE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+FLUSH_INTERVAL_SECONDS = 1.0
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def parse_traceparent(header: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Read the trace id and parent span id from a W3C traceparent header.
+
+    Returns:
+        Tuple of (trace_id, parent_span_id), both None if the header is missing or invalid
+    """
+    match = TRACEPARENT_RE.match((header or "").strip().lower())
+    if not match:
+        return None, None
+    return match.group(1), match.group(2)
+
+
+class Span:
+    """One timed step of a trace."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "_started", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        """Add attributes to the span."""
+        self.attributes.update(attributes)
+
+    def to_record(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Tracer:
+    """Creates spans and exports finished ones to a JSONL file."""
+
+    def __init__(self):
+        self.enabled = settings.tracing_enabled
+        self.path = settings.tracing_file
+        self.sample_rate = settings.tracing_sample_rate
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Keeps batches from interleaving in the file
+        self._wakeup = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    @contextmanager
+    def _run(self, span: Span):
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            self._export(span)
+
+    @contextmanager
+    def trace(self, name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None, **attributes):
+        """
+        Start a new trace (or continue a remote one) for a unit of work.
+
+        Args:
+            name: Root span name
+            trace_id: Trace id received from the caller; a new one is made if missing or invalid
+            parent_id: Caller's span id, if any
+            **attributes: Span attributes
+
+        Yields:
+            The root Span, or None when tracing is off or the trace is not sampled
+        """
+        if trace_id is not None and not (isinstance(trace_id, str) and TRACE_ID_RE.match(trace_id)):
+            trace_id = parent_id = None
+        if not self.enabled or (trace_id is None and random.random() >= self.sample_rate):
+            yield None
+            return
+        with self._run(Span(name, trace_id or _new_id(128), parent_id, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Time a step inside the current trace (no-op outside a trace).
+
+        Yields:
+            The child Span, or None
+        """
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        with self._run(Span(name, parent.trace_id, parent.span_id, attributes)) as span:
+            yield span
+
+    @staticmethod
+    def current_trace_id() -> Optional[str]:
+        """Get the id of the trace being recorded in this context."""
+        span = _current_span.get()
+        return span.trace_id if span is not None else None
+
+    def _export(self, span: Span):
+        line = dumps(span.to_record())
+        with self._lock:
+            self._buffer.append(line)
+            due = len(self._buffer) >= settings.tracing_flush_batch
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+                self._writer.start()
+        if due:
+            self._wakeup.set()
+
+    def _write_loop(self):
+        """Flush every FLUSH_INTERVAL_SECONDS, or sooner when a batch fills up."""
+        while True:
+            self._wakeup.wait(FLUSH_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Append buffered spans to the trace file (blocking; the writer thread calls this)."""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        with self._write_lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as trace_file:
+                    trace_file.write("\n".join(lines) + "\n")
+            except OSError as e:
+                logger.error(f"Error writing spans to {self.path}: {e}")
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that traces each HTTP request.
+
+    Continues the caller's trace from a traceparent header and returns the
+    trace id in X-Trace-Id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        trace_id, parent_id = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+
+        with tracer.trace(f"HTTP {scope['method']}", trace_id, parent_id, path=scope["path"]) as span:
+            async def send_wrapper(message):
+                if span is not None and message["type"] == "http.response.start":
+                    route = scope.get("route")
+                    if route is not None:
+                        span.name = f"HTTP {scope['method']} {route.path}"
+                    span.set(status=message["status"])
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"x-trace-id", span.trace_id.encode())]}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+# Global tracer instance
+tracer = Tracer()
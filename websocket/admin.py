@@ -10,6 +10,8 @@ from services import (
 )
 from websocket.manager import manager
 from utils.queue import session_queue
+from utils.query_profiler import query_profiler
+from utils.tracing import tracer
 from auth.jwt import verify_token
 import logging
 
@@ -49,7 +51,7 @@ async def admin_websocket(
         return
     
     # Connect admin
-    await manager.connect_admin(admin_id, websocket)
+    await manager.connect_admin(admin_id, websocket, payload.get("company_id"))
     
     # Send welcome and queue info
     queue_sessions = session_queue.get_all_sessions()
@@ -62,113 +64,118 @@ async def admin_websocket(
     
     try:
         while True:
+            # Return the pooled DB connection while the socket sits idle
+            db.rollback()
+            
             # Receive message from admin
             data = await websocket.receive_json()
             message_type = data.get("type")
             
-            if message_type == "claim_session":
-                # Admin wants to claim a session
-                session_id = data.get("session_id")
-                
-                # Verify session exists and is available
-                session = get_session_by_id(db, session_id)
-                if not session:
+            with query_profiler.unit(f"WS /ws/admin {message_type}"), \
+                    tracer.trace(f"ws.admin.{message_type}", data.get("trace_id"), admin_id=admin_id):
+                if message_type == "claim_session":
+                    # Admin wants to claim a session
+                    session_id = data.get("session_id")
+                    
+                    # Verify session exists and is available
+                    session = get_session_by_id(db, session_id)
+                    if not session:
+                        await manager.send_to_admin(admin_id, {
+                            "type": "error",
+                            "message": "Session not found"
+                        })
+                        continue
+                    
+                    # Assign admin to session
+                    assign_admin_to_session(db, session.id, admin_id)
+                    manager.assign_session_to_admin(session_id, admin_id)
+                    
+                    # Remove from queue
+                    session_queue.remove_session(session_id)
+                    
+                    # Notify admin
                     await manager.send_to_admin(admin_id, {
-                        "type": "error",
-                        "message": "Session not found"
-                    })
-                    continue
-                
-                # Assign admin to session
-                assign_admin_to_session(db, session.id, admin_id)
-                manager.assign_session_to_admin(session_id, admin_id)
-                
-                # Remove from queue
-                session_queue.remove_session(session_id)
-                
-                # Notify admin
-                await manager.send_to_admin(admin_id, {
-                    "type": "session_claimed",
-                    "session_id": session_id,
-                    "client_info": {
-                        "name": session.client_info.name,
-                        "email": session.client_info.email,
-                        "phone": session.client_info.phone,
-                    }
-                })
-                
-                # Notify client
-                if manager.is_client_connected(session_id):
-                    await manager.send_to_client(session_id, {
-                        "type": "agent_connected",
-                        "message": f"You're now connected with {admin_username}",
-                    })
-                
-                # Notify other admins
-                await manager.broadcast_to_admins({
-                    "type": "session_claimed_by_other",
-                    "session_id": session_id,
-                    "queue_size": session_queue.get_queue_size()
-                }, exclude_admin_id=admin_id)
-            
-            elif message_type == "message":
-                # Admin sending message to client
-                session_id = data.get("session_id")
-                content = data.get("content", "").strip()
-                
-                if not content:
-                    continue
-                
-                session = get_session_by_id(db, session_id)
-                if not session:
-                    continue
-                
-                # Save admin message
-                create_message(
-                    db=db,
-                    session_db_id=session.id,
-                    content=content,
-                    sender_type=SenderType.ADMIN
-                )
-                
-                # Send to client
-                if manager.is_client_connected(session_id):
-                    await manager.send_to_client(session_id, {
-                        "type": "message",
-                        "content": content,
-                        "sender_type": "ADMIN"
+                        "type": "session_claimed",
+                        "session_id": session_id,
+                        "client_info": {
+                            "name": session.client_info.name,
+                            "email": session.client_info.email,
+                            "phone": session.client_info.phone,
+                        }
                     })
-            
-            elif message_type == "close_session":
-                # Admin closing a session
-                session_id = data.get("session_id")
-                session = get_session_by_id(db, session_id)
-                
-                if session:
-                    close_session(db, session.id)
                     
                     # Notify client
                     if manager.is_client_connected(session_id):
                         await manager.send_to_client(session_id, {
-                            "type": "session_closed",
-                            "message": "This conversation has been closed. Thank you!"
+                            "type": "agent_connected",
+                            "message": f"You're now connected with {admin_username}",
+                        })
+                    
+                    # Notify other admins
+                    await manager.broadcast_to_admins({
+                        "type": "session_claimed_by_other",
+                        "session_id": session_id,
+                        "queue_size": session_queue.get_queue_size()
+                    }, exclude_admin_id=admin_id)
+                
+                elif message_type == "message":
+                    # Admin sending message to client
+                    session_id = data.get("session_id")
+                    content = data.get("content", "").strip()
+                    
+                    if not content:
+                        continue
+                    
+                    session = get_session_by_id(db, session_id)
+                    if not session:
+                        continue
+                    
+                    # Save admin message
+                    create_message(
+                        db=db,
+                        session_db_id=session.id,
+                        content=content,
+                        sender_type=SenderType.ADMIN
+                    )
+                    
+                    # Send to client
+                    if manager.is_client_connected(session_id):
+                        await manager.send_to_client(session_id, {
+                            "type": "message",
+                            "content": content,
+                            "sender_type": "ADMIN"
                         })
-                        manager.disconnect_client(session_id)
+                
+                elif message_type == "close_session":
+                    # Admin closing a session
+                    session_id = data.get("session_id")
+                    session = get_session_by_id(db, session_id)
                     
-                    # Confirm to admin
+                    if session:
+                        close_session(db, session.id)
+                        
+                        # Notify client
+                        if manager.is_client_connected(session_id):
+                            await manager.send_to_client(session_id, {
+                                "type": "session_closed",
+                                "message": "This conversation has been closed. Thank you!"
+                            })
+                            manager.disconnect_client(session_id)
+                        
+                        # Confirm to admin
+                        await manager.send_to_admin(admin_id, {
+                            "type": "session_closed",
+                            "session_id": session_id
+                        })
+                
+                elif message_type == "get_queue":
+                    # Admin requesting current queue
+                    queue_sessions = session_queue.get_all_sessions()
                     await manager.send_to_admin(admin_id, {
-                        "type": "session_closed",
-                        "session_id": session_id
+                        "type": "queue_update",
+                        "queue_size": len(queue_sessions),
+                        "queued_sessions": queue_sessions
                     })
-            
-            elif message_type == "get_queue":
-                # Admin requesting current queue
-                queue_sessions = session_queue.get_all_sessions()
-                await manager.send_to_admin(admin_id, {
-                    "type": "queue_update",
-                    "queue_size": len(queue_sessions),
-                    "queued_sessions": queue_sessions
-                })
     
     except WebSocketDisconnect:
         logger.info(f"Admin disconnected: {admin_id}")
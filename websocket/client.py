@@ -1,6 +1,8 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from sqlalchemy.orm import Session
-from models.database import get_db
+from typing import Dict, List, Optional
+from config import settings
+from models.database import SessionLocal, get_db
 from models.chat import SessionState, SenderType
 from services import (
     get_session_by_id,
@@ -9,15 +11,148 @@ from services import (
     update_session_state,
 )
 from websocket.manager import manager
-from ai.client import gemini_client
-from ai.prompts import detect_handoff_request
+from ai.client import ai_client
+from ai.context_cache import context_cache
+from ai.intent import handoff_detector
+from ai.scheduler import llm_scheduler, LLMRequestRejected
+from utils.metrics import CHAT_AI_REPLIES, CHAT_MESSAGES_PER_REPLY
 from utils.queue import session_queue
+from utils.query_profiler import query_profiler
+from utils.tracing import tracer
+import asyncio
 import logging
 import json
+import time
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+BUSY_RESPONSE = "We're receiving a lot of messages right now, so I couldn't answer that just yet. Please try again in a moment, or ask to speak with a human agent."
+
+
+class PendingReply:
+    """
+    The AI reply being prepared for one client connection.
+    
+    Messages sent within chat_debounce_ms of each other are answered
+    together. A message that arrives while the reply is still being
+    generated cancels it, and a new reply covering every unanswered message
+    is started. A burst is answered at the latest chat_debounce_max_ms after
+    its first message.
+    """
+    
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.burst_started = 0.0
+    
+    def debounce_delay(self) -> float:
+        """Seconds to wait for more messages before answering the current burst."""
+        now = time.monotonic()
+        if self.task is None or self.task.done():
+            self.burst_started = now
+        remaining = self.burst_started + settings.chat_debounce_max_ms / 1000 - now
+        return max(0.0, min(settings.chat_debounce_ms / 1000, remaining))
+    
+    def schedule(self, reply):
+        """Start preparing a reply, superseding the pending one."""
+        self.cancel()
+        self.task = asyncio.create_task(reply)
+    
+    def cancel(self):
+        """Drop the pending reply unless it is already being delivered."""
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+
+def _unanswered_messages(conversation_history: List[Dict[str, str]]) -> List[str]:
+    """Client messages after the last AI or agent message."""
+    burst = []
+    for message in reversed(conversation_history):
+        if message["sender_type"] != SenderType.CLIENT.value:
+            break
+        burst.append(message["content"])
+    return list(reversed(burst))
+
+
+async def _reply_to_burst(
+    session_id: str,
+    intent_scores: Optional[Dict[str, float]],
+    delay: float,
+    trace_id: Optional[str]
+):
+    """
+    Answer the client's unanswered messages with one AI reply.
+    
+    Runs as a task with its own database session, so the client socket keeps
+    receiving while the reply is generated.
+    """
+    delivered = False
+    db = SessionLocal()
+    try:
+        await asyncio.sleep(delay)
+        with query_profiler.unit("WS /ws/client/{session_id} reply"), \
+                tracer.trace("ws.client.reply", trace_id, session_id=session_id):
+            session = get_session_by_id(db, session_id)
+            if not session or session.state != SessionState.AI:
+                return
+            with tracer.span("db.conversation_history"):
+                conversation_history = get_conversation_history(db, session.id)
+            burst = _unanswered_messages(conversation_history)
+            if not burst:
+                return
+            
+            session_db_id = session.id
+            company_id, plan = session.company_id, session.company.subscription_plan
+            company_routing = session.company.llm_routing
+            with tracer.span("context_cache.load"):
+                company_context = context_cache.load(company_id, db)
+            # Don't hold a pooled connection through the queue wait and the LLM call
+            db.rollback()
+            try:
+                # Fair share of the LLM capacity for this company's plan
+                async with llm_scheduler.slot(company_id, plan):
+                    ai_response = await ai_client.generate_response(
+                        message="\n\n".join(burst),
+                        conversation_history=conversation_history,
+                        intent_scores=intent_scores,
+                        company_routing=company_routing,
+                        company_context=company_context
+                    )
+            except LLMRequestRejected:
+                # Shed: tell the client without recording it in the conversation
+                CHAT_AI_REPLIES.labels("shed").inc()
+                await manager.send_to_client(session_id, {
+                    "type": "message",
+                    "content": BUSY_RESPONSE,
+                    "sender_type": "AI"
+                })
+                return
+            
+            # From here on the reply is delivered even if another message arrives
+            with tracer.span("db.create_message", sender_type="AI"):
+                create_message(
+                    db=db,
+                    session_db_id=session_db_id,
+                    content=ai_response,
+                    sender_type=SenderType.AI
+                )
+            delivered = True
+            CHAT_AI_REPLIES.labels("sent").inc()
+            CHAT_MESSAGES_PER_REPLY.observe(len(burst))
+            await asyncio.shield(manager.send_to_client(session_id, {
+                "type": "message",
+                "content": ai_response,
+                "sender_type": "AI"
+            }))
+    except asyncio.CancelledError:
+        if not delivered:
+            CHAT_AI_REPLIES.labels("superseded").inc()
+        raise
+    except Exception as e:
+        logger.error(f"Error generating AI reply for session {session_id}: {e}")
+    finally:
+        db.close()
+
 
 @router.websocket("/ws/client/{session_id}")
 async def client_websocket(
@@ -41,7 +176,7 @@ async def client_websocket(
         return
     
     # Connect client
-    await manager.connect_client(session_id, websocket)
+    await manager.connect_client(session_id, websocket, session.company_id)
     
     # Send welcome message
     await manager.send_to_client(session_id, {
@@ -51,96 +186,113 @@ async def client_websocket(
         "state": session.state.value
     })
     
+    pending_reply = PendingReply()
+    
     try:
         while True:
-            # Receive message from client
-            data = await websocket.receive_json()
-            message_content = data.get("content", "").strip()
-            
-            if not message_content:
-                continue
-            
-            # Save client message
-            create_message(
-                db=db,
-                session_db_id=session.id,
-                content=message_content,
-                sender_type=SenderType.CLIENT
-            )
+            # Return the pooled DB connection while the socket sits idle
+            db.rollback()
             
-            # Refresh session state
-            db.refresh(session)
-            
-            # Check if client is requesting human agent
-            if detect_handoff_request(message_content) and session.state == SessionState.AI:
-                # Update session to request human
-                update_session_state(db, session.id, SessionState.HUMAN)
-                session_queue.add_session(session_id)
+            # Receive message from client; decoding is timed on the trace it starts
+            frame = await websocket.receive_text()
+            received = time.perf_counter()
+            data = json.loads(frame)
+            with query_profiler.unit("WS /ws/client/{session_id} message"), \
+                    tracer.trace("ws.client.message", data.get("trace_id"), session_id=session_id) as span:
+                if span is not None:
+                    span.set(receive_ms=round((time.perf_counter() - received) * 1000, 3))
+                message_content = data.get("content", "").strip()
                 
-                # Notify client
-                await manager.send_to_client(session_id, {
-                    "type": "handoff_requested",
-                    "message": "I'll connect you with a human agent. Please wait...",
-                    "sender_type": "AI"
-                })
+                if not message_content:
+                    continue
                 
-                # Notify all admins of new session in queue
-                await manager.broadcast_to_admins({
-                    "type": "new_session_queued",
-                    "session_id": session_id,
-                    "client_name": session.client_info.name,
-                    "queue_size": session_queue.get_queue_size()
-                })
+                # Save client message
+                with tracer.span("db.create_message", sender_type="CLIENT"):
+                    create_message(
+                        db=db,
+                        session_db_id=session.id,
+                        content=message_content,
+                        sender_type=SenderType.CLIENT
+                    )
                 
-                continue
-            
-            # Route message based on session state
-            if session.state == SessionState.AI:
-                # AI handles the message
-                conversation_history = get_conversation_history(db, session.id)
-                ai_response = await gemini_client.generate_response(
-                    message=message_content,
-                    conversation_history=conversation_history
-                )
+                # Refresh session state
+                with tracer.span("db.refresh_session"):
+                    db.refresh(session)
                 
-                # Save AI response
-                create_message(
-                    db=db,
-                    session_db_id=session.id,
-                    content=ai_response,
-                    sender_type=SenderType.AI
-                )
+                # Check if client is requesting human agent (local matcher and classifier, no LLM call)
+                intent = None
+                if session.state == SessionState.AI:
+                    with tracer.span("handoff.detect") as span:
+                        intent = handoff_detector.detect(
+                            message_content,
+                            company_id=session.company_id,
+                            company_keywords=session.company.handoff_keywords
+                        )
+                        if span is not None:
+                            span.set(handoff=intent.handoff, reason=intent.reason)
                 
-                # Send to client
-                await manager.send_to_client(session_id, {
-                    "type": "message",
-                    "content": ai_response,
-                    "sender_type": "AI"
-                })
-            
-            elif session.state == SessionState.HUMAN:
-                # Forward to assigned admin
-                admin_id = manager.get_admin_for_session(session_id)
-                if admin_id and manager.is_admin_connected(admin_id):
-                    await manager.send_to_admin(admin_id, {
-                        "type": "message",
+                if intent:
+                    pending_reply.cancel()
+                    logger.info(
+                        f"Handoff detected for session {session_id}: reason={intent.reason}, "
+                        f"keyword={intent.matched_keyword}, scores={intent.scores}"
+                    )
+                    # Update session to request human
+                    with tracer.span("db.update_session_state"):
+                        update_session_state(db, session.id, SessionState.HUMAN)
+                    session_queue.add_session(session_id)
+                    
+                    # Notify client
+                    await manager.send_to_client(session_id, {
+                        "type": "handoff_requested",
+                        "message": "I'll connect you with a human agent. Please wait...",
+                        "sender_type": "AI"
+                    })
+                    
+                    # Notify all admins of new session in queue
+                    await manager.broadcast_to_admins({
+                        "type": "new_session_queued",
                         "session_id": session_id,
-                        "content": message_content,
-                        "sender_type": "CLIENT",
-                        "client_name": session.client_info.name
+                        "client_name": session.client_info.name,
+                        "queue_size": session_queue.get_queue_size()
                     })
-                else:
-                    # No admin connected, add to queue if not already there
-                    if not session_queue.is_in_queue(session_id):
-                        session_queue.add_session(session_id)
-                        await manager.send_to_client(session_id, {
-                            "type": "waiting",
-                            "message": "Waiting for an agent to connect...",
+                    
+                    continue
+                
+                # Route message based on session state
+                if session.state == SessionState.AI:
+                    # Answer once the client pauses; this message restarts any reply still pending
+                    pending_reply.schedule(_reply_to_burst(
+                        session_id,
+                        intent_scores=intent.scores if intent is not None else None,
+                        delay=pending_reply.debounce_delay(),
+                        trace_id=tracer.current_trace_id()
+                    ))
+                
+                elif session.state == SessionState.HUMAN:
+                    # Forward to assigned admin
+                    admin_id = manager.get_admin_for_session(session_id)
+                    if admin_id and manager.is_admin_connected(admin_id):
+                        await manager.send_to_admin(admin_id, {
+                            "type": "message",
+                            "session_id": session_id,
+                            "content": message_content,
+                            "sender_type": "CLIENT",
+                            "client_name": session.client_info.name
                         })
+                    else:
+                        # No admin connected, add to queue if not already there
+                        if not session_queue.is_in_queue(session_id):
+                            session_queue.add_session(session_id)
+                            await manager.send_to_client(session_id, {
+                                "type": "waiting",
+                                "message": "Waiting for an agent to connect...",
+                            })
     
     except WebSocketDisconnect:
         logger.info(f"Client disconnected: {session_id}")
     except Exception as e:
         logger.error(f"Error in client WebSocket: {e}")
     finally:
+        pending_reply.cancel()
         manager.disconnect_client(session_id)
@@ -1,7 +1,10 @@
 from typing import Dict, Set, Optional
 from fastapi import WebSocket
+from utils.serialization import dumps
+from utils.metrics import WS_CONNECTIONS
+from utils.tracing import tracer
+import asyncio
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
@@ -18,33 +21,47 @@ class ConnectionManager:
         
         # Session to admin mapping: {session_id: admin_id}
         self.session_admin_map: Dict[str, int] = {}
+        
+        # Company of each connection, for the per-company connection gauge
+        self.client_companies: Dict[str, Optional[int]] = {}
+        self.admin_companies: Dict[int, Optional[int]] = {}
     
-    async def connect_client(self, session_id: str, websocket: WebSocket):
+    async def connect_client(self, session_id: str, websocket: WebSocket, company_id: Optional[int] = None):
         """Connect a client WebSocket."""
         await websocket.accept()
+        if session_id in self.client_connections:
+            self._untrack("client", self.client_companies.pop(session_id, None))
         self.client_connections[session_id] = websocket
+        self.client_companies[session_id] = company_id
+        WS_CONNECTIONS.labels(company_id, "client").inc()
         logger.info(f"Client connected: session_id={session_id}")
     
     def disconnect_client(self, session_id: str):
         """Disconnect a client WebSocket."""
         if session_id in self.client_connections:
             del self.client_connections[session_id]
+            self._untrack("client", self.client_companies.pop(session_id, None))
             logger.info(f"Client disconnected: session_id={session_id}")
         
         # Remove session-admin mapping if exists
         if session_id in self.session_admin_map:
             del self.session_admin_map[session_id]
     
-    async def connect_admin(self, admin_id: int, websocket: WebSocket):
+    async def connect_admin(self, admin_id: int, websocket: WebSocket, company_id: Optional[int] = None):
         """Connect an admin WebSocket."""
         await websocket.accept()
+        if admin_id in self.admin_connections:
+            self._untrack("admin", self.admin_companies.pop(admin_id, None))
         self.admin_connections[admin_id] = websocket
+        self.admin_companies[admin_id] = company_id
+        WS_CONNECTIONS.labels(company_id, "admin").inc()
         logger.info(f"Admin connected: admin_id={admin_id}")
     
     def disconnect_admin(self, admin_id: int):
         """Disconnect an admin WebSocket."""
         if admin_id in self.admin_connections:
             del self.admin_connections[admin_id]
+            self._untrack("admin", self.admin_companies.pop(admin_id, None))
             logger.info(f"Admin disconnected: admin_id={admin_id}")
         
         # Remove all session mappings for this admin
@@ -55,11 +72,26 @@ class ConnectionManager:
         for session_id in sessions_to_remove:
             del self.session_admin_map[session_id]
     
+    @staticmethod
+    def _untrack(role: str, company_id: Optional[int]):
+        """Decrement the connection gauge, dropping series that reach zero."""
+        gauge = WS_CONNECTIONS.labels(company_id, role)
+        gauge.dec()
+        if gauge.value <= 0:
+            WS_CONNECTIONS.remove(company_id, role)
+    
+    @staticmethod
+    def _with_trace_id(message: dict) -> dict:
+        """Tag a frame with the trace it is sent from, so clients can correlate it."""
+        trace_id = tracer.current_trace_id()
+        return {**message, "trace_id": trace_id} if trace_id else message
+    
     async def send_to_client(self, session_id: str, message: dict):
         """Send a message to a specific client."""
         if session_id in self.client_connections:
             try:
-                await self.client_connections[session_id].send_json(message)
+                with tracer.span("ws.send_to_client", type=message.get("type")):
+                    await self.client_connections[session_id].send_text(dumps(self._with_trace_id(message)))
             except Exception as e:
                 logger.error(f"Error sending to client {session_id}: {e}")
                 self.disconnect_client(session_id)
@@ -68,20 +100,32 @@ class ConnectionManager:
         """Send a message to a specific admin."""
         if admin_id in self.admin_connections:
             try:
-                await self.admin_connections[admin_id].send_json(message)
+                with tracer.span("ws.send_to_admin", type=message.get("type")):
+                    await self.admin_connections[admin_id].send_text(dumps(self._with_trace_id(message)))
             except Exception as e:
                 logger.error(f"Error sending to admin {admin_id}: {e}")
                 self.disconnect_admin(admin_id)
     
     async def broadcast_to_admins(self, message: dict, exclude_admin_id: Optional[int] = None):
-        """Broadcast a message to all connected admins."""
-        for admin_id, websocket in self.admin_connections.items():
-            if exclude_admin_id and admin_id == exclude_admin_id:
-                continue
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to admin {admin_id}: {e}")
+        """
+        Broadcast a message to all connected admins.
+        
+        The frame is encoded once and sent to every admin concurrently, so
+        one slow connection does not delay the others.
+        """
+        text = dumps(self._with_trace_id(message))
+        targets = [
+            (admin_id, websocket) for admin_id, websocket in self.admin_connections.items()
+            if not (exclude_admin_id and admin_id == exclude_admin_id)
+        ]
+        with tracer.span("ws.broadcast_to_admins", type=message.get("type"), admins=len(targets)):
+            results = await asyncio.gather(
+                *(websocket.send_text(text) for _, websocket in targets),
+                return_exceptions=True
+            )
+        for (admin_id, _), result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error broadcasting to admin {admin_id}: {result}")
     
     def assign_session_to_admin(self, session_id: str, admin_id: int):
         """Assign a session to an admin."""